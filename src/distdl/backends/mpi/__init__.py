@@ -1,10 +1,15 @@
 from . import autograd  # noqa: F401
+from . import gradient_bucketer  # noqa: F401
 from . import partition  # noqa: F401
 from . import tensor_comm  # noqa: F401
 #
 # Expose the partition types
 from .partition import MPICartesianPartition as CartesianPartition  # noqa: F401
 from .partition import MPIPartition as Partition  # noqa: F401
+from .partition import free_partition_cache  # noqa: F401
+#
+# Expose the gradient bucketer
+from .gradient_bucketer import MPIGradientBucketer as GradientBucketer  # noqa: F401
 #
 #
 from .tensor_comm import compute_global_tensor_shape  # noqa: F401
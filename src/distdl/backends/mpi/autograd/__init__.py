@@ -1,3 +1,4 @@
+from . import all_sum_reduce  # noqa: F401
 from . import broadcast  # noqa: F401
 from . import halo_exchange  # noqa: F401
 from . import sum_reduce  # noqa: F401
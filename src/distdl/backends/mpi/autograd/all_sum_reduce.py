@@ -0,0 +1,100 @@
+import torch
+from mpi4py import MPI
+
+from distdl.utilities.dtype import numpy_view
+from distdl.utilities.dtype import reduction_dtype
+from distdl.utilities.torch import zero_volume_tensor
+
+
+def _allreduce_tensor(x, P_send, P_recv, x_tensor_structure):
+
+    reduced_data = None
+
+    requests = []
+
+    # Workers in the source partition reduce their data over their reduction
+    # group and get the sum back.
+    if P_send.active:
+        reduced_data = x.to(reduction_dtype(x.dtype), copy=True).contiguous()
+        req = P_send.comm.Iallreduce(MPI.IN_PLACE, numpy_view(reduced_data), op=MPI.SUM)
+        requests.append(req)
+
+    # A root of a different reduction group has no data of its own for that
+    # group, so it contributes zeros and ignores the result.  Both reductions
+    # are in flight together, as the groups may be entered in any order.
+    if P_send != P_recv and P_recv.active:
+        root_data = torch.zeros(tuple(x_tensor_structure[2]),
+                                dtype=reduction_dtype(x_tensor_structure[3]))
+        req = P_recv.comm.Iallreduce(MPI.IN_PLACE, numpy_view(root_data), op=MPI.SUM)
+        requests.append(req)
+
+    MPI.Request.Waitall(requests)
+
+    return reduced_data
+
+
+class AllSumReduceFunction(torch.autograd.Function):
+
+    @staticmethod
+    def forward(ctx, input, P_send, P_recv, preserve_batch,
+                input_tensor_structure, output_tensor_structure):
+
+        ctx.P_send = P_send
+        ctx.P_recv = P_recv
+        ctx.preserve_batch = preserve_batch
+        ctx.input_tensor_structure = input_tensor_structure
+        ctx.output_tensor_structure = output_tensor_structure
+
+        input_requires_grad = input_tensor_structure[0]
+        input_dtype = input_tensor_structure[3]
+
+        # This allows all ranks to use the same exit path, so that we can be
+        # sure that all requests have cleared.
+        if preserve_batch:
+            output = zero_volume_tensor(input.shape[0], dtype=input.dtype)
+        else:
+            output = zero_volume_tensor(dtype=input.dtype)
+
+        # The reduction followed by the broadcast back to the source partition
+        # is a single allreduce over the reduction group.
+        if P_send.active or P_recv.active:
+            reduced_data = _allreduce_tensor(input, P_send, P_recv,
+                                             output_tensor_structure)
+
+            # Only workers in the source partition keep the result.
+            if P_send.active:
+                output = reduced_data.to(input_dtype)
+                output.requires_grad = input_requires_grad
+
+        return output
+
+    @staticmethod
+    def backward(ctx, grad_output):
+
+        P_send = ctx.P_send
+        P_recv = ctx.P_recv
+        preserve_batch = ctx.preserve_batch
+        input_tensor_structure = ctx.input_tensor_structure
+        output_tensor_structure = ctx.output_tensor_structure
+
+        input_requires_grad = input_tensor_structure[0]
+        input_dtype = input_tensor_structure[3]
+
+        # This allows all ranks to use the same exit path, so that we can be
+        # sure that all requests have cleared.
+        if preserve_batch:
+            grad_input = zero_volume_tensor(grad_output.shape[0], dtype=grad_output.dtype)
+        else:
+            grad_input = zero_volume_tensor(dtype=grad_output.dtype)
+
+        # The adjoint of the broadcast is a reduction and the adjoint of the
+        # reduction is a broadcast, so the operator is self-adjoint.
+        if P_send.active or P_recv.active:
+            reduced_data = _allreduce_tensor(grad_output, P_send, P_recv,
+                                             output_tensor_structure)
+
+            if P_send.active:
+                grad_input = reduced_data.to(input_dtype)
+                grad_input.requires_grad = input_requires_grad
+
+        return grad_input, None, None, None, None, None
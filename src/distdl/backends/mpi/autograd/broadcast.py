@@ -2,55 +2,118 @@ import numpy as np
 import torch
 from mpi4py import MPI
 
+from distdl.utilities.dtype import numpy_view
+from distdl.utilities.dtype import reduction_dtype
 from distdl.utilities.torch import zero_volume_tensor
 
 
+def _check_broadcast_cache(input, P_send, P_recv, cache):
+
+    send = False
+    recv = False
+
+    requests = []
+
+    # The root identifies the version of its input by the tensor, its
+    # storage, and its version counter, which in-place updates, e.g., by an
+    # optimizer, increment.  Receivers learn it from a small broadcast.
+    if P_send.active:
+        version = np.array([id(input), input.data_ptr(), input._version], dtype=np.int64)
+        send = not np.array_equal(version, cache.get("send_version"))
+        cache["send_version"] = version
+        req = P_send.comm.Ibcast(version, root=0)
+        requests.append(req)
+
+    if P_recv.active and P_send != P_recv:
+        version = np.zeros(3, dtype=np.int64)
+        req = P_recv.comm.Ibcast(version, root=0)
+        req.Wait()
+        recv = not np.array_equal(version, cache.get("recv_version"))
+        cache["recv_version"] = version
+
+    MPI.Request.Waitall(requests)
+
+    return send, recv
+
+
+def start_broadcast(input, P_send, P_recv, preserve_batch, output_tensor_structure,
+                    cache=None):
+
+    output_tensor_shape = output_tensor_structure[2]
+    output_dtype = output_tensor_structure[3]
+
+    # If the output is cached, the data is only broadcast if the root's
+    # input changed since the last broadcast.
+    send = True
+    recv = True
+    if cache is not None:
+        send, recv = _check_broadcast_cache(input, P_send, P_recv, cache)
+
+    # This allows all ranks to use the same exit path, so that we can be
+    # sure that all requests have cleared.
+    if preserve_batch:
+        output = zero_volume_tensor(input.shape[0], dtype=input.dtype)
+    else:
+        output = zero_volume_tensor(dtype=input.dtype)
+
+    requests = []
+
+    # Send all of the data
+    if P_send.active and send:
+        input_numpy = numpy_view(input)
+        req = P_send.comm.Ibcast(input_numpy, root=0)
+        requests.append(req)
+
+    if P_recv.active:
+        # If I also send, make a copy.
+        if P_send == P_recv:
+            output = input.detach().clone()
+        # If I just receive, receive the broadcast
+        # The broadcast is received directly into the output tensor,
+        # which it overwrites entirely.
+        elif recv:
+            output = torch.empty(tuple(output_tensor_shape), dtype=output_dtype)
+
+            req = P_recv.comm.Ibcast(numpy_view(output), root=0)
+            requests.append(req)
+
+            if cache is not None:
+                cache["output"] = output
+        # The cached output is detached, so that each call gets its own node
+        # in the autograd graph.
+        else:
+            output = cache["output"].detach()
+
+    return output, requests
+
+
 class BroadcastFunction(torch.autograd.Function):
 
     @staticmethod
     def forward(ctx, input, P_send, P_recv, preserve_batch,
-                input_tensor_structure, output_tensor_structure, dtype):
+                input_tensor_structure, output_tensor_structure,
+                pending=None):
 
         ctx.P_send = P_send
         ctx.P_recv = P_recv
         ctx.preserve_batch = preserve_batch
         ctx.input_tensor_structure = input_tensor_structure
         ctx.output_tensor_structure = output_tensor_structure
-        ctx.dtype = dtype
 
         output_requires_grad = output_tensor_structure[0]
-        output_tensor_shape = output_tensor_structure[2]
-
-        # This allows all ranks to use the same exit path, so that we can be
-        # sure that all requests have cleared.
-        if preserve_batch:
-            output = zero_volume_tensor(input.shape[0])
-        else:
-            output = zero_volume_tensor()
 
-        # return output
-        requests = []
-
-        # Send all of the data
-        if P_send.active:
-            input_numpy = input.detach().numpy()
-            req = P_send.comm.Ibcast(input_numpy, root=0)
-            requests.append(req)
-
-        if P_recv.active:
-            # If I also send, make a copy.
-            if P_send == P_recv:
-                output = input.clone()
-            # If I just receive, receive the broadcast
-            else:
-                output = np.zeros(output_tensor_shape, dtype=dtype)
-
-                req = P_recv.comm.Ibcast(output, root=0)
-                req.Wait()
-                output = torch.tensor(output, requires_grad=output_requires_grad)
+        # The broadcast may have been started ahead of time, in which case it
+        # only has to be completed.
+        if pending is None:
+            pending = start_broadcast(input, P_send, P_recv, preserve_batch,
+                                      output_tensor_structure)
+        output, requests = pending
 
         MPI.Request.Waitall(requests)
 
+        if P_recv.active and P_send != P_recv:
+            output.requires_grad = output_requires_grad
+
         return output
 
     @staticmethod
@@ -61,18 +124,19 @@ class BroadcastFunction(torch.autograd.Function):
         preserve_batch = ctx.preserve_batch
         input_tensor_structure = ctx.input_tensor_structure
         output_tensor_structure = ctx.output_tensor_structure
-        dtype = ctx.dtype
 
         input_requires_grad = input_tensor_structure[0]
         input_tensor_shape = input_tensor_structure[2]
+        input_dtype = input_tensor_structure[3]
         output_tensor_shape = output_tensor_structure[2]
+        output_dtype = output_tensor_structure[3]
 
         # This allows all ranks to use the same exit path, so that we can be
         # sure that all requests have cleared.
         if preserve_batch:
-            grad_input = zero_volume_tensor(grad_output.shape[0])
+            grad_input = zero_volume_tensor(grad_output.shape[0], dtype=grad_output.dtype)
         else:
-            grad_input = zero_volume_tensor()
+            grad_input = zero_volume_tensor(dtype=grad_output.dtype)
 
         requests = []
 
@@ -80,28 +144,64 @@ class BroadcastFunction(torch.autograd.Function):
         # I need to reduce that data.  If I send and receive to myself, this
         # is OK, as the reduction accounts for the copy, unlike the broadcast
         # above.
+        # Types that MPI cannot reduce are reduced in a wider type.
+        # Only the root, which also sent the data, needs a receive buffer.
+        # The reduction overwrites it entirely.
         if P_recv.active:
-            reduced_data_recv = np.zeros(output_tensor_shape, dtype=dtype)
-            grad_output_numpy = grad_output.detach().numpy()
-            req = P_recv.comm.Ireduce(grad_output_numpy, reduced_data_recv, root=0, op=MPI.SUM)
+            recv_reduce_dtype = reduction_dtype(output_dtype)
+            reduced_data_recv = None
+            reduced_data_recv_numpy = None
+            if P_send == P_recv:
+                reduced_data_recv = torch.empty(tuple(output_tensor_shape), dtype=recv_reduce_dtype)
+                reduced_data_recv_numpy = numpy_view(reduced_data_recv)
+            grad_output_numpy = numpy_view(grad_output.to(recv_reduce_dtype))
+            req = P_recv.comm.Ireduce(grad_output_numpy, reduced_data_recv_numpy, root=0, op=MPI.SUM)
             requests.append(req)
 
         # If I sent data in the forward, I have to receive it here.  Unless I
-        # also received that data, then I already have it from abive.  mpi4py
-        # does not allow aliasing of the input, so we have to make a copy of
-        # nothing, unfortunately.
+        # also received that data, then I already have it from above.  As the
+        # root, my contribution is zero, which the zeroed receive buffer
+        # holds, so the reduction is done in place.
         if P_send != P_recv and P_send.active:
-            reduced_data_send = np.zeros(input_tensor_shape, dtype=dtype)
-            req = P_send.comm.Ireduce(reduced_data_send.copy(), reduced_data_send, root=0, op=MPI.SUM)
+            send_reduce_dtype = reduction_dtype(input_dtype)
+            reduced_data_send = torch.zeros(tuple(input_tensor_shape), dtype=send_reduce_dtype)
+            req = P_send.comm.Ireduce(MPI.IN_PLACE, numpy_view(reduced_data_send), root=0, op=MPI.SUM)
             requests.append(req)
 
         MPI.Request.Waitall(requests)
 
-        # If we had to receive data, we need to tensorify it.
+        # If we had to receive data, it is already a tensor, in the reduction
+        # dtype.
         if P_send.active:
             if P_send == P_recv:
-                grad_input = torch.tensor(reduced_data_recv, requires_grad=input_requires_grad)
+                grad_input = reduced_data_recv.to(input_dtype)
             else:
-                grad_input = torch.tensor(reduced_data_send, requires_grad=input_requires_grad)
+                grad_input = reduced_data_send.to(input_dtype)
+            grad_input.requires_grad = input_requires_grad
 
         return grad_input, None, None, None, None, None, None
+
+
+class BucketedBroadcastFunction(torch.autograd.Function):
+
+    @staticmethod
+    def forward(ctx, input, P_send, P_recv, preserve_batch,
+                input_tensor_structure, output_tensor_structure,
+                gradient_bucketer, bucket_slot, pending=None):
+
+        ctx.gradient_bucketer = gradient_bucketer
+        ctx.bucket_slot = bucket_slot
+
+        return BroadcastFunction.forward(ctx, input, P_send, P_recv, preserve_batch,
+                                         input_tensor_structure, output_tensor_structure,
+                                         pending)
+
+    @staticmethod
+    def backward(ctx, grad_output):
+
+        # The reduction is deferred to the bucketer, which accumulates the
+        # reduced gradient into the parameter on the root once the backward
+        # pass ends.
+        ctx.gradient_bucketer.add(ctx.bucket_slot, grad_output)
+
+        return None, None, None, None, None, None, None, None, None
@@ -2,65 +2,546 @@ import numpy as np
 import torch
 from mpi4py import MPI
 
+from distdl.utilities.dtype import numpy_view
+from distdl.utilities.dtype import torch_view
+from distdl.utilities.torch import pad_tensor
 from distdl.utilities.torch import zero_volume_tensor
 
 
-class HaloExchangeFunction(torch.autograd.Function):
+def init_persistent_requests(P_x, buffers, neighbor_ranks):
 
-    @staticmethod
-    def forward(ctx, input, P_x, slices, buffers, neighbor_ranks):
+    # The buffers are fixed for the lifetime of the setup, so the requests
+    # that move data between them can be created once and restarted on every
+    # call.  The tags and buffer pairings mirror the non-persistent path.
+    ltag = 0
+    rtag = 1
 
-        ctx.slices = slices
-        ctx.buffers = buffers
-        ctx.neighbor_ranks = neighbor_ranks
-        ctx.P_x = P_x
+    forward_requests = []
+    adjoint_requests = []
 
-        if not P_x.active:
-            return zero_volume_tensor(input.shape[0])
+    for i in range(P_x.dim):
 
-        ctx.mark_dirty(input)
+        lbb, lgb, rbb, rgb = buffers[i]
+        lrank, rrank = neighbor_ranks[i]
 
-        if P_x.size == 1:
-            return input
+        # In the forward exchange, bulk buffers are sent and ghost buffers are
+        # received.
+        lrecv_req = P_x.comm.Recv_init(lgb, source=lrank, tag=rtag) if lgb is not None else MPI.REQUEST_NULL
+        rrecv_req = P_x.comm.Recv_init(rgb, source=rrank, tag=ltag) if rgb is not None else MPI.REQUEST_NULL
+        lsend_req = P_x.comm.Send_init(lbb, dest=lrank, tag=ltag) if lbb is not None else MPI.REQUEST_NULL
+        rsend_req = P_x.comm.Send_init(rbb, dest=rrank, tag=rtag) if rbb is not None else MPI.REQUEST_NULL
+        forward_requests.append([lrecv_req, rrecv_req, lsend_req, rsend_req])
+
+        # In the adjoint exchange, ghost buffers are sent and bulk buffers are
+        # received.
+        lrecv_req = P_x.comm.Recv_init(lbb, source=lrank, tag=rtag) if lbb is not None else MPI.REQUEST_NULL
+        rrecv_req = P_x.comm.Recv_init(rbb, source=rrank, tag=ltag) if rbb is not None else MPI.REQUEST_NULL
+        lsend_req = P_x.comm.Send_init(lgb, dest=lrank, tag=ltag) if lgb is not None else MPI.REQUEST_NULL
+        rsend_req = P_x.comm.Send_init(rgb, dest=rrank, tag=rtag) if rgb is not None else MPI.REQUEST_NULL
+        adjoint_requests.append([lrecv_req, rrecv_req, lsend_req, rsend_req])
+
+    return forward_requests, adjoint_requests
+
+
+def free_persistent_requests(requests):
+
+    forward_requests, adjoint_requests = requests
+    for reqs in forward_requests + adjoint_requests:
+        for req in reqs:
+            if req != MPI.REQUEST_NULL:
+                req.Free()
+
+
+def create_subarray_datatypes(slices, x_local_shape, itemsize,
+                              recv_buffer_shape, send_buffer_shape):
+
+    # The base type only needs to describe the size of a tensor entry, as the
+    # halo is moved, not reduced.  This makes the types valid for any dtype.
+    base_type = MPI.BYTE.Create_contiguous(itemsize)
+
+    sizes = [int(s) for s in x_local_shape]
+
+    datatypes = []
+    for i in range(len(slices)):
+        region_sizes = [send_buffer_shape[i, 0], recv_buffer_shape[i, 0],
+                        send_buffer_shape[i, 1], recv_buffer_shape[i, 1]]
+
+        datatypes_i = []
+        for sl, region_size in zip(slices[i], region_sizes):
+            datatype = None
+            if region_size > 0:
+                subsizes = [s.stop - s.start for s in sl]
+                starts = [s.start for s in sl]
+                datatype = base_type.Create_subarray(sizes, subsizes, starts,
+                                                     order=MPI.ORDER_C).Commit()
+            datatypes_i.append(datatype)
+        datatypes.append(datatypes_i)
+
+    base_type.Free()
+
+    return datatypes
+
+
+def free_subarray_datatypes(datatypes):
+
+    for datatypes_i in datatypes:
+        for datatype in datatypes_i:
+            if datatype is not None:
+                datatype.Free()
+
+
+def start_persistent_requests(requests):
+
+    # MPI_Startall is erroneous on null requests, so only the real ones are
+    # started.  Inactive persistent requests are treated as null by Waitany.
+    MPI.Prequest.Startall([req for req in requests if req != MPI.REQUEST_NULL])
+
+
+def post_forward_exchange(P_x, i, input_numpy, slices, buffers, neighbor_ranks,
+                          requests=None, datatypes=None):
+
+    lbs, lgs, rbs, rgs = slices[i]
+    lbb, lgb, rbb, rgb = buffers[i]
+    lrank, rrank = neighbor_ranks[i]
+
+    ltag = 0
+    rtag = 1
+
+    # With subarray datatypes, the bulk is sent directly from, and the ghosts
+    # are received directly into, the input tensor.
+    if datatypes is not None:
+        lbt, lgt, rbt, rgt = datatypes[i]
+
+        lrecv_req = P_x.comm.Irecv([input_numpy, 1, lgt], source=lrank, tag=rtag) if lgt is not None else MPI.REQUEST_NULL
+        rrecv_req = P_x.comm.Irecv([input_numpy, 1, rgt], source=rrank, tag=ltag) if rgt is not None else MPI.REQUEST_NULL
+        lsend_req = P_x.comm.Isend([input_numpy, 1, lbt], dest=lrank, tag=ltag) if lbt is not None else MPI.REQUEST_NULL
+        rsend_req = P_x.comm.Isend([input_numpy, 1, rbt], dest=rrank, tag=rtag) if rbt is not None else MPI.REQUEST_NULL
+
+        return [lrecv_req, rrecv_req, lsend_req, rsend_req]
+
+    if lbb is not None:
+        np.copyto(lbb, input_numpy[lbs].ravel())
+    if rbb is not None:
+        np.copyto(rbb, input_numpy[rbs].ravel())
+
+    if requests is not None:
+        reqs = requests[0][i]
+        start_persistent_requests(reqs)
+        return reqs
+
+    lrecv_req = P_x.comm.Irecv(lgb, source=lrank, tag=rtag) if lgb is not None else MPI.REQUEST_NULL
+    rrecv_req = P_x.comm.Irecv(rgb, source=rrank, tag=ltag) if rgb is not None else MPI.REQUEST_NULL
+    lsend_req = P_x.comm.Isend(lbb, dest=lrank, tag=ltag) if lbb is not None else MPI.REQUEST_NULL
+    rsend_req = P_x.comm.Isend(rbb, dest=rrank, tag=rtag) if rbb is not None else MPI.REQUEST_NULL
+
+    return [lrecv_req, rrecv_req, lsend_req, rsend_req]
+
+
+def complete_forward_exchange(i, input_numpy, slices, buffers, reqs,
+                              datatypes=None):
+
+    # Received data is already in place with subarray datatypes.
+    if datatypes is not None:
+        MPI.Request.Waitall(reqs)
+        return
+
+    lbs, lgs, rbs, rgs = slices[i]
+    lbb, lgb, rbb, rgb = buffers[i]
+
+    n_reqs_completed = 0
+
+    while n_reqs_completed < len(reqs):
+        status = MPI.Status()
+        index = MPI.Request.Waitany(reqs, status)
+
+        if index != MPI.UNDEFINED:
+            if index == 0:
+                newshape = input_numpy[lgs].shape
+                np.copyto(input_numpy[lgs], lgb.reshape(newshape))
+            elif index == 1:
+                newshape = input_numpy[rgs].shape
+                np.copyto(input_numpy[rgs], rgb.reshape(newshape))
+
+        n_reqs_completed += 1
+
+
+def post_diagonal_exchange(P_x, input_numpy, slices, buffers, neighbor_ranks):
+
+    # All messages, across faces, edges, and corners, are posted at once.  A
+    # message is tagged with the position of the receiver in the sender's
+    # neighbor list, so messages stay distinct if two neighbors are the same
+    # worker.  The neighbor at position k sees this worker at n - 1 - k.
+    n = len(neighbor_ranks)
+
+    recv_reqs = []
+    send_reqs = []
+    for k, (_, rank) in enumerate(neighbor_ranks):
+        bs, gs = slices[k]
+        bb, gb = buffers[k]
+
+        recv_req = P_x.comm.Irecv(gb, source=rank, tag=n-1-k) if gb is not None else MPI.REQUEST_NULL
+        recv_reqs.append(recv_req)
+
+        send_req = MPI.REQUEST_NULL
+        if bb is not None:
+            np.copyto(bb, input_numpy[bs].ravel())
+            send_req = P_x.comm.Isend(bb, dest=rank, tag=k)
+        send_reqs.append(send_req)
+
+    return recv_reqs + send_reqs
+
+
+def complete_diagonal_exchange(input_numpy, slices, buffers, reqs):
+
+    n = len(slices)
+
+    n_reqs_completed = 0
+
+    while n_reqs_completed < len(reqs):
+        status = MPI.Status()
+        index = MPI.Request.Waitany(reqs, status)
+
+        if index != MPI.UNDEFINED and index < n:
+            _, gs = slices[index]
+            _, gb = buffers[index]
+            newshape = input_numpy[gs].shape
+            np.copyto(input_numpy[gs], gb.reshape(newshape))
+
+        n_reqs_completed += 1
+
+
+def adjoint_diagonal_halo_exchange(P_x, grad_output, slices, buffers,
+                                   neighbor_ranks):
+
+    grad = grad_output.detach()
+    grad_output_numpy = numpy_view(grad_output)
+
+    n = len(neighbor_ranks)
+
+    # The ghost regions are disjoint from each other and from the bulk, so
+    # each can be cleared as soon as it is packed.  The bulk regions overlap,
+    # so everything received is accumulated.
+    recv_reqs = []
+    send_reqs = []
+    for k, (_, rank) in enumerate(neighbor_ranks):
+        bs, gs = slices[k]
+        bb, gb = buffers[k]
+
+        recv_req = P_x.comm.Irecv(bb, source=rank, tag=n-1-k) if bb is not None else MPI.REQUEST_NULL
+        recv_reqs.append(recv_req)
+
+        send_req = MPI.REQUEST_NULL
+        if gb is not None:
+            np.copyto(gb, grad_output_numpy[gs].ravel())
+            grad_output_numpy[gs] = 0.0
+            send_req = P_x.comm.Isend(gb, dest=rank, tag=k)
+        send_reqs.append(send_req)
+
+    reqs = recv_reqs + send_reqs
+
+    n_reqs_completed = 0
+
+    while n_reqs_completed < len(reqs):
+        status = MPI.Status()
+        index = MPI.Request.Waitany(reqs, status)
+
+        if index != MPI.UNDEFINED and index < n:
+            bs, _ = slices[index]
+            bb, _ = buffers[index]
+            newshape = grad[bs].shape
+            grad[bs] += torch_view(bb, grad.dtype).reshape(newshape)
+
+        n_reqs_completed += 1
+
+
+def post_neighborhood_exchange(P_x, i, send_numpy, send_types,
+                               recv_numpy, recv_counts, recv_displs,
+                               recv_types):
+
+    # The neighbors in a Cartesian topology are ordered by dimension, left
+    # then right, and only the two along dimension i exchange in this round.
+    # The counts and displacements are in units of the types, which are
+    # placeholders where nothing is sent or received.
+    n = 2*P_x.dim
+
+    send_spec = [[0]*n, [0]*n, [MPI.BYTE]*n]
+    recv_spec = [[0]*n, [0]*n, [MPI.BYTE]*n]
+
+    for k, j in enumerate([2*i, 2*i+1]):
+        if send_types[k] is not None:
+            send_spec[0][j] = 1
+            send_spec[2][j] = send_types[k]
+        if recv_types[k] is not None:
+            recv_spec[0][j] = recv_counts[k]
+            recv_spec[1][j] = recv_displs[k]
+            recv_spec[2][j] = recv_types[k]
+
+    return P_x.comm.Ineighbor_alltoallw([send_numpy, (send_spec[0], send_spec[1]), send_spec[2]],
+                                        [recv_numpy, (recv_spec[0], recv_spec[1]), recv_spec[2]])
+
+
+def post_forward_neighborhood_exchange(P_x, i, input_numpy, datatypes):
+
+    # The bulk is sent directly from, and the ghosts are received directly
+    # into, the input tensor.  The regions are disjoint.
+    lbt, lgt, rbt, rgt = datatypes[i]
+
+    return post_neighborhood_exchange(P_x, i, input_numpy, [lbt, rbt],
+                                      input_numpy, [1, 1], [0, 0], [lgt, rgt])
+
+
+def exchanged_dims(P_x):
 
-        input_numpy = input.detach().numpy()
+    # The exchange is a collective over the whole partition, so every worker
+    # must take part in the same rounds.  Dimensions that are not partitioned
+    # have no neighbors and are skipped everywhere.
+    return [i for i in range(P_x.dim) if P_x.shape[i] > 1]
 
-        dim = P_x.dim
-        for i in range(dim):
 
-            lbs, lgs, rbs, rgs = slices[i]
-            lbb, lgb, rbb, rgb = buffers[i]
-            lrank, rrank = neighbor_ranks[i]
+def start_neighborhood_exchange(P_x, input_numpy, datatypes):
 
+    dims = exchanged_dims(P_x)
+    if len(dims) == 0:
+        return None
+
+    i = dims[0]
+    return i, post_forward_neighborhood_exchange(P_x, i, input_numpy, datatypes)
+
+
+def forward_neighborhood_halo_exchange(P_x, input_numpy, datatypes,
+                                       pending=None):
+
+    # As in the sequential exchange, the dimensions are swept in order so
+    # that the corners are relayed through the faces.
+    first_dim = 0
+    if pending is not None:
+        i, req = pending
+        req.Wait()
+        first_dim = i + 1
+
+    for i in exchanged_dims(P_x):
+        if i < first_dim:
+            continue
+        post_forward_neighborhood_exchange(P_x, i, input_numpy, datatypes).Wait()
+
+
+def adjoint_neighborhood_halo_exchange(P_x, grad_output, slices, buffers,
+                                       datatypes):
+
+    grad = grad_output.detach()
+    grad_output_numpy = numpy_view(grad_output)
+
+    for i in reversed(exchanged_dims(P_x)):
+
+        lbs, lgs, rbs, rgs = slices[i]
+        lbt, lgt, rbt, rgt = datatypes[i]
+
+        # The bulk has to be accumulated, so the left and right bulk are
+        # received, as raw bytes, into the two halves of a single buffer.
+        block = buffers[i]
+        lbytes = lbt.Get_size() if lbt is not None else 0
+        rbytes = rbt.Get_size() if rbt is not None else 0
+        recv_numpy = block if block is not None else grad_output_numpy
+
+        req = post_neighborhood_exchange(P_x, i, grad_output_numpy, [lgt, rgt],
+                                         recv_numpy, [lbytes, rbytes], [0, lbytes],
+                                         [MPI.BYTE if lbt is not None else None,
+                                          MPI.BYTE if rbt is not None else None])
+        req.Wait()
+
+        # The ghosts can only be cleared once they have been sent.
+        if lgt is not None:
+            grad_output_numpy[lgs] = 0.0
+        if rgt is not None:
+            grad_output_numpy[rgs] = 0.0
+        if lbt is not None:
+            lbb = block[:lbytes // block.itemsize]
+            grad[lbs] += torch_view(lbb, grad.dtype).reshape(grad[lbs].shape)
+        if rbt is not None:
+            rbb = block[lbytes // block.itemsize:]
+            grad[rbs] += torch_view(rbb, grad.dtype).reshape(grad[rbs].shape)
+
+
+def start_halo_exchange(input, P_x, slices, buffers, neighbor_ranks,
+                        requests=None, datatypes=None, method="sequential"):
+
+    # Only the first dimension that actually has messages can be posted ahead
+    # of time: later dimensions send the ghosts received in earlier ones, to
+    # fill in the corners.  Any earlier dimensions have nothing to exchange.
+    if not P_x.active or P_x.size == 1:
+        return None
+
+    input_numpy = numpy_view(input)
+
+    # The diagonal exchange has a single round, which is posted in full.
+    if method == "diagonal":
+        return post_diagonal_exchange(P_x, input_numpy, slices, buffers,
+                                      neighbor_ranks)
+
+    if method == "neighborhood":
+        return start_neighborhood_exchange(P_x, input_numpy, datatypes)
+
+    for i in range(P_x.dim):
+        regions = datatypes[i] if datatypes is not None else buffers[i]
+        if any(x is not None for x in regions):
+            reqs = post_forward_exchange(P_x, i, input_numpy, slices, buffers,
+                                         neighbor_ranks, requests, datatypes)
+            return i, reqs
+
+    return None
+
+
+def forward_halo_exchange(P_x, input_numpy, slices, buffers, neighbor_ranks,
+                          requests=None, datatypes=None, pending=None,
+                          method="sequential"):
+
+    # In the diagonal exchange, the slices, buffers, and neighbor ranks are
+    # per neighbor rather than per dimension.
+    if method == "diagonal":
+        if pending is None:
+            pending = post_diagonal_exchange(P_x, input_numpy, slices, buffers,
+                                             neighbor_ranks)
+        complete_diagonal_exchange(input_numpy, slices, buffers, pending)
+        return
+
+    if method == "neighborhood":
+        forward_neighborhood_halo_exchange(P_x, input_numpy, datatypes,
+                                           pending)
+        return
+
+    # If the exchange was started by start_halo_exchange, the posted
+    # dimension is completed here and the sweep resumes after it.
+    first_dim = 0
+    if pending is not None:
+        i, reqs = pending
+        complete_forward_exchange(i, input_numpy, slices, buffers, reqs,
+                                  datatypes)
+        first_dim = i + 1
+
+    dim = P_x.dim
+    for i in range(first_dim, dim):
+        reqs = post_forward_exchange(P_x, i, input_numpy, slices, buffers,
+                                     neighbor_ranks, requests, datatypes)
+        complete_forward_exchange(i, input_numpy, slices, buffers, reqs,
+                                  datatypes)
+
+
+def adjoint_halo_exchange(P_x, grad_output, slices, buffers, neighbor_ranks,
+                          requests=None, datatypes=None, method="sequential"):
+
+    if method == "diagonal":
+        adjoint_diagonal_halo_exchange(P_x, grad_output, slices, buffers,
+                                       neighbor_ranks)
+        return
+
+    if method == "neighborhood":
+        adjoint_neighborhood_halo_exchange(P_x, grad_output, slices, buffers,
+                                           datatypes)
+        return
+
+    # The numpy view moves the data.  The adjoint has to be accumulated
+    # in the tensor's own dtype, which the numpy view may not have.
+    grad = grad_output.detach()
+    grad_output_numpy = numpy_view(grad_output)
+
+    dim = P_x.dim
+    for i in reversed(range(dim)):
+
+        lbs, lgs, rbs, rgs = slices[i]
+        lbb, lgb, rbb, rgb = buffers[i]
+        lrank, rrank = neighbor_ranks[i]
+
+        # With subarray datatypes, the ghosts are sent directly from the
+        # gradient tensor.  The bulk has to be accumulated, so it is still
+        # received into a buffer.
+        if datatypes is not None:
+            lbt, lgt, rbt, rgt = datatypes[i]
+
+            ltag = 0
+            rtag = 1
+
+            lrecv_req = P_x.comm.Irecv(lbb, source=lrank, tag=rtag) if lbb is not None else MPI.REQUEST_NULL
+            rrecv_req = P_x.comm.Irecv(rbb, source=rrank, tag=ltag) if rbb is not None else MPI.REQUEST_NULL
+            lsend_req = P_x.comm.Isend([grad_output_numpy, 1, lgt], dest=lrank, tag=ltag) if lgt is not None else MPI.REQUEST_NULL
+            rsend_req = P_x.comm.Isend([grad_output_numpy, 1, rgt], dest=rrank, tag=rtag) if rgt is not None else MPI.REQUEST_NULL
+
+            MPI.Request.Waitall([lrecv_req, rrecv_req, lsend_req, rsend_req])
+
+            # The ghosts can only be cleared once they have been sent.
+            if lgt is not None:
+                grad_output_numpy[lgs] = 0.0
+            if rgt is not None:
+                grad_output_numpy[rgs] = 0.0
             if lbb is not None:
-                np.copyto(lbb, input_numpy[lbs].ravel())
+                grad[lbs] += torch_view(lbb, grad.dtype).reshape(grad[lbs].shape)
             if rbb is not None:
-                np.copyto(rbb, input_numpy[rbs].ravel())
-
+                grad[rbs] += torch_view(rbb, grad.dtype).reshape(grad[rbs].shape)
+            continue
+
+        if lgb is not None:
+            np.copyto(lgb, grad_output_numpy[lgs].ravel())
+            grad_output_numpy[lgs] = 0.0
+        if rgb is not None:
+            np.copyto(rgb, grad_output_numpy[rgs].ravel())
+            grad_output_numpy[rgs] = 0.0
+
+        if requests is not None:
+            reqs = requests[1][i]
+            start_persistent_requests(reqs)
+        else:
             ltag = 0
             rtag = 1
 
-            lrecv_req = P_x.comm.Irecv(lgb, source=lrank, tag=rtag) if lgb is not None else MPI.REQUEST_NULL
-            rrecv_req = P_x.comm.Irecv(rgb, source=rrank, tag=ltag) if rgb is not None else MPI.REQUEST_NULL
-            lsend_req = P_x.comm.Isend(lbb, dest=lrank, tag=ltag) if lbb is not None else MPI.REQUEST_NULL
-            rsend_req = P_x.comm.Isend(rbb, dest=rrank, tag=rtag) if rbb is not None else MPI.REQUEST_NULL
+            lrecv_req = P_x.comm.Irecv(lbb, source=lrank, tag=rtag) if lbb is not None else MPI.REQUEST_NULL
+            rrecv_req = P_x.comm.Irecv(rbb, source=rrank, tag=ltag) if rbb is not None else MPI.REQUEST_NULL
+            lsend_req = P_x.comm.Isend(lgb, dest=lrank, tag=ltag) if lgb is not None else MPI.REQUEST_NULL
+            rsend_req = P_x.comm.Isend(rgb, dest=rrank, tag=rtag) if rgb is not None else MPI.REQUEST_NULL
 
             reqs = [lrecv_req, rrecv_req, lsend_req, rsend_req]
-            n_reqs_completed = 0
 
-            while n_reqs_completed < len(reqs):
-                status = MPI.Status()
-                index = MPI.Request.Waitany(reqs, status)
+        n_reqs_completed = 0
 
-                if index != MPI.UNDEFINED:
-                    if index == 0:
-                        newshape = input_numpy[lgs].shape
-                        np.copyto(input_numpy[lgs], lgb.reshape(newshape))
-                    elif index == 1:
-                        newshape = input_numpy[rgs].shape
-                        np.copyto(input_numpy[rgs], rgb.reshape(newshape))
+        while n_reqs_completed < len(reqs):
+            status = MPI.Status()
+            index = MPI.Request.Waitany(reqs, status)
 
-                n_reqs_completed += 1
+            if index != MPI.UNDEFINED:
+                if index == 0:
+                    newshape = grad[lbs].shape
+                    grad[lbs] += torch_view(lbb, grad.dtype).reshape(newshape)
+                elif index == 1:
+                    newshape = grad[rbs].shape
+                    grad[rbs] += torch_view(rbb, grad.dtype).reshape(newshape)
+
+            n_reqs_completed += 1
+
+
+class HaloExchangeFunction(torch.autograd.Function):
+
+    @staticmethod
+    def forward(ctx, input, P_x, slices, buffers, neighbor_ranks,
+                requests=None, datatypes=None, pending=None,
+                method="sequential"):
+
+        ctx.slices = slices
+        ctx.buffers = buffers
+        ctx.neighbor_ranks = neighbor_ranks
+        ctx.requests = requests
+        ctx.datatypes = datatypes
+        ctx.method = method
+        ctx.P_x = P_x
+
+        if not P_x.active:
+            return zero_volume_tensor(input.shape[0])
+
+        ctx.mark_dirty(input)
+
+        if P_x.size == 1:
+            return input
+
+        forward_halo_exchange(P_x, numpy_view(input), slices, buffers,
+                              neighbor_ranks, requests, datatypes, pending,
+                              method)
 
         return input
 
@@ -70,53 +551,93 @@ class HaloExchangeFunction(torch.autograd.Function):
         slices = ctx.slices
         buffers = ctx.buffers
         neighbor_ranks = ctx.neighbor_ranks
+        requests = ctx.requests
+        datatypes = ctx.datatypes
+        method = ctx.method
         P_x = ctx.P_x
 
         if not P_x.active:
-            return zero_volume_tensor(grad_output.shape[0]), None, None, None, None
+            return zero_volume_tensor(grad_output.shape[0]), None, None, None, None, None, None, None, None
 
         if P_x.size == 1:
-            return grad_output, None, None, None, None
+            return grad_output, None, None, None, None, None, None, None, None
 
-        grad_output_numpy = grad_output.detach().numpy()
+        # The subarray datatypes describe the halo regions of a C-ordered
+        # tensor, which the incoming gradient is not guaranteed to be.
+        if datatypes is not None:
+            grad_output = grad_output.contiguous()
 
-        dim = P_x.dim
-        for i in reversed(range(dim)):
+        adjoint_halo_exchange(P_x, grad_output, slices, buffers,
+                              neighbor_ranks, requests, datatypes, method)
 
-            lbs, lgs, rbs, rgs = slices[i]
-            lbb, lgb, rbb, rgb = buffers[i]
-            lrank, rrank = neighbor_ranks[i]
+        return grad_output, None, None, None, None, None, None, None, None
 
-            if lgb is not None:
-                np.copyto(lgb, grad_output_numpy[lgs].ravel())
-                grad_output_numpy[lgs] = 0.0
-            if rgb is not None:
-                np.copyto(rgb, grad_output_numpy[rgs].ravel())
-                grad_output_numpy[rgs] = 0.0
 
-            ltag = 0
-            rtag = 1
+class HaloPadExchangeFunction(torch.autograd.Function):
 
-            lrecv_req = P_x.comm.Irecv(lbb, source=lrank, tag=rtag) if lbb is not None else MPI.REQUEST_NULL
-            rrecv_req = P_x.comm.Irecv(rbb, source=rrank, tag=ltag) if rbb is not None else MPI.REQUEST_NULL
-            lsend_req = P_x.comm.Isend(lgb, dest=lrank, tag=ltag) if lgb is not None else MPI.REQUEST_NULL
-            rsend_req = P_x.comm.Isend(rgb, dest=rrank, tag=rtag) if rgb is not None else MPI.REQUEST_NULL
+    @staticmethod
+    def forward(ctx, input, P_x, halo_shape, needed_slices, slices, buffers,
+                neighbor_ranks, requests=None, datatypes=None, pending=None,
+                method="sequential"):
 
-            reqs = [lrecv_req, rrecv_req, lsend_req, rsend_req]
-            n_reqs_completed = 0
+        ctx.slices = slices
+        ctx.buffers = buffers
+        ctx.neighbor_ranks = neighbor_ranks
+        ctx.requests = requests
+        ctx.datatypes = datatypes
+        ctx.method = method
+        ctx.P_x = P_x
+
+        if not P_x.active:
+            return zero_volume_tensor(input.shape[0])
+
+        # If the exchange was started by start_halo_exchange, the input has
+        # already been padded into the tensor it was posted on.
+        exchange_pending = None
+        if pending is not None:
+            padded, exchange_pending = pending
+        else:
+            padded = pad_tensor(input.detach(), halo_shape, 0)
+
+        # The ghosts are received directly into the padded tensor.
+        if P_x.size > 1:
+            forward_halo_exchange(P_x, numpy_view(padded), slices, buffers,
+                                  neighbor_ranks, requests, datatypes,
+                                  exchange_pending, method)
+
+        needed_slices = tuple(needed_slices)
+
+        # The gradient is padded back out from the needed region to the full
+        # padded tensor, before the adjoint exchange.
+        ctx.needed_pad_width = [(sl.start, n - sl.stop)
+                                for sl, n in zip(needed_slices, padded.shape)]
+        ctx.input_slices = tuple(slice(lpad, lpad + n, 1)
+                                 for n, (lpad, _) in zip(input.shape, halo_shape))
 
-            while n_reqs_completed < len(reqs):
-                status = MPI.Status()
-                index = MPI.Request.Waitany(reqs, status)
+        return padded[needed_slices]
+
+    @staticmethod
+    def backward(ctx, grad_output):
+
+        slices = ctx.slices
+        buffers = ctx.buffers
+        neighbor_ranks = ctx.neighbor_ranks
+        requests = ctx.requests
+        datatypes = ctx.datatypes
+        method = ctx.method
+        P_x = ctx.P_x
+
+        if not P_x.active:
+            return zero_volume_tensor(grad_output.shape[0]), None, None, None, None, None, None, None, None, None, None
 
-                if index != MPI.UNDEFINED:
-                    if index == 0:
-                        newshape = grad_output_numpy[lbs].shape
-                        grad_output_numpy[lbs] += lbb.reshape(newshape)
-                    elif index == 1:
-                        newshape = grad_output_numpy[rbs].shape
-                        grad_output_numpy[rbs] += rbb.reshape(newshape)
+        # A fresh, C-ordered, padded gradient tensor is allocated once.  The
+        # adjoint exchange is accumulated into it in place, and the input's
+        # gradient is its interior.
+        grad = pad_tensor(grad_output.detach(), ctx.needed_pad_width, 0)
 
-                n_reqs_completed += 1
+        if P_x.size > 1:
+            adjoint_halo_exchange(P_x, grad, slices, buffers,
+                                  neighbor_ranks, requests, datatypes,
+                                  method)
 
-        return grad_output, None, None, None, None
+        return grad[ctx.input_slices], None, None, None, None, None, None, None, None, None, None
@@ -1,7 +1,8 @@
-import numpy as np
 import torch
 from mpi4py import MPI
 
+from distdl.utilities.dtype import numpy_view
+from distdl.utilities.dtype import reduction_dtype
 from distdl.utilities.torch import zero_volume_tensor
 
 
@@ -9,25 +10,25 @@ class SumReduceFunction(torch.autograd.Function):
 
     @staticmethod
     def forward(ctx, input, P_send, P_recv, preserve_batch,
-                input_tensor_structure, output_tensor_structure, dtype):
+                input_tensor_structure, output_tensor_structure):
 
         ctx.P_send = P_send
         ctx.P_recv = P_recv
         ctx.preserve_batch = preserve_batch
         ctx.input_tensor_structure = input_tensor_structure
         ctx.output_tensor_structure = output_tensor_structure
-        ctx.dtype = dtype
 
         input_tensor_shape = input_tensor_structure[2]
         output_requires_grad = output_tensor_structure[0]
         output_tensor_shape = output_tensor_structure[2]
+        output_dtype = output_tensor_structure[3]
 
         # This allows all ranks to use the same exit path, so that we can be
         # sure that all requests have cleared.
         if preserve_batch:
-            output = zero_volume_tensor(input.shape[0])
+            output = zero_volume_tensor(input.shape[0], dtype=input.dtype)
         else:
-            output = zero_volume_tensor()
+            output = zero_volume_tensor(dtype=input.dtype)
 
         requests = []
 
@@ -36,28 +37,39 @@ class SumReduceFunction(torch.autograd.Function):
         # I need to reduce that data.  If I send and receive to myself, this
         # is OK, as the reduction accounts for the copy, unlike the broadcast
         # below.
+        # Types that MPI cannot reduce are reduced in a wider type.
+        # Only the root, which also receives the result, needs a receive
+        # buffer.  The reduction overwrites it entirely.
         if P_send.active:
-            reduced_data_send = np.zeros(input_tensor_shape, dtype=dtype)
-            input_numpy = input.detach().numpy()
-            req = P_send.comm.Ireduce(input_numpy, reduced_data_send, root=0, op=MPI.SUM)
+            send_reduce_dtype = reduction_dtype(input.dtype)
+            reduced_data_send = None
+            reduced_data_send_numpy = None
+            if P_send == P_recv:
+                reduced_data_send = torch.empty(tuple(input_tensor_shape), dtype=send_reduce_dtype)
+                reduced_data_send_numpy = numpy_view(reduced_data_send)
+            input_numpy = numpy_view(input.to(send_reduce_dtype))
+            req = P_send.comm.Ireduce(input_numpy, reduced_data_send_numpy, root=0, op=MPI.SUM)
             requests.append(req)
 
-        # If I sent data in the forward, I have to receive it here.  mpi4py
-        # does not allow aliasing of the input, so we have to make a copy of
-        # nothing, unfortunately.
+        # If I sent data in the forward, I have to receive it here.  As the
+        # root, my contribution is zero, which the zeroed receive buffer
+        # holds, so the reduction is done in place.
         if P_send != P_recv and P_recv.active:
-            reduced_data_recv = np.zeros(output_tensor_shape, dtype=dtype)
-            req = P_recv.comm.Ireduce(reduced_data_recv.copy(), reduced_data_recv, root=0, op=MPI.SUM)
+            recv_reduce_dtype = reduction_dtype(output_dtype)
+            reduced_data_recv = torch.zeros(tuple(output_tensor_shape), dtype=recv_reduce_dtype)
+            req = P_recv.comm.Ireduce(MPI.IN_PLACE, numpy_view(reduced_data_recv), root=0, op=MPI.SUM)
             requests.append(req)
 
         MPI.Request.Waitall(requests)
 
-        # If we had to receive data, we need to tensorify it.
+        # If we had to receive data, it is already a tensor, in the reduction
+        # dtype.
         if P_recv.active:
             if P_send == P_recv:
-                output = torch.tensor(reduced_data_send, requires_grad=output_requires_grad)
+                output = reduced_data_send.to(output_dtype)
             else:
-                output = torch.tensor(reduced_data_recv, requires_grad=output_requires_grad)
+                output = reduced_data_recv.to(output_dtype)
+            output.requires_grad = output_requires_grad
 
         return output
 
@@ -68,23 +80,23 @@ class SumReduceFunction(torch.autograd.Function):
         P_recv = ctx.P_recv
         preserve_batch = ctx.preserve_batch
         input_tensor_structure = ctx.input_tensor_structure
-        dtype = ctx.dtype
 
         input_requires_grad = input_tensor_structure[0]
         input_tensor_shape = input_tensor_structure[2]
+        input_dtype = input_tensor_structure[3]
 
         # This allows all ranks to use the same exit path, so that we can be
         # sure that all requests have cleared.
         if preserve_batch:
-            grad_input = zero_volume_tensor(grad_output.shape[0])
+            grad_input = zero_volume_tensor(grad_output.shape[0], dtype=grad_output.dtype)
         else:
-            grad_input = zero_volume_tensor()
+            grad_input = zero_volume_tensor(dtype=grad_output.dtype)
 
         requests = []
 
         # If I received the reduction in the forward call, I broadcast my data
         if P_recv.active:
-            grad_output_numpy = grad_output.detach().numpy()
+            grad_output_numpy = numpy_view(grad_output)
             req = P_recv.comm.Ibcast(grad_output_numpy, root=0)
             requests.append(req)
 
@@ -93,14 +105,15 @@ class SumReduceFunction(torch.autograd.Function):
             # If I both sent and received reduction data, then I copy the "input"
             if P_send == P_recv:
                 grad_input = grad_output.clone()
+            # The broadcast is received directly into the gradient tensor,
+            # which it overwrites entirely.
             else:
-                grad_input = np.zeros(input_tensor_shape, dtype=dtype)
+                grad_input = torch.empty(tuple(input_tensor_shape), dtype=input_dtype)
 
-                req = P_send.comm.Ibcast(grad_input, root=0)
+                req = P_send.comm.Ibcast(numpy_view(grad_input), root=0)
                 req.Wait()
-                grad_input = torch.tensor(grad_input,
-                                          requires_grad=input_requires_grad)
+                grad_input.requires_grad = input_requires_grad
 
         MPI.Request.Waitall(requests)
 
-        return grad_input, None, None, None, None, None, None
+        return grad_input, None, None, None, None, None
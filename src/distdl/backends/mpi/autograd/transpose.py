@@ -2,16 +2,122 @@ import numpy as np
 import torch
 from mpi4py import MPI
 
+from distdl.utilities.dtype import code_to_dtype
+from distdl.utilities.dtype import dtype_to_code
+from distdl.utilities.dtype import numpy_view
+from distdl.utilities.dtype import torch_to_numpy_dtype
 from distdl.utilities.slicing import compute_subshape
 from distdl.utilities.torch import zero_volume_tensor
 
 
+def pipelined_exchange(comm, send_array, send_chunks, send_buffers,
+                       recv_array, recv_chunks, recv_buffers, tag):
+
+    # Each buffer is a slot for one slab in flight.  When a slab arrives it
+    # is unpacked and its slot is reused for the next slab, and when a slab
+    # has been sent its slot is reused to pack the next one.
+    #
+    # Every worker sends and receives its slabs in the same global order, by
+    # slab index and then by partner rank, so the oldest outstanding message
+    # is always posted by both its sender and its receiver.  Hence, the
+    # pipeline cannot deadlock, no matter how few slots there are.
+    n_recv_slots = len(recv_buffers)
+    n_slots = n_recv_slots + len(send_buffers)
+
+    requests = [MPI.REQUEST_NULL] * n_slots
+    posted = [None] * n_slots
+
+    recv_queue = iter(recv_chunks)
+    send_queue = iter(send_chunks)
+
+    def post(slot):
+        if slot < n_recv_slots:
+            item = next(recv_queue, None)
+            if item is not None:
+                chunk, sz, partner = item
+                buff = recv_buffers[slot][:sz]
+                requests[slot] = comm.Irecv(buff, source=partner, tag=tag)
+                posted[slot] = (chunk, buff)
+        else:
+            item = next(send_queue, None)
+            if item is not None:
+                chunk, sz, partner = item
+                buff = send_buffers[slot - n_recv_slots][:sz]
+                np.copyto(buff, send_array[tuple(chunk)].ravel())
+                requests[slot] = comm.Isend(buff, dest=partner, tag=tag)
+                posted[slot] = (chunk, buff)
+
+    for slot in range(n_slots):
+        post(slot)
+
+    while True:
+        status = MPI.Status()
+        index = MPI.Request.Waitany(requests, status)
+
+        # All slots are idle once everything has been sent and received.
+        if index == MPI.UNDEFINED:
+            break
+
+        if index < n_recv_slots:
+            chunk, buff = posted[index]
+            sh = recv_array[tuple(chunk)].shape
+            np.copyto(recv_array[tuple(chunk)], buff.reshape(sh))
+
+        posted[index] = None
+        post(index)
+
+
+def alltoallv_exchange(comm,
+                       send_array, send_data, send_buffer, send_counts, send_displs,
+                       recv_array, recv_data, recv_buffer, recv_counts, recv_displs):
+
+    # The data for each partner is packed at its displacement, so that all
+    # of it can be moved by one collective.  Partners with nothing to
+    # exchange have a count of zero.
+    for sl, sz, partner in send_data:
+        displ = send_displs[partner]
+        np.copyto(send_buffer[displ:displ+sz], send_array[tuple(sl)].ravel())
+
+    comm.Alltoallv([send_buffer, (send_counts, send_displs)],
+                   [recv_buffer, (recv_counts, recv_displs)])
+
+    for sl, sz, partner in recv_data:
+        displ = recv_displs[partner]
+        sh = recv_array[tuple(sl)].shape
+        np.copyto(recv_array[tuple(sl)], recv_buffer[displ:displ+sz].reshape(sh))
+
+
+def allocate_local_tensor(P, x_global_shape, dtype, covered, workspace=None):
+
+    shape = tuple(compute_subshape(P.shape, P.index, x_global_shape))
+
+    # Every entry covered by an intersection is overwritten when the data is
+    # unpacked, so the tensor only has to be zeroed if the intersections do
+    # not cover all of it.
+    def allocate():
+        if covered:
+            return torch.empty(shape, dtype=dtype)
+        return torch.zeros(shape, dtype=dtype)
+
+    if workspace is None:
+        return allocate()
+
+    # The workspace storage is reused for as long as it fits, and a fresh
+    # view of it is handed out on each call.
+    if workspace[0] is None or workspace[0].dtype != dtype or workspace[0].shape != shape:
+        workspace[0] = allocate()
+
+    return workspace[0].view(shape)
+
+
 class DistributedTransposeFunction(torch.autograd.Function):
 
     @staticmethod
     def forward(ctx, input, P_union, x_global_shape,
                 P_x, in_data, in_buffers,
-                P_y, out_data, out_buffers, preserve_batch, dtype):
+                P_y, out_data, out_buffers, preserve_batch,
+                pipelined=False, alltoallv_counts=None,
+                in_covered=False, out_covered=False, workspace=None):
 
         ctx.P_union = P_union
         ctx.x_global_shape = x_global_shape
@@ -26,67 +132,126 @@ class DistributedTransposeFunction(torch.autograd.Function):
 
         ctx.preserve_batch = preserve_batch
 
-        ctx.dtype = dtype
+        ctx.pipelined = pipelined
+        ctx.alltoallv_counts = alltoallv_counts
+        ctx.in_covered = in_covered
 
         input_requires_grad = False
-        # By design, P_x is always first in the union
+        dtype = input.dtype
+        # By design, P_x is always first in the union.  Workers that only
+        # receive do not know the dtype, so it is shared with requires_grad.
         if P_union.active:
             if P_x.rank == 0:
                 input_requires_grad = input.requires_grad
-                P_union.comm.Bcast(np.array([1 if input_requires_grad else 0]),
+                P_union.comm.Bcast(np.array([1 if input_requires_grad else 0,
+                                             dtype_to_code(dtype)], dtype=np.int),
                                    root=0)
             else:
-                irg = np.array([0], dtype=np.int)
+                irg = np.array([0, 0], dtype=np.int)
                 P_union.comm.Bcast(irg, root=0)
                 input_requires_grad = bool(irg[0] == 1)
+                dtype = code_to_dtype(irg[1])
+
+            # The buffers are allocated at setup for the dtype of the local
+            # input, which workers that only receive may not know.
+            numpy_dtype = torch_to_numpy_dtype(dtype)
+            for buffers in [in_buffers, out_buffers]:
+                for j, buff in enumerate(buffers):
+                    if buff is not None and buff.dtype != numpy_dtype:
+                        buffers[j] = np.zeros(buff.shape, dtype=numpy_dtype)
 
         ctx.input_requires_grad = input_requires_grad
+        ctx.dtype = dtype
 
         requests = []
 
         # Default everyone to output nothing
         if preserve_batch:
-            output = zero_volume_tensor(input.shape[0])
+            output = zero_volume_tensor(input.shape[0], dtype=dtype)
         else:
-            output = zero_volume_tensor()
+            output = zero_volume_tensor(dtype=dtype)
+
+        # In pipelined mode, in_data and out_data hold the slabs and the
+        # buffers are the slots for the slabs in flight.
+        if pipelined:
+            input_numpy = None
+            if P_x.active:
+                input_numpy = numpy_view(input)
+
+            output_numpy = None
+            if P_y.active:
+                output = allocate_local_tensor(P_y, x_global_shape, dtype,
+                                               out_covered, workspace)
+                output_numpy = numpy_view(output)
+
+            pipelined_exchange(P_union.comm,
+                               input_numpy, in_data, in_buffers,
+                               output_numpy, out_data, out_buffers,
+                               tag=111)
+
+            if P_y.active:
+                output.requires_grad = input_requires_grad
+
+            return output
+
+        # With Alltoallv, every worker in the union takes part in the one
+        # collective, even if it has nothing to exchange.
+        if alltoallv_counts is not None:
+            in_counts, in_displs, out_counts, out_displs = alltoallv_counts
+
+            input_numpy = None
+            if P_x.active:
+                input_numpy = numpy_view(input)
+
+            output_numpy = None
+            if P_y.active:
+                output = allocate_local_tensor(P_y, x_global_shape, dtype,
+                                               out_covered, workspace)
+                output_numpy = numpy_view(output)
+
+            alltoallv_exchange(P_union.comm,
+                               input_numpy, in_data, in_buffers[0], in_counts, in_displs,
+                               output_numpy, out_data, out_buffers[0], out_counts, out_displs)
+
+            if P_y.active:
+                output.requires_grad = input_requires_grad
+
+            return output
+
+        # Intersections without a buffer are contiguous in the local tensor,
+        # so they are received directly into, and sent directly from, it.
+        # The output is allocated first, so that it can be received into.
+        if P_y.active:
+            output = allocate_local_tensor(P_y, x_global_shape, dtype,
+                                           out_covered, workspace)
+            output_numpy = numpy_view(output)
 
         # If I am getting data, recv my output parts
         recv_count = 0
         if P_y.active:
             for (sl, sz, partner), buff in zip(out_data, out_buffers):
-                if buff is not None:
-                    req = P_union.comm.Irecv(buff, source=partner, tag=111)
-                    requests.append(req)
-                else:
-                    # We add this if there is no recv so that the indices of
-                    # the requests array match the indices of out_data and
-                    # out_buffers.
-                    requests.append(MPI.REQUEST_NULL)
+                if buff is None:
+                    buff = output_numpy[tuple(sl)]
+                req = P_union.comm.Irecv(buff, source=partner, tag=111)
+                requests.append(req)
                 recv_count += 1
 
         # If I have data to share, pack and send my input parts
         send_count = 0
+        send_views = []
         if P_x.active:
-            input_numpy = input.detach().numpy()
+            input_numpy = numpy_view(input)
             for (sl, sz, partner), buff in zip(in_data, in_buffers):
                 if buff is not None:
                     np.copyto(buff, input_numpy[tuple(sl)].ravel())
-                    req = P_union.comm.Isend(buff, dest=partner, tag=111)
-                    requests.append(req)
                 else:
-                    # We add this for symmetry, but don't really need it.
-                    requests.append(MPI.REQUEST_NULL)
+                    # This only copies if the input itself is not C-ordered.
+                    buff = np.ascontiguousarray(input_numpy[tuple(sl)])
+                    send_views.append(buff)
+                req = P_union.comm.Isend(buff, dest=partner, tag=111)
+                requests.append(req)
                 send_count += 1
 
-        # We do this after the sends so that they can get started before local
-        # allocations.
-        if P_y.active:
-            index = P_y.index
-            y_local_shape = compute_subshape(P_y.shape, index, x_global_shape)
-            # TODO(#25): The dtype should not be fixed, but correcting this is
-            #            a thing that needs to be resolved globally.
-            output = np.zeros(y_local_shape, dtype=dtype)
-
         # Unpack the received data as it arrives
         completed_count = 0
         while(completed_count < len(requests)):
@@ -100,13 +265,12 @@ class DistributedTransposeFunction(torch.autograd.Function):
                 sl, sz, partner = out_data[index]
                 buff = out_buffers[index]
                 if buff is not None:
-                    sh = output[tuple(sl)].shape
-                    np.copyto(output[tuple(sl)], buff.reshape(sh))
+                    sh = output_numpy[tuple(sl)].shape
+                    np.copyto(output_numpy[tuple(sl)], buff.reshape(sh))
 
             completed_count += 1
 
         if P_y.active:
-            output = torch.from_numpy(output)
             output.requires_grad = input_requires_grad
 
         return output
@@ -127,6 +291,10 @@ class DistributedTransposeFunction(torch.autograd.Function):
 
         preserve_batch = ctx.preserve_batch
 
+        pipelined = ctx.pipelined
+        alltoallv_counts = ctx.alltoallv_counts
+        in_covered = ctx.in_covered
+
         dtype = ctx.dtype
 
         input_requires_grad = ctx.input_requires_grad
@@ -135,45 +303,86 @@ class DistributedTransposeFunction(torch.autograd.Function):
 
         # Default everyone to output None
         if preserve_batch:
-            grad_input = zero_volume_tensor(grad_output.shape[0])
+            grad_input = zero_volume_tensor(grad_output.shape[0], dtype=dtype)
         else:
-            grad_input = zero_volume_tensor()
+            grad_input = zero_volume_tensor(dtype=dtype)
+
+        # The adjoint sends the slabs back along the same pipeline.
+        if pipelined:
+            grad_output_numpy = None
+            if P_y.active:
+                grad_output_numpy = numpy_view(grad_output)
+
+            grad_input_numpy = None
+            if P_x.active:
+                grad_input = allocate_local_tensor(P_x, x_global_shape, dtype,
+                                                   in_covered)
+                grad_input_numpy = numpy_view(grad_input)
+
+            pipelined_exchange(P_union.comm,
+                               grad_output_numpy, out_data, out_buffers,
+                               grad_input_numpy, in_data, in_buffers,
+                               tag=113)
+
+            if P_x.active:
+                grad_input.requires_grad = input_requires_grad
+
+            return grad_input, None, None, None, None, None, None, None, None, None, None, None, None, None, None
+
+        if alltoallv_counts is not None:
+            in_counts, in_displs, out_counts, out_displs = alltoallv_counts
+
+            grad_output_numpy = None
+            if P_y.active:
+                grad_output_numpy = numpy_view(grad_output)
+
+            grad_input_numpy = None
+            if P_x.active:
+                grad_input = allocate_local_tensor(P_x, x_global_shape, dtype,
+                                                   in_covered)
+                grad_input_numpy = numpy_view(grad_input)
+
+            alltoallv_exchange(P_union.comm,
+                               grad_output_numpy, out_data, out_buffers[0], out_counts, out_displs,
+                               grad_input_numpy, in_data, in_buffers[0], in_counts, in_displs)
+
+            if P_x.active:
+                grad_input.requires_grad = input_requires_grad
+
+            return grad_input, None, None, None, None, None, None, None, None, None, None, None, None, None, None
+
+        # Contiguous intersections are exchanged directly, as in forward.
+        if P_x.active:
+            grad_input = allocate_local_tensor(P_x, x_global_shape, dtype,
+                                               in_covered)
+            grad_input_numpy = numpy_view(grad_input)
 
         # Recv my input parts
         recv_count = 0
         if P_x.active:
             for (sl, sz, partner), buff in zip(in_data, in_buffers):
-                if buff is not None:
-                    req = P_union.comm.Irecv(buff, source=partner, tag=113)
-                    requests.append(req)
-                else:
-                    # We add this if there is no recv so that the indices of
-                    # the requests array match the indices of in_data and
-                    # in_buffers.
-                    requests.append(MPI.REQUEST_NULL)
+                if buff is None:
+                    buff = grad_input_numpy[tuple(sl)]
+                req = P_union.comm.Irecv(buff, source=partner, tag=113)
+                requests.append(req)
                 recv_count += 1
 
         # Pack and send my input parts
         send_count = 0
+        send_views = []
         if P_y.active:
-            grad_output_numpy = grad_output.detach().numpy()
+            grad_output_numpy = numpy_view(grad_output)
             for (sl, sz, partner), buff in zip(out_data, out_buffers):
                 if buff is not None:
                     np.copyto(buff, grad_output_numpy[tuple(sl)].ravel())
-                    req = P_union.comm.Isend(buff, dest=partner, tag=113)
-                    requests.append(req)
                 else:
-                    # We add this for symmetry, but don't really need it.
-                    requests.append(MPI.REQUEST_NULL)
+                    # This only copies if the gradient is not C-ordered.
+                    buff = np.ascontiguousarray(grad_output_numpy[tuple(sl)])
+                    send_views.append(buff)
+                req = P_union.comm.Isend(buff, dest=partner, tag=113)
+                requests.append(req)
                 send_count += 1
 
-        if P_x.active:
-            index = P_x.index
-            x_local_shape = compute_subshape(P_x.shape, index, x_global_shape)
-            # TODO(#25): The dtype should not be fixed, but correcting this is
-            #            a thing that needs to be resolved globally.
-            grad_input = np.zeros(x_local_shape, dtype=dtype)
-
         # Unpack the received data as it arrives
         completed_count = 0
         while(completed_count < len(requests)):
@@ -187,15 +396,14 @@ class DistributedTransposeFunction(torch.autograd.Function):
                 sl, sz, partner = in_data[index]
                 buff = in_buffers[index]
                 if buff is not None:
-                    sh = grad_input[tuple(sl)].shape
+                    sh = grad_input_numpy[tuple(sl)].shape
                     # This would normally be an add into the grad_input tensor
                     # but we just created it, so a copy is sufficient.
-                    np.copyto(grad_input[tuple(sl)], buff.reshape(sh))
+                    np.copyto(grad_input_numpy[tuple(sl)], buff.reshape(sh))
 
             completed_count += 1
 
         if P_x.active:
-            grad_input = torch.from_numpy(grad_input)
             grad_input.requires_grad = input_requires_grad
 
-        return grad_input, None, None, None, None, None, None, None, None, None, None
+        return grad_input, None, None, None, None, None, None, None, None, None, None, None, None, None, None
@@ -0,0 +1,180 @@
+import numpy as np
+import torch
+from mpi4py import MPI
+
+from distdl.backends.mpi.compare import check_identical_group
+from distdl.backends.mpi.partition import MPIPartition
+from distdl.utilities.dtype import numpy_view
+from distdl.utilities.dtype import reduction_dtype
+
+
+# Layers that store their parameters on the first worker of P_x and
+# broadcast them to all of P_x can register those parameters with a bucketer.
+# In the backward pass, the local gradients of the broadcast parameters are
+# packed into flat buckets of at most bucket_size entries, instead of each
+# being reduced on its own, and each bucket is reduced to the root as soon as
+# it is full.  The reduced gradients are accumulated into the parameters'
+# grad attribute on the root when the backward pass ends.
+#
+# Buckets are filled in the reverse of the registration order.  Broadcasts
+# register when they are first used, so this is the order in which the
+# gradients of a feed-forward network are computed.  They
+# are reduced strictly in order, so every worker issues the same sequence of
+# collectives.  Each registered parameter may only be used once per backward
+# pass.
+class MPIGradientBucketer:
+
+    def __init__(self, P_x, bucket_size=2**20):
+
+        self.P_x = P_x
+        self.bucket_size = bucket_size
+
+        # The reductions use their own communicator, over the same group as
+        # the broadcast from the root of P_x to all of P_x.
+        self.P_send = MPIPartition()
+        self.P_recv = MPIPartition()
+        if self.P_x.active:
+            P_root_base = self.P_x.create_partition_inclusive([0])
+            self.P_root = P_root_base.create_cartesian_topology_partition([1])
+            self.P_send, self.P_recv = self.P_root.create_broadcast_partition_to(self.P_x)
+
+        # Registered parameters and their global shapes
+        self._params = []
+        self._shapes = []
+
+        # Bucket layout: the slots in each bucket and each slot's bucket and
+        # offset into it.  Built on first use.
+        self._buckets = None
+        self._slot_bucket = None
+        self._slot_offset = None
+
+        self._reset_pass()
+
+    def register(self, param, shape, P_x):
+
+        # The parameter is only stored on the root, other workers register
+        # a placeholder, so all workers give its shape.
+        if not check_identical_group(P_x.group, self.P_x.group):
+            raise ValueError("Parameters must be broadcast to the bucketer's partition.")
+
+        self._params.append(param)
+        self._shapes.append(tuple(shape))
+
+        # The layout has to be rebuilt to include the new slot.
+        self._buckets = None
+
+        return len(self._params) - 1
+
+    def _build_buckets(self):
+
+        n_slots = len(self._params)
+        numels = [int(np.prod(shape)) for shape in self._shapes]
+
+        self._buckets = []
+        self._slot_bucket = np.zeros(n_slots, dtype=int)
+        self._slot_offset = np.zeros(n_slots, dtype=int)
+
+        bucket = []
+        bucket_numel = 0
+        for slot in reversed(range(n_slots)):
+            if bucket and bucket_numel + numels[slot] > self.bucket_size:
+                self._buckets.append((bucket, bucket_numel))
+                bucket = []
+                bucket_numel = 0
+            self._slot_bucket[slot] = len(self._buckets)
+            self._slot_offset[slot] = bucket_numel
+            bucket.append(slot)
+            bucket_numel += numels[slot]
+
+        if bucket:
+            self._buckets.append((bucket, bucket_numel))
+
+    def _reset_pass(self):
+
+        self._pass_active = False
+        self._pass_dtype = None
+        self._bucket_buffers = dict()
+        self._bucket_counts = dict()
+        self._received_slots = set()
+        self._requests = []
+        self._next_bucket = 0
+
+    def _bucket_buffer(self, bucket):
+
+        if bucket not in self._bucket_buffers:
+            _, bucket_numel = self._buckets[bucket]
+            self._bucket_buffers[bucket] = torch.zeros(bucket_numel, dtype=self._pass_dtype)
+
+        return self._bucket_buffers[bucket]
+
+    def _launch_bucket(self, bucket):
+
+        # By design, the root is always 0 in the cross-communicator.  It
+        # holds its own contribution, so it reduces in place.
+        bucket_numpy = numpy_view(self._bucket_buffer(bucket))
+        if self.P_send.active:
+            req = self.P_recv.comm.Ireduce(MPI.IN_PLACE, bucket_numpy, root=0, op=MPI.SUM)
+        else:
+            req = self.P_recv.comm.Ireduce(bucket_numpy, None, root=0, op=MPI.SUM)
+        self._requests.append(req)
+
+    def add(self, slot, grad):
+
+        if self._buckets is None:
+            self._build_buckets()
+
+        # The first gradient of a backward pass fixes the bucket dtype and
+        # schedules the completion of the reductions for when the pass ends.
+        if not self._pass_active:
+            self._pass_active = True
+            self._pass_dtype = reduction_dtype(grad.dtype)
+            torch.autograd.Variable._execution_engine.queue_callback(self.finalize)
+
+        bucket = self._slot_bucket[slot]
+        if bucket < self._next_bucket:
+            raise RuntimeError("Gradient arrived after its bucket was reduced.")
+
+        offset = self._slot_offset[slot]
+        numel = grad.numel()
+        self._bucket_buffer(bucket)[offset:offset+numel].add_(grad.reshape(-1))
+        self._bucket_counts[bucket] = self._bucket_counts.get(bucket, 0) + 1
+        self._received_slots.add(slot)
+
+        # Reductions are started as soon as their buckets, and all buckets
+        # before them, are full.
+        while self._next_bucket < len(self._buckets):
+            slots, _ = self._buckets[self._next_bucket]
+            if self._bucket_counts.get(self._next_bucket, 0) < len(slots):
+                break
+            self._launch_bucket(self._next_bucket)
+            self._next_bucket += 1
+
+    def finalize(self):
+
+        if not self._pass_active:
+            return
+
+        # Buckets holding parameters that did not get a gradient are still
+        # reduced, so that all workers issue the same collectives.
+        while self._next_bucket < len(self._buckets):
+            self._launch_bucket(self._next_bucket)
+            self._next_bucket += 1
+
+        MPI.Request.Waitall(self._requests)
+
+        if self.P_send.active:
+            for slot in sorted(self._received_slots):
+                param = self._params[slot]
+                shape = self._shapes[slot]
+                offset = self._slot_offset[slot]
+                numel = int(np.prod(shape))
+
+                bucket = self._bucket_buffer(self._slot_bucket[slot])
+                grad = bucket[offset:offset+numel].view(shape).to(param.dtype, copy=True)
+
+                if param.grad is None:
+                    param.grad = grad
+                else:
+                    param.grad += grad
+
+        self._reset_pass()
@@ -1,3 +1,5 @@
+import itertools
+
 import numpy as np
 from mpi4py import MPI
 
@@ -10,6 +12,51 @@ from distdl.utilities.debug import print_sequential
 from distdl.utilities.index_tricks import cartesian_index_c
 from distdl.utilities.index_tricks import cartesian_index_f
 
+# Process-wide cache of the send and receive partitions created by
+# create_broadcast_partition_to and create_reduction_partition_to.  Building
+# them requires several collectives over the union of the two partitions, but
+# the result depends only on the partitions and the transpose flags.
+#
+# Entries are keyed on the identity of the partition objects and hold
+# references to them, so that a key cannot be reused by a new partition while
+# its entry is alive.  Every rank in the union makes the same sequence of
+# calls, so the cache stays consistent across ranks and cached calls skip
+# the collectives everywhere at once.  Entries are only ever removed
+# explicitly, by free_partition_cache.
+_cross_partition_cache = dict()
+
+
+def _cached_cross_partitions(kind, P_src, P_dest, transpose_src, transpose_dest,
+                             create):
+
+    key = (kind, id(P_src), id(P_dest), bool(transpose_src), bool(transpose_dest))
+
+    if key not in _cross_partition_cache:
+        P_send, P_recv = create(P_dest, transpose_src, transpose_dest)
+        _cross_partition_cache[key] = (P_src, P_dest, P_send, P_recv)
+
+    _, _, P_send, P_recv = _cross_partition_cache[key]
+
+    return P_send, P_recv
+
+
+def free_partition_cache(P=None):
+
+    # Freeing a communicator is collective, so this must be called by every
+    # rank in the union of the source and destination of each freed entry.
+    # If P is given, only entries to or from P are freed, otherwise all of
+    # them are.  Any layer that was set up with the freed partitions must be
+    # set up again before it is used.
+    keys = [key for key, (P_src, P_dest, _, _) in _cross_partition_cache.items()
+            if P is None or P is P_src or P is P_dest]
+
+    for key in keys:
+        _, _, P_send, P_recv = _cross_partition_cache.pop(key)
+        if P_send.active:
+            P_send.comm.Free()
+        if P_recv.active and P_recv is not P_send:
+            P_recv.comm.Free()
+
 
 class MPIPartition:
 
@@ -85,11 +132,15 @@ class MPIPartition:
 
         return MPIPartition(comm, group, root=self.root)
 
-    def create_cartesian_topology_partition(self, shape, **options):
+    def create_cartesian_topology_partition(self, shape, periods=None, **options):
 
+        # If given, periods marks the dimensions in which the partition wraps
+        # around, so the first and last workers are neighbors.
         shape = np.asarray(shape)
+        if periods is not None:
+            periods = [bool(p) for p in np.broadcast_to(periods, shape.shape)]
         if self.active:
-            comm = self.comm.Create_cart(shape, **options)
+            comm = self.comm.Create_cart(shape, periods=periods, **options)
             group = comm.Get_group()
 
             if not check_identical_group(self.group, group):
@@ -193,6 +244,14 @@ class MPIPartition:
                                       transpose_src=False,
                                       transpose_dest=False):
 
+        return _cached_cross_partitions("broadcast", self, P_dest,
+                                        transpose_src, transpose_dest,
+                                        self._create_broadcast_partition_to)
+
+    def _create_broadcast_partition_to(self, P_dest,
+                                       transpose_src=False,
+                                       transpose_dest=False):
+
         P_src = self
 
         P_send = MPIPartition()
@@ -304,6 +363,14 @@ class MPIPartition:
                                       transpose_src=False,
                                       transpose_dest=False):
 
+        return _cached_cross_partitions("reduction", self, P_dest,
+                                        transpose_src, transpose_dest,
+                                        self._create_reduction_partition_to)
+
+    def _create_reduction_partition_to(self, P_dest,
+                                       transpose_src=False,
+                                       transpose_dest=False):
+
         P_src = self
 
         P_send = MPIPartition()
@@ -468,20 +535,77 @@ class MPICartesianPartition(MPIPartition):
         self.shape = np.asarray(shape).astype(np.int)
         self.dim = len(self.shape)
 
+        # Dense tables of the Cartesian index of every rank, the rank at every
+        # index, and the neighbors of every rank are built once, so that all
+        # lookups are array accesses.
+        self.periods = np.zeros(self.dim, dtype=bool)
+        self._index_table = None
+        self._rank_table = None
+        self._neighbor_offsets = None
+        self._neighbor_table = None
+        self._face_positions = None
+        if self.active:
+            self.periods = np.asarray(self.comm.Get_topo()[1], dtype=bool)
+            self._build_rank_tables()
+
         self.index = None
         if self.active:
             self.index = self.cartesian_index(self.rank)
 
+        # Sub-topologies are memoized by their remaining dimensions, so
+        # repeated requests do not create new communicators.
+        self._subtopology_partitions = dict()
+
+    def _build_rank_tables(self):
+
+        # Ranks in a Cartesian communicator are numbered in C-order of their
+        # indices, so the tables need no communication.
+        size = int(np.prod(self.shape))
+        ranks = np.arange(size)
+        self._index_table = np.stack(np.unravel_index(ranks, self.shape), axis=-1).reshape(size, self.dim)
+        self._rank_table = ranks.reshape(self.shape)
+
+        # Offsets to every neighbor across a face, edge, or corner, in
+        # lexicographic order.  Without the center, the neighbor at position k
+        # sees this rank at position n - 1 - k.
+        offsets = np.array(list(itertools.product([-1, 0, 1], repeat=self.dim)), dtype=int).reshape(-1, self.dim)
+        offsets = offsets[np.any(offsets != 0, axis=1)]
+        self._neighbor_offsets = offsets
+
+        # Neighbors wrap around periodic dimensions and are PROC_NULL past the
+        # ends of all others.
+        nindex = self._index_table[:, None, :] + offsets[None, :, :]
+        nindex = np.where(self.periods, nindex % self.shape, nindex)
+        valid = np.all((nindex >= 0) & (nindex < self.shape), axis=-1)
+        nindex = np.clip(nindex, 0, self.shape - 1)
+        nranks = self._rank_table[tuple(np.moveaxis(nindex, -1, 0))]
+        self._neighbor_table = np.where(valid, nranks, MPI.PROC_NULL)
+
+        # Positions of the left and right neighbors across the faces
+        eye = np.eye(self.dim, dtype=int)
+        self._face_positions = np.array([[np.where(np.all(offsets == o, axis=1))[0][0] for o in [-e, e]]
+                                         for e in eye], dtype=int).reshape(self.dim, 2)
+
     def create_cartesian_subtopology_partition(self, remain_shape):
 
-        # remain_shape = np.asarray(remain_shape)
+        key = tuple(bool(remain) for remain in remain_shape)
+        if key not in self._subtopology_partitions:
+            self._subtopology_partitions[key] = self._create_cartesian_subtopology_partition(remain_shape)
+
+        return self._subtopology_partitions[key]
+
+    def _create_cartesian_subtopology_partition(self, remain_shape):
+
+        # The shape of the sub-topology must be computed from a boolean mask,
+        # even if a list was given.
+        remain_shape = np.asarray(remain_shape, dtype=bool)
         if self.active:
-            comm = self.comm.Sub(remain_shape)
+            comm = self.comm.Sub(remain_shape.tolist())
             group = comm.Get_group()
 
             return MPICartesianPartition(comm, group,
                                          self.root,
-                                         self.shape[remain_shape == True]) # noqa E712
+                                         self.shape[remain_shape])
 
         else:
             comm = MPI.COMM_NULL
@@ -492,24 +616,35 @@ class MPICartesianPartition(MPIPartition):
         if not self.active:
             raise Exception()
 
-        return np.asarray(self.comm.Get_coords(rank))
+        # For an array of ranks, the result has one index per row.
+        return self._index_table[rank].copy()
+
+    def cartesian_rank(self, index):
+
+        if not self.active:
+            raise Exception()
+
+        # For an array with one index per row, the result is an array of ranks.
+        index = np.asarray(index)
+        return self._rank_table[tuple(np.moveaxis(index, -1, 0))]
 
     def neighbor_ranks(self, rank):
 
         if not self.active:
             raise Exception()
 
-        index = self.cartesian_index(rank)
+        # The left and right neighbors in each dimension
+        faces = self._neighbor_table[rank][self._face_positions]
 
-        # Resulting list
-        neighbor_ranks = []
+        return [(int(lrank), int(rrank)) for lrank, rrank in faces]
 
-        # Loop over the dimensions and add the ranks at the neighboring index to the list
-        for i in range(self.dim):
-            lindex = [x-1 if j == i else x for j, x in enumerate(index)]
-            rindex = [x+1 if j == i else x for j, x in enumerate(index)]
-            lrank = MPI.PROC_NULL if -1 == lindex[i] else self.comm.Get_cart_rank(lindex)
-            rrank = MPI.PROC_NULL if self.shape[i] == rindex[i] else self.comm.Get_cart_rank(rindex)
-            neighbor_ranks.append((lrank, rrank))
+    def diagonal_neighbor_ranks(self, rank):
+
+        if not self.active:
+            raise Exception()
 
-        return neighbor_ranks
+        # (offset, rank) pairs for every neighbor across a face, edge, or
+        # corner.  The offsets are in lexicographic order, so the neighbor at
+        # position k sees this rank at position n - 1 - k.
+        return [(tuple(int(x) for x in offset), int(nrank))
+                for offset, nrank in zip(self._neighbor_offsets, self._neighbor_table[rank])]
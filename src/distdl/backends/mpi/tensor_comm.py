@@ -1,35 +1,48 @@
 import numpy as np
 from mpi4py import MPI
 
+from distdl.utilities.dtype import code_to_dtype
+from distdl.utilities.dtype import dtype_to_code
+
+
+# The structure of a tensor is packed into one fixed-size integer message:
+# the requires_grad flag, the tensor dimension, the dtype, and the shape,
+# padded to this maximum dimension.
+max_tensor_structure_dim = 32
+
 
 # Holy cow this is a touchy function, be very careful if modifying it...
-def compute_output_tensor_structure(tensor, P_send, P_recv):
+def compute_output_tensor_structure(tensor, P_send, P_recv, output_shape=None):
 
     if not P_send.active and not P_recv.active:
-        return None, None, None
+        return None, None, None, None
+
+    # If the receiving workers already know the shape of the output, there is
+    # nothing to communicate.  The requires_grad flag and dtype of the local
+    # input must then match those of the sending worker.
+    if output_shape is not None:
+        if not P_recv.active:
+            return None, None, None, None
+        tensor_shape = np.array(output_shape, dtype=np.int)
+        return tensor.requires_grad, len(tensor_shape), tensor_shape, tensor.dtype
 
     requests = []
 
     if P_send.active:
-        # We have the values, set up copies of them to work with
-        rg_int_send = np.array([-1], dtype=np.int)
-        send_tensor_dim = np.array([len(tensor.shape)], dtype=np.int)
-        send_tensor_shape = np.array(tensor.shape, dtype=np.int)
-
-        # Need to send non-Python types, so convert the boolean temporarily
-        rg_int_send[0] = 1 if tensor.requires_grad else 0
-        req = P_send.comm.Iallreduce(MPI.IN_PLACE, rg_int_send, op=MPI.MAX)
-        requests.append(req)
-
-        # Sending processes know the shape, so they can send a copy of the
-        # data.  We will ignore this variable later.
-        req = P_send.comm.Iallreduce(MPI.IN_PLACE, send_tensor_dim, op=MPI.MAX)
-        requests.append(req)
-
-        # Similarly, sending processes know the tensor shape, so they can send
-        # a copy of it, but we will not use that copy for our actual return
-        # value.
-        req = P_send.comm.Iallreduce(MPI.IN_PLACE, send_tensor_shape, op=MPI.MAX)
+        tensor_dim = len(tensor.shape)
+        if tensor_dim > max_tensor_structure_dim:
+            raise ValueError(f"Tensor dimension ({tensor_dim}) exceeds the maximum "
+                             f"supported dimension ({max_tensor_structure_dim}).")
+
+        # Need to send non-Python types, so convert the boolean temporarily.
+        # Sending processes know the structure, so they send a copy of it, but
+        # we will not use that copy for our actual return value.
+        send_structure = np.full(3 + max_tensor_structure_dim, -1, dtype=np.int)
+        send_structure[0] = 1 if tensor.requires_grad else 0
+        send_structure[1] = tensor_dim
+        send_structure[2] = dtype_to_code(tensor.dtype)
+        send_structure[3:3+tensor_dim] = tensor.shape
+        req = P_send.comm.Iallreduce(MPI.IN_PLACE, send_structure, op=MPI.MAX)
         requests.append(req)
 
     # If the process is a receiving process, but doesn't already know the data
@@ -38,23 +51,8 @@ def compute_output_tensor_structure(tensor, P_send, P_recv):
     # processes, we still have to complete the receive, even though later we
     # will not use that data.
     if (P_send != P_recv) and P_recv.active:
-        # We have the values, set up copies of them to work with
-        rg_int_recv = np.array([-1], dtype=np.int)
-        recv_tensor_dim = np.array([-1], dtype=np.int)
-
-        # Everyone needs to receive this, but we don't need it for future
-        # communication in this function so we can defer receiving the data.
-        req = P_recv.comm.Iallreduce(MPI.IN_PLACE, rg_int_recv, op=MPI.MAX)
-        requests.append(req)
-
-        # We need this value for the next communication, so we have to wait
-        # for it to complete before moving on.
-        req = P_recv.comm.Iallreduce(MPI.IN_PLACE, recv_tensor_dim, op=MPI.MAX)
-        req.Wait()
-
-        recv_tensor_shape = np.zeros(recv_tensor_dim, dtype=np.int)
-        recv_tensor_shape[:] = -1
-        req = P_recv.comm.Iallreduce(MPI.IN_PLACE, recv_tensor_shape, op=MPI.MAX)
+        recv_structure = np.full(3 + max_tensor_structure_dim, -1, dtype=np.int)
+        req = P_recv.comm.Iallreduce(MPI.IN_PLACE, recv_structure, op=MPI.MAX)
         requests.append(req)
 
     # Make sure all requests, including the final recv all reduce complete
@@ -64,39 +62,44 @@ def compute_output_tensor_structure(tensor, P_send, P_recv):
     # Wait until the communication is complete to set these values.  Only
     # receiving ranks that do not have the data originally should enter here.
     if P_recv.active and (P_send != P_recv):
-        tensor_requires_grad = bool(rg_int_recv[0] == 1)
-        tensor_dim = recv_tensor_dim[0]
-        tensor_shape = recv_tensor_shape
+        tensor_requires_grad = bool(recv_structure[0] == 1)
+        tensor_dim = recv_structure[1]
+        tensor_shape = recv_structure[3:3+tensor_dim].copy()
+        tensor_dtype = code_to_dtype(recv_structure[2])
     elif P_send == P_recv:
         tensor_requires_grad = tensor.requires_grad
         tensor_dim = len(tensor.shape)
         tensor_shape = np.array(tensor.shape, dtype=np.int)
+        tensor_dtype = tensor.dtype
     else:
         tensor_requires_grad = None
         tensor_dim = None
         tensor_shape = None
+        tensor_dtype = None
 
     # Finally, everyone should have valid data.  Any sending rank created it
     # from input data.  Any receving _only_ rank used what it was given.
-    return tensor_requires_grad, tensor_dim, tensor_shape
+    return tensor_requires_grad, tensor_dim, tensor_shape, tensor_dtype
 
 
 def compute_global_tensor_shape(tensor, P_in, P_out=None):
 
     x_global_shape = None
     if P_in.active:
+        # Gather every worker's local shape in one collective.  Cartesian
+        # communicators number their ranks in row-major order, so the result
+        # can be viewed as an array over the partition.
+        local_shape = np.array(tensor.shape[:P_in.dim], dtype=np.int)
+        local_shapes = np.zeros(P_in.size*P_in.dim, dtype=np.int)
+        P_in.comm.Allgather(local_shape, local_shapes)
+        local_shapes = local_shapes.reshape(*P_in.shape, P_in.dim)
+
+        # The global size in dimension i is the sum of the local sizes of
+        # the workers that share this worker's index in the other dimensions.
         x_global_shape = np.zeros(P_in.dim, dtype=np.int)
         for i in range(P_in.dim):
-
-            keep = [False] * P_in.dim
-            keep[i] = True
-
-            P_sub = P_in.create_cartesian_subtopology_partition(keep)
-
-            v0 = np.atleast_1d(int(tensor.shape[i]))
-            v1 = np.zeros(1, dtype=np.int)
-            P_sub.comm.Allreduce(v0, v1, op=MPI.SUM)
-            x_global_shape[i] = v1[0]
+            index = tuple(slice(None) if j == i else k for j, k in enumerate(P_in.index))
+            x_global_shape[i] = local_shapes[index][:, i].sum()
 
     if P_out is not None and P_out.active:
         x_global_shape = P_out.broadcast_data(x_global_shape, P_data=P_in)
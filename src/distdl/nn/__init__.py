@@ -1,4 +1,5 @@
 from . import mixins  # noqa: F401
+from .all_sum_reduce import AllSumReduce  # noqa: F401
 from .broadcast import Broadcast  # noqa: F401
 from .conv import DistributedConv1d  # noqa: F401
 from .conv import DistributedConv2d  # noqa: F401
@@ -7,6 +8,7 @@ from .general_conv import DistributedGeneralConv1d  # noqa: F401
 from .general_conv import DistributedGeneralConv2d  # noqa: F401
 from .general_conv import DistributedGeneralConv3d  # noqa: F401
 from .halo_exchange import HaloExchange  # noqa: F401
+from .halo_exchange import HaloPadExchange  # noqa: F401
 from .linear import DistributedLinear  # noqa: F401
 from .module import Module  # noqa: F401
 from .padnd import PadNd  # noqa: F401
@@ -0,0 +1,120 @@
+import numpy as np
+
+from distdl.nn.module import Module
+
+
+class AllSumReduce(Module):
+
+    def __init__(self, P_x, P_y,
+                 transpose_src=False, transpose_dest=False,
+                 preserve_batch=True):
+
+        super(AllSumReduce, self).__init__()
+
+        # The output is the sum reduction from P_x onto P_y, broadcast back
+        # to P_x.  P_y only defines the reduction groups.
+        self.P_x = P_x
+        self.P_y = P_y
+
+        self.transpose_src = transpose_src
+        self.transpose_dest = transpose_dest
+
+        self.preserve_batch = preserve_batch
+
+        self.identity = False
+
+        # Blank partitions
+        self.P_send = self._distdl_backend.Partition()
+        self.P_recv = self._distdl_backend.Partition()
+
+        # Other info needed by the functions
+        self.input_tensor_structure = None
+        self.output_tensor_structure = None
+
+        # Variables for tracking input changes and buffer construction
+        self._distdl_is_setup = False
+        self._input_shape = None
+        self._input_requires_grad = None
+        self._input_dtype = None
+
+        # The identity case is if the partitions are of size 1,
+        # or they are the same partition and neither is tranposed,
+        # or they are the same partition and both are transposed.
+        if self.P_x == self.P_y:
+            if self.P_x.size == 1:
+                self.identity = True
+            elif (self.transpose_dest and self.transpose_src) or \
+                 (not self.transpose_dest and not self.transpose_src):
+                self.identity = True
+
+    def _distdl_module_setup(self, input):
+
+        if not (self.P_x.active or self.P_y.active):
+            return
+
+        # If it is not an identity, we need actual Partitions to do the work.
+        if not self.identity:
+            reduce_partitions = self.P_x.create_reduction_partition_to(self.P_y,
+                                                                       self.transpose_src,
+                                                                       self.transpose_dest)
+            self.P_send = reduce_partitions[0]
+            self.P_recv = reduce_partitions[1]
+
+            self.input_tensor_structure = (input[0].requires_grad,
+                                           len(input[0].shape),
+                                           np.array(input[0].shape, dtype=np.int),
+                                           input[0].dtype)
+            self.output_tensor_structure = self._distdl_backend.compute_output_tensor_structure(input[0],
+                                                                                                self.P_send,
+                                                                                                self.P_recv)
+
+        self._distdl_is_setup = True
+        self._input_shape = input[0].shape
+        self._input_requires_grad = input[0].requires_grad
+        self._input_dtype = input[0].dtype
+
+    def _distdl_module_teardown(self, input):
+
+        # Reset all of the buffers and communication objects
+        self.P_send = self._distdl_backend.Partition()
+        self.P_recv = self._distdl_backend.Partition()
+
+        # Reset any data stored about the tensor
+        self.input_tensor_structure = None
+        self.output_tensor_structure = None
+
+        # Reset any info about the input
+        self._distdl_is_setup = False
+        self._input_shape = None
+        self._input_requires_grad = None
+        self._input_dtype = None
+
+    def _distdl_input_changed(self, input):
+
+        if input[0].requires_grad != self._input_requires_grad:
+            return True
+
+        if input[0].shape != self._input_shape:
+            return True
+
+        if input[0].dtype != self._input_dtype:
+            return True
+
+        return False
+
+    def forward(self, input):
+
+        Function = self._distdl_backend.autograd.all_sum_reduce.AllSumReduceFunction
+
+        if self.identity:
+            return input.clone()
+
+        if not (self.P_x.active or self.P_y.active):
+            return input.clone()
+
+        return Function.apply(input,
+                              self.P_send,
+                              self.P_recv,
+                              self.preserve_batch,
+                              self.input_tensor_structure,
+                              self.output_tensor_structure)
@@ -7,7 +7,8 @@ class Broadcast(Module):
 
     def __init__(self, P_x, P_y,
                  transpose_src=False, transpose_dest=False,
-                 preserve_batch=True):
+                 preserve_batch=True, output_shape=None,
+                 gradient_bucketer=None, cache_output=False):
         super(Broadcast, self).__init__()
 
         self.P_x = P_x
@@ -18,8 +19,23 @@ class Broadcast(Module):
 
         self.preserve_batch = preserve_batch
 
-        # TODO: #25  Make selection of dtype more sensible.
-        self.dtype = np.float32
+        # If the receiving workers know the output shape in advance, the
+        # output tensor structure does not need to be communicated.
+        self.output_shape = output_shape
+
+        # If given, the gradient of the input is reduced by the bucketer,
+        # together with those of other broadcasts, instead of on its own.
+        self.gradient_bucketer = gradient_bucketer
+        self._bucket_slot = None
+
+        # Broadcast posted by start_broadcast, to be completed by the next call
+        self._pending = None
+
+        # If requested, receivers keep the last output and the data is only
+        # broadcast again once the root's input has changed.  The adjoint is
+        # unaffected.
+        self.cache_output = cache_output
+        self._cache = dict() if self.cache_output else None
 
         self.identity = False
 
@@ -35,6 +51,7 @@ class Broadcast(Module):
         self._distdl_is_setup = False
         self._input_shape = None
         self._input_requires_grad = None
+        self._input_dtype = None
 
         # The identity case is if the partitions are of size 1,
         # or they are the same partition and neither is tranposed,
@@ -61,14 +78,17 @@ class Broadcast(Module):
 
             self.input_tensor_structure = (input[0].requires_grad,
                                            len(input[0].shape),
-                                           np.array(input[0].shape, dtype=np.int))
+                                           np.array(input[0].shape, dtype=np.int),
+                                           input[0].dtype)
             self.output_tensor_structure = self._distdl_backend.compute_output_tensor_structure(input[0],
                                                                                                 self.P_send,
-                                                                                                self.P_recv)
+                                                                                                self.P_recv,
+                                                                                                self.output_shape)
 
         self._distdl_is_setup = True
         self._input_shape = input[0].shape
         self._input_requires_grad = input[0].requires_grad
+        self._input_dtype = input[0].dtype
 
     def _distdl_module_teardown(self, input):
 
@@ -79,11 +99,15 @@ class Broadcast(Module):
         # Reset any data stored about the tensor
         self.input_tensor_structure = None
         self.output_tensor_structure = None
+        self._pending = None
+        if self.cache_output:
+            self._cache = dict()
 
         # Reset any info about the input
         self._distdl_is_setup = False
         self._input_shape = None
         self._input_requires_grad = None
+        self._input_dtype = None
 
     def _distdl_input_changed(self, input):
 
@@ -93,8 +117,37 @@ class Broadcast(Module):
         if input[0].shape != self._input_shape:
             return True
 
+        if input[0].dtype != self._input_dtype:
+            return True
+
         return False
 
+    def start_broadcast(self, input):
+
+        # This is not called through __call__, so the setup hook has to be
+        # run explicitly to make sure the partitions exist for this input.
+        self._distdl_forward_pre_hook(self, (input,))
+
+        if self.identity:
+            return
+
+        if not (self.P_x.active or self.P_y.active):
+            return
+
+        broadcast = self._distdl_backend.autograd.broadcast
+        self._pending = broadcast.start_broadcast(input,
+                                                  self.P_send,
+                                                  self.P_recv,
+                                                  self.preserve_batch,
+                                                  self.output_tensor_structure,
+                                                  self._cache)
+
+    def finish_broadcast(self, input):
+
+        # The input must be the same tensor that was passed to
+        # start_broadcast, and it must not be modified in between.
+        return self(input)
+
     def forward(self, input):
 
         Function = self._distdl_backend.autograd.broadcast.BroadcastFunction
@@ -105,10 +158,43 @@ class Broadcast(Module):
         if not (self.P_x.active or self.P_y.active):
             return input.clone()
 
+        # Any broadcast posted by start_broadcast is completed by this call.
+        pending = self._pending
+        self._pending = None
+
+        if pending is None and self.cache_output:
+            broadcast = self._distdl_backend.autograd.broadcast
+            pending = broadcast.start_broadcast(input,
+                                                self.P_send,
+                                                self.P_recv,
+                                                self.preserve_batch,
+                                                self.output_tensor_structure,
+                                                self._cache)
+
+        if self.gradient_bucketer is not None:
+            Function = self._distdl_backend.autograd.broadcast.BucketedBroadcastFunction
+
+            # Broadcasts register on their first use, so the registration
+            # order is the order of the forward pass.
+            if self._bucket_slot is None:
+                self._bucket_slot = self.gradient_bucketer.register(input,
+                                                                    self.output_tensor_structure[2],
+                                                                    self.P_y)
+
+            return Function.apply(input,
+                                  self.P_send,
+                                  self.P_recv,
+                                  self.preserve_batch,
+                                  self.input_tensor_structure,
+                                  self.output_tensor_structure,
+                                  self.gradient_bucketer,
+                                  self._bucket_slot,
+                                  pending)
+
         return Function.apply(input,
                               self.P_send,
                               self.P_recv,
                               self.preserve_batch,
                               self.input_tensor_structure,
                               self.output_tensor_structure,
-                              self.dtype)
+                              pending)
@@ -2,26 +2,39 @@ import numpy as np
 import torch
 
 from distdl.nn.broadcast import Broadcast
-from distdl.nn.halo_exchange import HaloExchange
+from distdl.nn.halo_exchange import HaloPadExchange
 from distdl.nn.mixins.conv_mixin import ConvMixin
 from distdl.nn.mixins.halo_mixin import HaloMixin
+from distdl.nn.mixins.halo_overlap_mixin import HaloOverlapMixin
 from distdl.nn.module import Module
-from distdl.nn.padnd import PadNd
 from distdl.nn.unpadnd import UnpadNd
 from distdl.utilities.slicing import assemble_slices
 from distdl.utilities.torch import zero_volume_tensor
 
 
-class DistributedConvBase(Module, HaloMixin, ConvMixin):
+class DistributedConvBase(Module, HaloMixin, HaloOverlapMixin, ConvMixin):
 
     TorchConvType = None
 
-    def __init__(self, P_x, *args, **kwargs):
+    def __init__(self, P_x, *args, overlap_halo_exchange=False,
+                 gradient_bucketer=None, cache_parameter_broadcast=False, **kwargs):
 
         super(DistributedConvBase, self).__init__()
 
         self.P_x = P_x
 
+        # If requested, the convolution of the interior of the local input is
+        # computed while the halo exchange is in flight.
+        self.overlap_halo_exchange = overlap_halo_exchange
+
+        # If given, the weight and bias gradients are reduced in buckets
+        # shared with other layers, rather than one reduction per tensor.
+        self.gradient_bucketer = gradient_bucketer
+
+        # If requested, the weight and bias are only broadcast again once
+        # they have changed on the root, e.g., by an optimizer step.
+        self.cache_parameter_broadcast = cache_parameter_broadcast
+
         if not self.P_x.active:
             return
 
@@ -34,6 +47,13 @@ class DistributedConvBase(Module, HaloMixin, ConvMixin):
             self.serial = True
             return
 
+        # With circular padding, the global input wraps around, so the
+        # partition must too.  The wraparound ghosts are then exchanged with
+        # the others and the convolution itself does not pad.
+        self.circular = self.conv_layer.padding_mode == 'circular'
+        if self.circular and not np.all(self.P_x.periods[2:]):
+            raise ValueError("Circular padding requires a partition that is periodic in the spatial dimensions.")
+
         # Weights and biases partition
         self.P_wb = self.P_x.create_partition_inclusive([0])
         self.P_wb_cart = self.P_wb.create_cartesian_topology_partition([1])
@@ -69,31 +89,45 @@ class DistributedConvBase(Module, HaloMixin, ConvMixin):
             del self.conv_layer.bias
             self.conv_layer.bias = new_bias
 
+        # Every worker knows the shape of the weight and bias, so their
+        # structure does not need to be communicated during setup.
         self.w_broadcast = Broadcast(self.P_wb_cart, self.P_x,
-                                     preserve_batch=False)
+                                     preserve_batch=False,
+                                     output_shape=self.conv_layer.weight.shape,
+                                     gradient_bucketer=self.gradient_bucketer,
+                                     cache_output=self.cache_parameter_broadcast)
 
         if self.conv_layer.bias is not None:
             self.b_broadcast = Broadcast(self.P_wb_cart, self.P_x,
-                                         preserve_batch=False)
+                                         preserve_batch=False,
+                                         output_shape=self.conv_layer.bias.shape,
+                                         gradient_bucketer=self.gradient_bucketer,
+                                         cache_output=self.cache_parameter_broadcast)
 
-        # We need the halo shape, and other info, to fully populate the pad,
-        # halo exchange, and unpad layers.  For pad and unpad, we defer their
-        # construction to the pre-forward hook.
+        # We need the halo shape, and other info, to fully populate the halo
+        # exchange and unpad layers.  For unpad, we defer construction to the
+        # pre-forward hook.
 
-        self.pad_layer = None
         self.unpad_layer = None
 
-        # We need to be able to remove some data from the input to the conv
-        # layer.
-        self.needed_slices = None
-
         # For the halo layer we also defer construction, so that we can have
-        # the halo shape for the input.  The halo will allocate its own
-        # buffers, but it needs this information at construction to be able
-        # to do this in the pre-forward hook.
+        # the halo shape for the input.  The halo layer pads the input,
+        # exchanges the halo, and removes the data that is not needed by the
+        # conv layer.  It will allocate its own buffers, but it needs this
+        # information at construction to be able to do this in the
+        # pre-forward hook.
 
         self.halo_layer = None
 
+        # Interior and boundary regions, if the exchange is overlapped
+        self._overlap_info = None
+
+        # Weight and bias broadcasts posted by start_parameter_broadcast
+        self._pending_parameters = None
+
+        if self.overlap_halo_exchange and self.conv_layer.padding_mode != 'zeros':
+            raise ValueError("Overlapped halo exchange requires zero padding.")
+
         # Variables for tracking input changes and buffer construction
         self._distdl_is_setup = False
         self._input_shape = None
@@ -121,29 +155,31 @@ class DistributedConvBase(Module, HaloMixin, ConvMixin):
                                                     self.conv_layer.dilation,
                                                     self.P_x.active,
                                                     self.P_x.shape,
-                                                    self.P_x.index)
+                                                    self.P_x.index,
+                                                    periodic=self._periodic_dims())
         halo_shape = exchange_info[0]
         recv_buffer_shape = exchange_info[1]
         send_buffer_shape = exchange_info[2]
         needed_ranges = exchange_info[3]
 
-        # Now we have enough information to instantiate the padding shim
-        self.pad_layer = PadNd(halo_shape, value=0)
-
-        # We can also set up part of the halo layer.
-        self.halo_layer = HaloExchange(self.P_x,
-                                       halo_shape,
-                                       recv_buffer_shape,
-                                       send_buffer_shape)
-
         # We have to select out the "unused" entries.
-        self.needed_slices = assemble_slices(needed_ranges[:, 0],
-                                             needed_ranges[:, 1])
+        needed_slices = assemble_slices(needed_ranges[:, 0],
+                                        needed_ranges[:, 1])
+
+        # Now we have enough information to set up part of the halo layer,
+        # which also pads the input and selects the needed entries.
+        self.halo_layer = HaloPadExchange(self.P_x,
+                                          halo_shape,
+                                          recv_buffer_shape,
+                                          send_buffer_shape,
+                                          needed_slices)
 
         # Unpad shape are conv layer's padding in the dimensions where we have
         # a halo, otherwise 0.  There is no halo in the batch and channel
-        # dimensions.
+        # dimensions.  With circular padding, the convolution does not pad.
         conv_padding = np.concatenate(([0, 0], self.conv_layer.padding))
+        if self.circular:
+            conv_padding = np.zeros_like(conv_padding)
         unpad_shape = []
         for pad, halo in zip(conv_padding, halo_shape):
             unpad_shape.append(np.where(halo > 0, pad, 0))
@@ -151,13 +187,29 @@ class DistributedConvBase(Module, HaloMixin, ConvMixin):
 
         self.unpad_layer = UnpadNd(unpad_shape, value=0)
 
+        if self.overlap_halo_exchange:
+            self._overlap_info = self._compute_overlap_info(input[0].shape,
+                                                            halo_shape,
+                                                            needed_ranges,
+                                                            unpad_shape,
+                                                            self.conv_layer.kernel_size,
+                                                            self.conv_layer.stride,
+                                                            self.conv_layer.padding,
+                                                            self.conv_layer.dilation)
+
+    def _periodic_dims(self):
+
+        # Only the spatial dimensions wrap around, and only with circular
+        # padding.
+        spatial_dim = len(self.conv_layer.kernel_size)
+        return np.array([False, False] + [self.circular]*spatial_dim)
+
     def _distdl_module_teardown(self, input):
 
         # Reset all sub_layers
-        self.pad_layer = None
         self.unpad_layer = None
-        self.needed_slices = None
         self.halo_layer = None
+        self._overlap_info = None
 
         # Reset any info about the input
         self._distdl_is_setup = False
@@ -174,6 +226,33 @@ class DistributedConvBase(Module, HaloMixin, ConvMixin):
 
         return False
 
+    def _distdl_input_batch_changed(self, input):
+
+        # If the batch dimension is partitioned, the global batch size has to
+        # be recomputed, which requires communication.
+        if self.P_x.active and self.P_x.shape[0] != 1:
+            return False
+
+        if input[0].requires_grad != self._input_requires_grad:
+            return False
+
+        return input[0].shape[1:] == self._input_shape[1:]
+
+    def _distdl_module_batch_resize(self, input):
+
+        self._input_shape = input[0].shape
+
+        if not self.P_x.active:
+            return
+
+        if self.serial:
+            return
+
+        # There is no halo in the batch dimension, so only the needed range
+        # in that dimension depends on the batch size.  The halo layer resizes
+        # its own buffers when it sees the new input.
+        self.halo_layer.needed_slices[0] = slice(0, input[0].shape[0], None)
+
     def forward(self, input):
 
         if not self.P_x.active:
@@ -182,19 +261,87 @@ class DistributedConvBase(Module, HaloMixin, ConvMixin):
         if self.serial:
             return self.conv_layer(input)
 
-        w = self.w_broadcast(self.weight)
-        self.conv_layer.weight = w
+        # If the parameters were broadcast ahead of time in a different dtype
+        # than the input's, they are broadcast again.
+        if self._pending_parameters is not None and self._pending_parameters[0] != input.dtype:
+            self._finish_parameter_broadcast()
 
-        if self.conv_layer.bias is not None:
-            b = self.b_broadcast(self.bias)
-            self.conv_layer.bias = b
+        # The weight and bias broadcasts are in flight during the halo
+        # exchange and are only completed when the convolution needs them.
+        self.start_parameter_broadcast(input.dtype)
 
-        input_padded = self.pad_layer(input)
-        input_exchanged = self.halo_layer(input_padded)
-        input_needed = input_exchanged[self.needed_slices]
-        conv_output = self.conv_layer(input_needed)
+        if self._overlap_info is not None:
+            return self._overlapped_forward(input, self._unpadded_conv)
+
+        input_needed = self.halo_layer(input)
+        self._finish_parameter_broadcast()
+        if self.circular:
+            conv_output = self._unpadded_conv(input_needed)
+        else:
+            conv_output = self.conv_layer(input_needed)
         return self.unpad_layer(conv_output)
 
+    def start_parameter_broadcast(self, dtype):
+
+        # The broadcasts can also be started ahead of the forward pass, e.g.,
+        # while the previous layer computes.  The weight and bias must not be
+        # modified until the forward pass completes them.
+        if not self.P_x.active or self.serial:
+            return
+
+        if self._pending_parameters is not None:
+            return
+
+        # Workers that do not store the weight and bias do not learn their
+        # dtype from the broadcast, so they receive them in the given dtype,
+        # which must be the input's dtype.
+        weight = self.weight
+        if not self.P_wb_cart.active:
+            weight = weight.to(dtype)
+        self.w_broadcast.start_broadcast(weight)
+
+        bias = None
+        if self.conv_layer.bias is not None:
+            bias = self.bias
+            if not self.P_wb_cart.active:
+                bias = bias.to(dtype)
+            self.b_broadcast.start_broadcast(bias)
+
+        self._pending_parameters = (dtype, weight, bias)
+
+    def _finish_parameter_broadcast(self):
+
+        if self._pending_parameters is None:
+            return
+
+        _, weight, bias = self._pending_parameters
+        self._pending_parameters = None
+
+        self.conv_layer.weight = self.w_broadcast.finish_broadcast(weight)
+
+        if bias is not None:
+            self.conv_layer.bias = self.b_broadcast.finish_broadcast(bias)
+
+    def _unpadded_conv(self, input):
+
+        # The first region computed completes the parameter broadcasts.
+        self._finish_parameter_broadcast()
+
+        # The overlapped regions are padded explicitly, so the convolution
+        # must not pad them again.
+        conv_functions = [torch.nn.functional.conv1d,
+                          torch.nn.functional.conv2d,
+                          torch.nn.functional.conv3d]
+        conv_function = conv_functions[input.dim() - 3]
+
+        return conv_function(input,
+                             self.conv_layer.weight,
+                             self.conv_layer.bias,
+                             self.conv_layer.stride,
+                             0,
+                             self.conv_layer.dilation,
+                             self.conv_layer.groups)
+
 
 class DistributedConv1d(DistributedConvBase):
 
@@ -2,16 +2,14 @@ import numpy as np
 import torch
 
 from distdl.nn.broadcast import Broadcast
-from distdl.nn.halo_exchange import HaloExchange
+from distdl.nn.halo_exchange import HaloPadExchange
 from distdl.nn.mixins.conv_mixin import ConvMixin
 from distdl.nn.mixins.halo_mixin import HaloMixin
 from distdl.nn.module import Module
-from distdl.nn.padnd import PadNd
 from distdl.nn.sum_reduce import SumReduce
 from distdl.nn.unpadnd import UnpadNd
 from distdl.utilities.slicing import assemble_slices
 from distdl.utilities.slicing import compute_subshape
-from distdl.utilities.slicing import range_index
 from distdl.utilities.torch import zero_volume_tensor
 
 
@@ -22,7 +20,7 @@ class DistributedGeneralConvBase(Module, HaloMixin, ConvMixin):
     def __init__(self, P_x, P_y, P_w,
                  in_channels=1, out_channels=1,
                  bias=True,
-                 *args, **kwargs):
+                 *args, cache_parameter_broadcast=False, **kwargs):
 
         super(DistributedGeneralConvBase, self).__init__()
 
@@ -33,6 +31,10 @@ class DistributedGeneralConvBase(Module, HaloMixin, ConvMixin):
         # P_w is P_co x P_ci x P_d-1 x ... x P_0
         self.P_w = P_w
 
+        # If requested, the weight and bias are only broadcast again once
+        # they have changed on their roots, e.g., by an optimizer step.
+        self.cache_parameter_broadcast = cache_parameter_broadcast
+
         self.P_union = self._distdl_backend.Partition()
         if not (self.P_x.active or
                 self.P_y.active or
@@ -106,38 +108,29 @@ class DistributedGeneralConvBase(Module, HaloMixin, ConvMixin):
             # All of P_w always receives the weight
             self.receives_weight = True
 
+            # The Cartesian index of every worker in P_w, one per row
+            w_indices = P_w.cartesian_index(np.arange(P_w.size))
+
             # This subset is taken to be the origin of the spartial component
-            w_root_subset = []
-            for i, c in enumerate(range_index(P_w.shape)):
-                c = np.asarray(c)
-                # Find the P_co x P_ci x 1 x ... x 1 subset to store the weights
-                if np.all(c[2:] == 0):
-                    w_root_subset.append(i)
+            # Find the P_co x P_ci x 1 x ... x 1 subset to store the weights
+            w_root_subset = np.where(np.all(w_indices[:, 2:] == 0, axis=1))[0]
 
             self.P_wr_base = self.P_w.create_partition_inclusive(w_root_subset)
             # ones are needed so the broadcast will work
             self.P_wr = self.P_wr_base.create_cartesian_topology_partition([P_co, P_ci] + [1]*len(P_spatial))
             self.stores_weight = self.P_wr.active
 
-            b_subset = []
-            for i, c in enumerate(range_index(P_w.shape)):
-                c = np.asarray(c)
-                # Find the P_co x 1 x P_0 x ... x P_D-1 subset that needs biases in its calculation.
-                # This is everywhere that the input channels is rank 0.
-                if c[1] == 0:
-                    b_subset.append(i)
+            # Find the P_co x 1 x P_0 x ... x P_D-1 subset that needs biases in its calculation.
+            # This is everywhere that the input channels is rank 0.
+            b_subset = np.where(w_indices[:, 1] == 0)[0]
 
             self.P_b_base = self.P_w.create_partition_inclusive(b_subset)
             self.P_b = self.P_b_base.create_cartesian_topology_partition([P_co] + [1] + list(P_spatial))
             self.receives_bias = self.P_b.active and bias
 
             # Now find the subset of _that_ which actually stores the learnable parameter.
-            b_root_subset = []
-            for i, c in enumerate(range_index(P_w.shape)):
-                c = np.asarray(c)
             # Find the P_co x 1 x 1 x ... x 1 subset to store the biases
-                if np.all(c[1:] == 0):
-                    b_root_subset.append(i)
+            b_root_subset = np.where(np.all(w_indices[:, 1:] == 0, axis=1))[0]
 
             self.P_br_base = self.P_w.create_partition_inclusive(b_root_subset)
             # ones are needed so the broadcast will work
@@ -207,34 +200,40 @@ class DistributedGeneralConvBase(Module, HaloMixin, ConvMixin):
         self.conv_padding = P_union.broadcast_data(self.conv_padding, root=0)
         self.conv_dilation = P_union.broadcast_data(self.conv_dilation, root=0)
 
-        # We need the halo shape, and other info, to fully populate the pad,
-        # halo exchange, and unpad layers.  For pad and unpad, we defer their
-        # construction to the pre-forward hook.
+        # We need the halo shape, and other info, to fully populate the halo
+        # exchange and unpad layers.  For unpad, we defer construction to the
+        # pre-forward hook.
 
-        self.pad_layer = None
         self.unpad_layer = None
 
-        # We need to be able to remove some data from the input to the conv
-        # layer.
-        self.needed_slices = None
-
         # For the halo layer we also defer construction, so that we can have
-        # the halo shape for the input.  The halo will allocate its own
-        # buffers, but it needs this information at construction to be able
-        # to do this in the pre-forward hook.
+        # the halo shape for the input.  The halo layer pads the input,
+        # exchanges the halo, and removes the data that is not needed by the
+        # conv layer.  It will allocate its own buffers, but it needs this
+        # information at construction to be able to do this in the
+        # pre-forward hook.
 
         self.halo_layer = None
 
+        # Weight and bias broadcasts posted by start_parameter_broadcast
+        self._pending_parameters = None
+
         # Variables for tracking input changes and buffer construction
         self._distdl_is_setup = False
         self._input_shape = None
         self._input_requires_grad = None
 
+        # Every worker in P_w knows the shape of its local weight and bias, so
+        # their structure does not need to be communicated during setup.
         if P_w.active:
-            self.w_broadcast = Broadcast(self.P_wr, self.P_w, preserve_batch=False)
+            self.w_broadcast = Broadcast(self.P_wr, self.P_w, preserve_batch=False,
+                                         output_shape=self.conv_layer.weight.shape,
+                                         cache_output=self.cache_parameter_broadcast)
 
         if self.receives_bias or self.stores_bias:
-            self.b_broadcast = Broadcast(self.P_br, self.P_b, preserve_batch=False)
+            self.b_broadcast = Broadcast(self.P_br, self.P_b, preserve_batch=False,
+                                         output_shape=self.conv_layer.bias.shape,
+                                         cache_output=self.cache_parameter_broadcast)
 
         self.x_broadcast = Broadcast(self.P_x, self.P_w, preserve_batch=True)
         self.y_sum_reduce = SumReduce(self.P_w, self.P_y, preserve_batch=True)
@@ -266,18 +265,17 @@ class DistributedGeneralConvBase(Module, HaloMixin, ConvMixin):
             send_buffer_shape = exchange_info[2]
             needed_ranges = exchange_info[3]
 
-            # Now we have enough information to instantiate the padding shim
-            self.pad_layer = PadNd(halo_shape, value=0)
-
-            # We can also set up part of the halo layer.
-            self.halo_layer = HaloExchange(self.P_x,
-                                           halo_shape,
-                                           recv_buffer_shape,
-                                           send_buffer_shape)
-
             # We have to select out the "unused" entries.
-            self.needed_slices = assemble_slices(needed_ranges[:, 0],
-                                                 needed_ranges[:, 1])
+            needed_slices = assemble_slices(needed_ranges[:, 0],
+                                            needed_ranges[:, 1])
+
+            # Now we have enough information to set up part of the halo layer,
+            # which also pads the input and selects the needed entries.
+            self.halo_layer = HaloPadExchange(self.P_x,
+                                              halo_shape,
+                                              recv_buffer_shape,
+                                              send_buffer_shape,
+                                              needed_slices)
 
         # The output has to do some unpadding
         if self.P_y.active:
@@ -313,9 +311,7 @@ class DistributedGeneralConvBase(Module, HaloMixin, ConvMixin):
     def _distdl_module_teardown(self, input):
 
         # Reset all sub_layers
-        self.pad_layer = None
         self.unpad_layer = None
-        self.needed_slices = None
         self.halo_layer = None
 
         self.x_global_shape = None
@@ -345,23 +341,27 @@ class DistributedGeneralConvBase(Module, HaloMixin, ConvMixin):
         if self.serial:
             return self.conv_layer(input)
 
+        # Workers that receive the weight and bias learn their dtype from the
+        # input broadcast.  Once it is set up, they already know it, so the
+        # parameter broadcasts are in flight during the halo exchange and the
+        # input broadcast.  On the first call, the setup of the broadcasts
+        # must happen in the same order on all workers, so they wait.
+        if self.P_w.active and self.x_broadcast._distdl_is_setup:
+            self.start_parameter_broadcast(self.x_broadcast.output_tensor_structure[3])
+
         x = input
         if self.P_x.active:
-            x = self.pad_layer(x)
             x = self.halo_layer(x)
-            x = x[self.needed_slices]
 
-        # Weights always received
-        if self.P_w.active:
-            w = self.w_broadcast(self._weight)
-            self.conv_layer.weight = w
+        x = self.x_broadcast(x)
 
-        # Biases only received in some places
-        if self.receives_bias or self.stores_bias:
-            b = self.b_broadcast(self._bias)
-            self.conv_layer.bias = b
+        # If the dtype of the input changed, the parameters are broadcast
+        # again in the new dtype.
+        if self._pending_parameters is not None and self._pending_parameters[0] != x.dtype:
+            self._finish_parameter_broadcast()
 
-        x = self.x_broadcast(x)
+        self.start_parameter_broadcast(x.dtype)
+        self._finish_parameter_broadcast()
 
         if self.P_w.active:
             x = self.conv_layer(x)
@@ -373,6 +373,58 @@ class DistributedGeneralConvBase(Module, HaloMixin, ConvMixin):
 
         return y
 
+    def start_parameter_broadcast(self, dtype):
+
+        # The broadcasts can also be started ahead of the forward pass, e.g.,
+        # while the previous layer computes.  The weight and bias must not be
+        # modified until the forward pass completes them.
+        if not (self.P_x.active or
+                self.P_y.active or
+                self.P_w.active):
+            return
+
+        if self.serial:
+            return
+
+        if self._pending_parameters is not None:
+            return
+
+        # Workers that do not store the weight and bias do not learn their
+        # dtype from the broadcast, so they receive them in the given dtype,
+        # which must be the dtype of the broadcasted input.
+
+        # Weights always received
+        weight = None
+        if self.P_w.active:
+            weight = self._weight
+            if not self.stores_weight:
+                weight = weight.to(dtype)
+            self.w_broadcast.start_broadcast(weight)
+
+        # Biases only received in some places
+        bias = None
+        if self.receives_bias or self.stores_bias:
+            bias = self._bias
+            if not self.stores_bias:
+                bias = bias.to(dtype)
+            self.b_broadcast.start_broadcast(bias)
+
+        self._pending_parameters = (dtype, weight, bias)
+
+    def _finish_parameter_broadcast(self):
+
+        if self._pending_parameters is None:
+            return
+
+        _, weight, bias = self._pending_parameters
+        self._pending_parameters = None
+
+        if weight is not None:
+            self.conv_layer.weight = self.w_broadcast.finish_broadcast(weight)
+
+        if bias is not None:
+            self.conv_layer.bias = self.b_broadcast.finish_broadcast(bias)
+
 
 class DistributedGeneralConv1d(DistributedGeneralConvBase):
 
@@ -1,12 +1,18 @@
 import numpy as np
 
 from distdl.nn.module import Module
+from distdl.utilities.dtype import torch_to_numpy_dtype
 from distdl.utilities.slicing import compute_nd_slice_volume
+from distdl.utilities.torch import pad_tensor
 
 
 class HaloExchange(Module):
 
-    def __init__(self, P_x, halo_shape, recv_buffer_shape, send_buffer_shape):
+    def __init__(self, P_x, halo_shape, recv_buffer_shape, send_buffer_shape,
+                 use_persistent_requests=False,
+                 use_subarray_datatypes=False,
+                 use_diagonal_exchange=False,
+                 use_neighborhood_collectives=False):
 
         super(HaloExchange, self).__init__()
 
@@ -15,17 +21,69 @@ class HaloExchange(Module):
         self.recv_buffer_shape = recv_buffer_shape
         self.send_buffer_shape = send_buffer_shape
 
+        # If requested, the communication requests are created once, at
+        # setup, and restarted on every call rather than being re-posted.
+        self.use_persistent_requests = use_persistent_requests
+
+        # If requested, MPI subarray datatypes are used to send and receive
+        # the halo directly from and into the tensor, rather than through
+        # pack and unpack buffers.
+        self.use_subarray_datatypes = use_subarray_datatypes
+
+        # Persistent requests are bound to fixed buffers, but the subarray
+        # datatypes are relative to the storage of each new input tensor.
+        if self.use_persistent_requests and self.use_subarray_datatypes:
+            raise ValueError("Persistent requests cannot be used with subarray datatypes.")
+
+        # If requested, the halo is exchanged directly with every neighbor,
+        # across faces, edges, and corners, in a single round, rather than
+        # one dimension at a time with the corners relayed through the faces.
+        self.use_diagonal_exchange = use_diagonal_exchange
+
+        if self.use_diagonal_exchange and (self.use_persistent_requests or self.use_subarray_datatypes):
+            raise ValueError("The diagonal exchange cannot be used with persistent requests or subarray datatypes.")
+
+        # If requested, each dimension's exchange is a single non-blocking
+        # neighborhood collective over the Cartesian topology, moving the halo
+        # with subarray datatypes, so the MPI library schedules the messages.
+        self.use_neighborhood_collectives = use_neighborhood_collectives
+
+        if self.use_neighborhood_collectives and (self.use_persistent_requests or self.use_diagonal_exchange):
+            raise ValueError("Neighborhood collectives cannot be used with persistent requests or the diagonal exchange.")
+
+        # If a periodic dimension has only one or two workers, the left and
+        # right neighbors are the same worker, and the messages to and from
+        # them cannot be told apart in a neighborhood collective.
+        if self.use_neighborhood_collectives and self.P_x.active:
+            if np.any(self.P_x.periods & (self.P_x.shape < 3)):
+                raise ValueError("Neighborhood collectives require at least 3 workers in periodic dimensions.")
+
+        self._exchange_method = "sequential"
+        if self.use_diagonal_exchange:
+            self._exchange_method = "diagonal"
+        elif self.use_neighborhood_collectives:
+            self._exchange_method = "neighborhood"
+
         self.neighbor_ranks = None
         if self.P_x.active:
-            self.neighbor_ranks = self.P_x.neighbor_ranks(self.P_x.rank)
+            if self.use_diagonal_exchange:
+                self.neighbor_ranks = self.P_x.diagonal_neighbor_ranks(self.P_x.rank)
+            else:
+                self.neighbor_ranks = self.P_x.neighbor_ranks(self.P_x.rank)
 
         self.slices = None
         self.buffers = None
+        self.requests = None
+        self.datatypes = None
+
+        # Requests posted by start_exchange, to be completed by the next call
+        self._pending = None
 
         # Variables for tracking input changes and buffer construction
         self._distdl_is_setup = False
         self._input_shape = None
         self._input_requires_grad = None
+        self._input_dtype = None
 
     def _assemble_slices(self, x_local_shape, recv_buffer_shape, send_buffer_shape):
 
@@ -91,7 +149,57 @@ class HaloExchange(Module):
 
         return slices
 
-    def _allocate_buffers(self, slices, recv_buffer_shape, send_buffer_shape):
+    def _assemble_diagonal_slices(self, x_local_shape, recv_buffer_shape, send_buffer_shape):
+
+        slices = []
+
+        # For each neighbor, the bulk region sent to it and the ghost region
+        # received from it.  Along the dimensions the neighbor is offset in,
+        # these are the left or right bulk and ghost regions.  Along all other
+        # dimensions, both are the full bulk, so the regions across faces,
+        # edges, and corners tile the ghost shell exactly once.
+        for offset, _ in self.neighbor_ranks:
+            bulk_slices = []
+            ghost_slices = []
+
+            for j, o in enumerate(offset):
+                s = x_local_shape[j]
+
+                lrecv_size = int(recv_buffer_shape[j, 0])
+                lsend_size = int(send_buffer_shape[j, 0])
+                rrecv_size = int(recv_buffer_shape[j, 1])
+                rsend_size = int(send_buffer_shape[j, 1])
+
+                if o < 0:
+                    bulk_slices.append(slice(lrecv_size, lrecv_size + lsend_size, None))
+                    ghost_slices.append(slice(0, lrecv_size, None))
+                elif o > 0:
+                    bulk_slices.append(slice(s - (rrecv_size + rsend_size), s - rrecv_size, None))
+                    ghost_slices.append(slice(s - rrecv_size, s, None))
+                else:
+                    bulk_slices.append(slice(lrecv_size, s - rrecv_size, None))
+                    ghost_slices.append(slice(lrecv_size, s - rrecv_size, None))
+
+            slices.append((tuple(bulk_slices), tuple(ghost_slices)))
+
+        return slices
+
+    def _allocate_diagonal_buffers(self, slices, dtype=np.float32):
+
+        buffers = []
+
+        # A region is empty if there is no neighbor in one of its offset
+        # dimensions, as the send and receive sizes are then zero.
+        for bulk_slices, ghost_slices in slices:
+            bb_len = compute_nd_slice_volume(bulk_slices)
+            gb_len = compute_nd_slice_volume(ghost_slices)
+
+            buffers.append([np.zeros(shape=x, dtype=dtype) if x > 0 else None for x in [bb_len, gb_len]])
+
+        return buffers
+
+    def _allocate_buffers(self, slices, recv_buffer_shape, send_buffer_shape,
+                          ghost_buffers=True, dtype=np.float32):
 
         dim = len(slices)
 
@@ -103,32 +211,94 @@ class HaloExchange(Module):
             rbb_len = compute_nd_slice_volume(slices[i][2]) if send_buffer_shape[i, 1] > 0 else 0
             rgb_len = compute_nd_slice_volume(slices[i][3]) if recv_buffer_shape[i, 1] > 0 else 0
 
-            buffers_i = [np.zeros(shape=x) if x > 0 else None for x in [lbb_len, lgb_len, rbb_len, rgb_len]]
+            if not ghost_buffers:
+                lgb_len = 0
+                rgb_len = 0
+
+            buffers_i = [np.zeros(shape=x, dtype=dtype) if x > 0 else None for x in [lbb_len, lgb_len, rbb_len, rgb_len]]
             buffers.append(buffers_i)
 
         return buffers
 
+    def _allocate_neighborhood_buffers(self, slices, recv_buffer_shape, send_buffer_shape, dtype=np.float32):
+
+        # A neighborhood collective receives into a single buffer, so the left
+        # and right bulk buffers of each dimension are one allocation.
+        buffers = []
+
+        for lbb, _, rbb, _ in self._allocate_buffers(slices, recv_buffer_shape, send_buffer_shape,
+                                                     ghost_buffers=False, dtype=dtype):
+            length = sum(len(x) for x in [lbb, rbb] if x is not None)
+            buffers.append(np.zeros(shape=length, dtype=dtype) if length > 0 else None)
+
+        return buffers
+
+    def _exchange_shape(self, x_local_shape):
+
+        # The exchange is performed on the input tensor itself.
+        return x_local_shape
+
     def _distdl_module_setup(self, input):
 
         if self.P_x.active:
-            x_local_shape = input[0].shape
+            x_local_shape = self._exchange_shape(input[0].shape)
             self.slices = self._assemble_slices(x_local_shape, self.recv_buffer_shape, self.send_buffer_shape)
-            self.buffers = self._allocate_buffers(self.slices, self.recv_buffer_shape, self.send_buffer_shape)
+            # The buffers hold raw tensor entries, so they must match the
+            # tensor's dtype.
+            dtype = torch_to_numpy_dtype(input[0].dtype)
+            if self.use_diagonal_exchange:
+                self.slices = self._assemble_diagonal_slices(x_local_shape, self.recv_buffer_shape, self.send_buffer_shape)
+                self.buffers = self._allocate_diagonal_buffers(self.slices, dtype=dtype)
+            elif self.use_subarray_datatypes or self.use_neighborhood_collectives:
+                # Ghosts are received directly into the tensor, so only the
+                # bulk buffers, where the adjoint is accumulated, are needed.
+                if self.use_neighborhood_collectives:
+                    self.buffers = self._allocate_neighborhood_buffers(self.slices, self.recv_buffer_shape, self.send_buffer_shape,
+                                                                       dtype=dtype)
+                else:
+                    self.buffers = self._allocate_buffers(self.slices, self.recv_buffer_shape, self.send_buffer_shape,
+                                                          ghost_buffers=False,
+                                                          dtype=dtype)
+                halo_exchange = self._distdl_backend.autograd.halo_exchange
+                self.datatypes = halo_exchange.create_subarray_datatypes(self.slices,
+                                                                         x_local_shape,
+                                                                         input[0].element_size(),
+                                                                         self.recv_buffer_shape,
+                                                                         self.send_buffer_shape)
+            else:
+                self.buffers = self._allocate_buffers(self.slices, self.recv_buffer_shape, self.send_buffer_shape,
+                                                      dtype=dtype)
+            if self.use_persistent_requests:
+                halo_exchange = self._distdl_backend.autograd.halo_exchange
+                self.requests = halo_exchange.init_persistent_requests(self.P_x,
+                                                                       self.buffers,
+                                                                       self.neighbor_ranks)
 
         self._distdl_is_setup = True
         self._input_shape = input[0].shape
         self._input_requires_grad = input[0].requires_grad
+        self._input_dtype = input[0].dtype
 
     def _distdl_module_teardown(self, input):
 
         # Reset all of the buffers and communication objects
+        if self.requests is not None:
+            halo_exchange = self._distdl_backend.autograd.halo_exchange
+            halo_exchange.free_persistent_requests(self.requests)
+        if self.datatypes is not None:
+            halo_exchange = self._distdl_backend.autograd.halo_exchange
+            halo_exchange.free_subarray_datatypes(self.datatypes)
         self.slices = None
         self.buffers = None
+        self.requests = None
+        self.datatypes = None
+        self._pending = None
 
         # Reset any info about the input
         self._distdl_is_setup = False
         self._input_shape = None
         self._input_requires_grad = None
+        self._input_dtype = None
 
     def _distdl_input_changed(self, input):
 
@@ -138,8 +308,41 @@ class HaloExchange(Module):
         if input[0].shape != self._input_shape:
             return True
 
+        if input[0].dtype != self._input_dtype:
+            return True
+
         return False
 
+    def start_exchange(self, input):
+
+        # This is not called through __call__, so the setup hook has to be
+        # run explicitly to make sure the buffers exist for this input.
+        self._distdl_forward_pre_hook(self, (input,))
+
+        if not self.P_x.active:
+            return
+
+        # The subarray datatypes describe the halo regions of a C-ordered
+        # tensor.
+        if self.datatypes is not None and not input.is_contiguous():
+            raise ValueError("Subarray datatypes require a contiguous input tensor.")
+
+        halo_exchange = self._distdl_backend.autograd.halo_exchange
+        self._pending = halo_exchange.start_halo_exchange(input,
+                                                          self.P_x,
+                                                          self.slices,
+                                                          self.buffers,
+                                                          self.neighbor_ranks,
+                                                          self.requests,
+                                                          self.datatypes,
+                                                          self._exchange_method)
+
+    def finish_exchange(self, input):
+
+        # The input must be the same tensor that was passed to start_exchange,
+        # and it must not be modified in between.
+        return self(input)
+
     def forward(self, input):
 
         Function = self._distdl_backend.autograd.halo_exchange.HaloExchangeFunction
@@ -147,8 +350,97 @@ class HaloExchange(Module):
         if not self.P_x.active:
             return input.clone()
 
+        # The subarray datatypes describe the halo regions of a C-ordered
+        # tensor.
+        if self.datatypes is not None and not input.is_contiguous():
+            raise ValueError("Subarray datatypes require a contiguous input tensor.")
+
+        # Any exchange posted by start_exchange is completed by this call.
+        pending = self._pending
+        self._pending = None
+
+        return Function.apply(input,
+                              self.P_x,
+                              self.slices,
+                              self.buffers,
+                              self.neighbor_ranks,
+                              self.requests,
+                              self.datatypes,
+                              pending,
+                              self._exchange_method)
+
+
+class HaloPadExchange(HaloExchange):
+
+    def __init__(self, P_x, halo_shape, recv_buffer_shape, send_buffer_shape,
+                 needed_slices,
+                 use_persistent_requests=False,
+                 use_subarray_datatypes=False,
+                 use_diagonal_exchange=False,
+                 use_neighborhood_collectives=False):
+
+        super(HaloPadExchange, self).__init__(P_x, halo_shape,
+                                              recv_buffer_shape,
+                                              send_buffer_shape,
+                                              use_persistent_requests=use_persistent_requests,
+                                              use_subarray_datatypes=use_subarray_datatypes,
+                                              use_diagonal_exchange=use_diagonal_exchange,
+                                              use_neighborhood_collectives=use_neighborhood_collectives)
+
+        # The input is padded by the halo, the halo is exchanged, and only
+        # the needed region of the padded tensor is returned.  The padded
+        # tensor is allocated once and the ghosts are received directly into
+        # it.
+        self.needed_slices = needed_slices
+
+    def _exchange_shape(self, x_local_shape):
+
+        # The exchange is performed on the padded tensor.
+        return tuple(int(n + lpad + rpad) for n, (lpad, rpad) in zip(x_local_shape, self.halo_shape))
+
+    def start_exchange(self, input):
+
+        # This is not called through __call__, so the setup hook has to be
+        # run explicitly to make sure the buffers exist for this input.
+        self._distdl_forward_pre_hook(self, (input,))
+
+        if not self.P_x.active:
+            return
+
+        halo_exchange = self._distdl_backend.autograd.halo_exchange
+
+        # The padded tensor is created here, outside of the autograd graph,
+        # and is handed to the autograd function when the exchange finishes.
+        padded = pad_tensor(input.detach(), self.halo_shape, 0)
+        pending = halo_exchange.start_halo_exchange(padded,
+                                                    self.P_x,
+                                                    self.slices,
+                                                    self.buffers,
+                                                    self.neighbor_ranks,
+                                                    self.requests,
+                                                    self.datatypes,
+                                                    self._exchange_method)
+        self._pending = (padded, pending)
+
+    def forward(self, input):
+
+        Function = self._distdl_backend.autograd.halo_exchange.HaloPadExchangeFunction
+
+        if not self.P_x.active:
+            return input.clone()
+
+        # Any exchange posted by start_exchange is completed by this call.
+        pending = self._pending
+        self._pending = None
+
         return Function.apply(input,
                               self.P_x,
+                              self.halo_shape,
+                              self.needed_slices,
                               self.slices,
                               self.buffers,
-                              self.neighbor_ranks)
+                              self.neighbor_ranks,
+                              self.requests,
+                              self.datatypes,
+                              pending,
+                              self._exchange_method)
@@ -1,3 +1,4 @@
 from .conv_mixin import ConvMixin  # noqa: F401
 from .halo_mixin import HaloMixin  # noqa: F401
+from .halo_overlap_mixin import HaloOverlapMixin  # noqa: F401
 from .pooling_mixin import PoolingMixin  # noqa: F401
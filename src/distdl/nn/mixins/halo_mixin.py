@@ -1,8 +1,16 @@
+from collections import OrderedDict
+
 import numpy as np
 
 from distdl.utilities.slicing import compute_start_index
 from distdl.utilities.slicing import compute_subshape
 
+# Process-wide, least-recently-used cache of the halo tables computed by
+# HaloMixin._compute_halo_tables.  Layers with the same hyperparameters, and
+# repeated setups of the same layer, share one entry.
+_HALO_TABLE_CACHE_SIZE = 128
+_halo_table_cache = OrderedDict()
+
 
 class HaloMixin:
 
@@ -14,13 +22,21 @@ class HaloMixin:
                                dilation,
                                partition_active,
                                partition_shape,
-                               partition_index):
+                               partition_index,
+                               periodic=None):
 
         if not partition_active:
             return None, None, None, None
 
         dim = len(partition_shape)
 
+        # In periodic dimensions, the global tensor wraps around, so the halos
+        # are not clamped to the global boundary and the first and last
+        # workers are neighbors.
+        if periodic is None:
+            periodic = np.zeros(dim, dtype=bool)
+        periodic = np.asarray(periodic, dtype=bool)
+
         x_global_shape = np.atleast_1d(x_global_shape)
         kernel_size = np.atleast_1d(kernel_size)
         stride = np.atleast_1d(stride)
@@ -47,54 +63,40 @@ class HaloMixin:
                           mode='constant',
                           constant_values=1)
 
-        halo_shape = self._compute_halo_shape(partition_shape,
-                                              partition_index,
-                                              x_global_shape,
-                                              kernel_size,
-                                              stride,
-                                              padding,
-                                              dilation)
+        halos, halos_with_negatives = self._compute_halo_tables(partition_shape,
+                                                                x_global_shape,
+                                                                kernel_size,
+                                                                stride,
+                                                                padding,
+                                                                dilation,
+                                                                periodic)
+
+        partition_shape = np.asarray(partition_shape)
+        partition_index = np.asarray(partition_index)
+        dims = np.arange(dim)
+        n = halos.shape[0]
+
+        halo_shape = halos[partition_index, dims]
 
         recv_buffer_shape = halo_shape.copy()
 
         send_buffer_shape = np.zeros_like(halo_shape)
 
-        for i in range(dim):
-            lindex = [x - 1 if j == i else x for j, x in enumerate(partition_index)]
-            nhalo = self._compute_halo_shape(partition_shape,
-                                             lindex,
-                                             x_global_shape,
-                                             kernel_size,
-                                             stride,
-                                             padding,
-                                             dilation)
-            # If I have a left neighbor, my left send buffer size is my left
-            # neighbor's right halo size
-            if(lindex[i] > -1):
-                send_buffer_shape[i, 0] = nhalo[i, 1]
-
-            rindex = [x + 1 if j == i else x for j, x in enumerate(partition_index)]
-            nhalo = self._compute_halo_shape(partition_shape,
-                                             rindex,
-                                             x_global_shape,
-                                             kernel_size,
-                                             stride,
-                                             padding,
-                                             dilation)
-            # If I have a right neighbor, my right send buffer size is my right
-            # neighbor's left halo size
-            if(rindex[i] < partition_shape[i]):
-                send_buffer_shape[i, 1] = nhalo[i, 0]
+        # If I have a left neighbor, my left send buffer size is my left
+        # neighbor's right halo size.  If I have a right neighbor, my right
+        # send buffer size is my right neighbor's left halo size.
+        lindex = partition_index - 1
+        rindex = partition_index + 1
+        lindex = np.where(periodic, lindex % partition_shape, lindex)
+        rindex = np.where(periodic, rindex % partition_shape, rindex)
+
+        has_left = lindex > -1
+        has_right = rindex < partition_shape
+        send_buffer_shape[:, 0] = np.where(has_left, halos[np.clip(lindex, 0, n-1), dims, 1], 0)
+        send_buffer_shape[:, 1] = np.where(has_right, halos[np.clip(rindex, 0, n-1), dims, 0], 0)
 
         x_local_shape = compute_subshape(partition_shape, partition_index, x_global_shape)
-        halo_shape_with_negatives = self._compute_halo_shape(partition_shape,
-                                                             partition_index,
-                                                             x_global_shape,
-                                                             kernel_size,
-                                                             stride,
-                                                             padding,
-                                                             dilation,
-                                                             require_nonnegative=False)
+        halo_shape_with_negatives = halos_with_negatives[partition_index, dims]
         needed_ranges = self._compute_needed_ranges(x_local_shape, halo_shape_with_negatives)
 
         halo_shape = halo_shape.astype(int)
@@ -102,6 +104,60 @@ class HaloMixin:
 
         return halo_shape, recv_buffer_shape, send_buffer_shape, needed_ranges
 
+    def _compute_halo_tables(self,
+                             partition_shape,
+                             x_global_shape,
+                             kernel_size,
+                             stride,
+                             padding,
+                             dilation,
+                             periodic):
+
+        # The halo in a dimension depends only on the worker's index in that
+        # dimension, so the halos of every worker are given by those of the
+        # workers at index k in every dimension, for all k.  Row k of each
+        # table holds these, and the rows past the end of a dimension are
+        # never read.  The tables depend only on the hyperparameters and the
+        # input range of the layer type, so they are shared by all layers.
+        key = (type(self)._compute_min_input_range,
+               type(self)._compute_max_input_range,
+               tuple(np.asarray(partition_shape).tolist()),
+               tuple(np.asarray(x_global_shape).tolist()),
+               tuple(kernel_size.tolist()),
+               tuple(stride.tolist()),
+               tuple(padding.tolist()),
+               tuple(dilation.tolist()),
+               tuple(periodic.tolist()))
+
+        if key in _halo_table_cache:
+            _halo_table_cache.move_to_end(key)
+            return _halo_table_cache[key]
+
+        dim = len(partition_shape)
+        n = int(np.max(partition_shape))
+        indices = np.repeat(np.arange(n)[:, None], dim, axis=1)
+
+        tables = []
+        for require_nonnegative in [True, False]:
+            table = self._compute_halo_shape(partition_shape,
+                                             indices,
+                                             x_global_shape,
+                                             kernel_size,
+                                             stride,
+                                             padding,
+                                             dilation,
+                                             require_nonnegative=require_nonnegative,
+                                             periodic=periodic)
+            # Cached tables are shared, so they must not be modified.
+            table.setflags(write=False)
+            tables.append(table)
+
+        _halo_table_cache[key] = tuple(tables)
+        if len(_halo_table_cache) > _HALO_TABLE_CACHE_SIZE:
+            _halo_table_cache.popitem(last=False)
+
+        return _halo_table_cache[key]
+
     def _compute_needed_ranges(self, tensor_shape, halo_shape):
 
         ranges = np.zeros_like(halo_shape)
@@ -131,10 +187,14 @@ class HaloMixin:
                             stride,
                             padding,
                             dilation,
-                            require_nonnegative=True):
+                            require_nonnegative=True,
+                            periodic=None):
 
         x_global_shape = np.asarray(x_global_shape)
 
+        if periodic is None:
+            periodic = np.zeros(len(x_global_shape), dtype=bool)
+
         x_local_shape = compute_subshape(shape, index, x_global_shape)
         x_local_start_index = compute_start_index(shape, index, x_global_shape)
 
@@ -151,9 +211,11 @@ class HaloMixin:
                                                                          stride,
                                                                          padding,
                                                                          dilation)
-        # Clamp to the boundary
-        x_local_left_global_index_needed = np.maximum(np.zeros_like(x_global_shape),
-                                                      x_local_left_global_index_needed)
+        # Clamp to the boundary, except where it wraps around
+        x_local_left_global_index_needed = np.where(periodic,
+                                                    x_local_left_global_index_needed,
+                                                    np.maximum(np.zeros_like(x_global_shape),
+                                                               x_local_left_global_index_needed))
 
         y_local_right_global_index = y_local_start_index + y_local_shape - 1
         x_local_right_global_index_needed = self._compute_max_input_range(y_local_right_global_index,
@@ -161,9 +223,11 @@ class HaloMixin:
                                                                           stride,
                                                                           padding,
                                                                           dilation)
-        # Clamp to the boundary
-        x_local_right_global_index_needed = np.minimum(x_global_shape - 1,
-                                                       x_local_right_global_index_needed)
+        # Clamp to the boundary, except where it wraps around
+        x_local_right_global_index_needed = np.where(periodic,
+                                                     x_local_right_global_index_needed,
+                                                     np.minimum(x_global_shape - 1,
+                                                                x_local_right_global_index_needed))
 
         # Compute the actual ghost values
         x_local_left_halo_shape = x_local_start_index - x_local_left_global_index_needed
@@ -175,4 +239,4 @@ class HaloMixin:
             x_local_left_halo_shape = np.maximum(x_local_left_halo_shape, 0)
             x_local_right_halo_shape = np.maximum(x_local_right_halo_shape, 0)
 
-        return np.hstack([x_local_left_halo_shape, x_local_right_halo_shape]).reshape(2, -1).T
+        return np.stack([x_local_left_halo_shape, x_local_right_halo_shape], axis=-1)
@@ -0,0 +1,158 @@
+import numpy as np
+import torch
+
+from distdl.utilities.slicing import assemble_slices
+
+
+class HaloOverlapMixin:
+
+    def _compute_overlap_info(self,
+                              x_local_shape,
+                              halo_shape,
+                              needed_ranges,
+                              unpad_shape,
+                              kernel_size,
+                              stride,
+                              padding,
+                              dilation):
+
+        # Only the trailing, spatial, dimensions are split.  The batch and
+        # channel dimensions are always taken whole.
+        x_local_shape = np.asarray(x_local_shape)
+        dim = len(x_local_shape)
+        spatial_dim = dim - 2
+
+        def expand(array):
+            return np.broadcast_to(np.atleast_1d(array), (spatial_dim,)).astype(int)
+
+        kernel_size = expand(kernel_size)
+        stride = expand(stride)
+        padding = expand(padding)
+        dilation = expand(dilation)
+
+        # Extent of the kernel, less one, along each dimension
+        span = dilation*(kernel_size - 1)
+
+        output_ranges = np.zeros((spatial_dim, 2), dtype=int)
+        interior_ranges = np.zeros((spatial_dim, 2), dtype=int)
+        needed_shape = np.zeros(spatial_dim, dtype=int)
+        interior_start = np.zeros(spatial_dim, dtype=int)
+        interior_stop = np.zeros(spatial_dim, dtype=int)
+
+        for i in range(spatial_dim):
+            j = i + 2
+
+            # The needed tensor, which the torch layer is applied to, is
+            # offset from the local input tensor by the left halo and the
+            # start of the needed range.  The part of it that comes from the
+            # local input needs no ghost data.
+            offset = halo_shape[j, 0] - needed_ranges[j, 0]
+            length = needed_ranges[j, 1] - needed_ranges[j, 0]
+            bulk_start = max(offset, 0)
+            bulk_stop = min(length, offset + x_local_shape[j])
+
+            s, p = stride[i], padding[i]
+
+            # The output of the torch layer on the needed tensor, less
+            # anything the unpad layer would remove.
+            n_out = (length + 2*p - span[i] - 1) // s + 1
+            output_ranges[i, 0] = unpad_shape[j, 0]
+            output_ranges[i, 1] = n_out - unpad_shape[j, 1]
+
+            # Output o reads needed entries o*s - p through o*s - p + span,
+            # so the interior is where that window is inside the bulk.
+            o_start = -(-(bulk_start + p) // s)
+            o_stop = (bulk_stop - 1 + p - span[i]) // s + 1
+
+            o_start = np.clip(o_start, *output_ranges[i])
+            o_stop = np.clip(o_stop, o_start, output_ranges[i, 1])
+
+            # If there is no interior in any dimension, there is nothing to
+            # overlap the exchange with.
+            if o_stop <= o_start:
+                return None
+
+            interior_ranges[i] = [o_start, o_stop]
+            needed_shape[i] = length
+
+            # The interior input, relative to the local input tensor
+            interior_start[i] = o_start*s - p - offset
+            interior_stop[i] = (o_stop - 1)*s - p + span[i] + 1 - offset
+
+        interior_slices = [slice(None), slice(None)]
+        interior_slices += assemble_slices(interior_start, interior_stop)
+
+        return (output_ranges, interior_ranges, interior_slices,
+                needed_shape, stride, padding, span)
+
+    def _compute_overlap_region(self, input_needed, op, pad_value, output_ranges):
+
+        _, _, _, needed_shape, stride, padding, span = self._overlap_info
+
+        # Find the needed input for the requested outputs.  Anything outside
+        # of the needed tensor is padding that the torch layer would have
+        # applied itself, so it is added explicitly and op must not pad.
+        slices = [slice(None), slice(None)]
+        pad_width = []
+        for i, (start, stop) in enumerate(output_ranges):
+            x_start = start*stride[i] - padding[i]
+            x_stop = (stop - 1)*stride[i] - padding[i] + span[i] + 1
+
+            clipped_start = max(x_start, 0)
+            clipped_stop = min(x_stop, needed_shape[i])
+            slices.append(slice(clipped_start, clipped_stop, None))
+
+            # torch.nn.functional.pad takes the last dimension first
+            pad_width = [clipped_start - x_start, x_stop - clipped_stop] + pad_width
+
+        x = input_needed[tuple(slices)]
+        if any(pad_width):
+            x = torch.nn.functional.pad(x, pad_width, mode='constant', value=pad_value)
+
+        return op(x)
+
+    def _overlapped_forward(self, input, op, pad_value=0):
+
+        output_ranges, interior_ranges, interior_slices, _, _, _, _ = self._overlap_info
+
+        spatial_dim = len(interior_ranges)
+
+        # The interior only depends on the local input, which the halo
+        # exchange never touches, so it can be computed while the halo is in
+        # flight.
+        self.halo_layer.start_exchange(input)
+        output = op(input[tuple(interior_slices)])
+        input_needed = self.halo_layer.finish_exchange(input)
+
+        # The boundary strips are computed and stitched on, from the innermost
+        # dimension out.  Strips along dimension i cover the interior in the
+        # dimensions before i and the full output in the dimensions after it.
+        has_boundary = False
+        for i in reversed(range(spatial_dim)):
+            ranges = np.concatenate((interior_ranges[:i],
+                                     [[0, 0]],
+                                     output_ranges[i+1:]))
+
+            pieces = []
+
+            ranges[i] = [output_ranges[i, 0], interior_ranges[i, 0]]
+            if ranges[i, 1] > ranges[i, 0]:
+                pieces.append(self._compute_overlap_region(input_needed, op, pad_value, ranges))
+                has_boundary = True
+
+            pieces.append(output)
+
+            ranges[i] = [interior_ranges[i, 1], output_ranges[i, 1]]
+            if ranges[i, 1] > ranges[i, 0]:
+                pieces.append(self._compute_overlap_region(input_needed, op, pad_value, ranges))
+                has_boundary = True
+
+            output = torch.cat(pieces, dim=i+2)
+
+        # Even if no boundary strip reads the ghosts, neighbors read this
+        # worker's bulk, so the adjoint of the exchange must still run.  An
+        # empty sum keeps the exchange in the graph at no cost.
+        if not has_boundary:
+            output = output + input_needed[..., :0].sum()
+
+        return output
@@ -19,6 +19,12 @@ class Module(torch.nn.Module):
 
         if self._distdl_module_requires_reset(input):
 
+            # If only the batch size changed, layers that support it can adjust
+            # their state locally, without any communication.
+            if self._distdl_is_setup and self._distdl_input_batch_changed(input):
+                self._distdl_module_batch_resize(input)
+                return
+
             if self._distdl_is_setup:
                 self._distdl_module_teardown(input)
 
@@ -35,5 +41,11 @@ class Module(torch.nn.Module):
     def _distdl_input_changed(self, input):
         pass
 
+    def _distdl_input_batch_changed(self, input):
+        return False
+
+    def _distdl_module_batch_resize(self, input):
+        pass
+
     def _distdl_module_requires_reset(self, input):
         return not self._distdl_is_setup or self._distdl_input_changed(input)
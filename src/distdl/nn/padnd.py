@@ -1,6 +1,7 @@
-import numpy as np
 import torch
 
+from distdl.utilities.torch import pad_tensor
+
 
 class PadNdFunction(torch.autograd.Function):
 
@@ -9,11 +10,10 @@ class PadNdFunction(torch.autograd.Function):
 
         ctx.pad_width = pad_width
 
-        input_numpy = input.detach().numpy()
-
-        result = np.pad(input_numpy, pad_width, mode='constant', constant_values=value)
+        # The padded tensor is allocated once and only its faces are filled.
+        result = pad_tensor(input, pad_width, value)
 
-        return torch.tensor(result, requires_grad=input.requires_grad)
+        return result.requires_grad_(input.requires_grad)
 
     @staticmethod
     def backward(ctx, grad_output):
@@ -26,11 +26,8 @@ class PadNdFunction(torch.autograd.Function):
             stop = -rpad if rpad > 0 else None
             slices.append(slice(start, stop, 1))
 
-        grad_output_numpy = grad_output.detach().numpy()
-
-        result = grad_output_numpy[tuple(slices)]
-
-        return torch.tensor(result, requires_grad=grad_output.requires_grad).float(), None, None, None
+        # The adjoint only selects the interior, so no copy is needed.
+        return grad_output[tuple(slices)], None, None, None
 
 
 class PadNd(torch.nn.Module):
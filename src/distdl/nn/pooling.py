@@ -1,43 +1,54 @@
+import numpy as np
 import torch
 
-from distdl.nn.halo_exchange import HaloExchange
+from distdl.nn.halo_exchange import HaloPadExchange
 from distdl.nn.mixins.halo_mixin import HaloMixin
+from distdl.nn.mixins.halo_overlap_mixin import HaloOverlapMixin
 from distdl.nn.mixins.pooling_mixin import PoolingMixin
 from distdl.nn.module import Module
-from distdl.nn.padnd import PadNd
 from distdl.utilities.slicing import assemble_slices
 
 
-class DistributedPoolBase(Module, HaloMixin, PoolingMixin):
+class DistributedPoolBase(Module, HaloMixin, HaloOverlapMixin, PoolingMixin):
 
     TorchPoolType = None  # noqa F821
 
-    def __init__(self, P_x, *args, **kwargs):
+    def __init__(self, P_x, *args, overlap_halo_exchange=False, **kwargs):
 
         super(DistributedPoolBase, self).__init__()
 
         self.P_x = P_x
 
+        # If requested, the pooling of the interior of the local input is
+        # computed while the halo exchange is in flight.
+        self.overlap_halo_exchange = overlap_halo_exchange
+
         if not self.P_x.active:
             return
 
         self.pool_layer = self.TorchPoolType(*args, **kwargs)
 
-        # We need the halo shape, and other info, to fully populate the pad,
-        # and halo exchange layers.
+        # For the halo layer we defer construction, so that we can have the
+        # halo shape for the input.  The halo layer pads the input, exchanges
+        # the halo, and removes the data that is not needed by the pooling
+        # layer.  It will allocate its own buffers, but it needs this
+        # information at construction to be able to do this in the
+        # pre-forward hook.
 
-        self.pad_layer = None
+        self.halo_layer = None
 
-        # We need to be able to remove some data from the input to the conv
-        # layer.
-        self.needed_slices = None
+        # Interior and boundary regions, if the exchange is overlapped
+        self._overlap_info = None
 
-        # For the halo layer we also defer construction, so that we can have
-        # the halo shape for the input.  The halo will allocate its own
-        # buffers, but it needs this information at construction to be able
-        # to do this in the pre-forward hook.
-
-        self.halo_layer = None
+        # The overlapped regions are pooled without padding, and each region
+        # must produce exactly its own outputs.
+        if self.overlap_halo_exchange:
+            if np.any(np.asarray(self.pool_layer.padding) != 0):
+                raise ValueError("Overlapped halo exchange requires zero padding.")
+            if self.pool_layer.ceil_mode:
+                raise ValueError("Overlapped halo exchange does not support ceil_mode.")
+            if getattr(self.pool_layer, "return_indices", False):
+                raise ValueError("Overlapped halo exchange does not support return_indices.")
 
         # Variables for tracking input changes and buffer construction
         self._distdl_is_setup = False
@@ -70,25 +81,35 @@ class DistributedPoolBase(Module, HaloMixin, PoolingMixin):
         send_buffer_shape = exchange_info[2]
         needed_ranges = exchange_info[3]
 
-        # Now we have enough information to instantiate the padding shim
-        self.pad_layer = PadNd(halo_shape, value=0)
-
-        # We can also set up part of the halo layer.
-        self.halo_layer = HaloExchange(self.P_x,
-                                       halo_shape,
-                                       recv_buffer_shape,
-                                       send_buffer_shape)
-
         # We have to select out the "unused" entries.
-        self.needed_slices = assemble_slices(needed_ranges[:, 0],
-                                             needed_ranges[:, 1])
+        needed_slices = assemble_slices(needed_ranges[:, 0],
+                                        needed_ranges[:, 1])
+
+        # Now we have enough information to set up part of the halo layer,
+        # which also pads the input and selects the needed entries.
+        self.halo_layer = HaloPadExchange(self.P_x,
+                                          halo_shape,
+                                          recv_buffer_shape,
+                                          send_buffer_shape,
+                                          needed_slices)
+
+        if self.overlap_halo_exchange:
+            # Pooling layers are not unpadded.
+            unpad_shape = np.zeros_like(halo_shape)
+            self._overlap_info = self._compute_overlap_info(input[0].shape,
+                                                            halo_shape,
+                                                            needed_ranges,
+                                                            unpad_shape,
+                                                            self.pool_layer.kernel_size,
+                                                            self.pool_layer.stride,
+                                                            self.pool_layer.padding,
+                                                            getattr(self.pool_layer, "dilation", 1))
 
     def _distdl_module_teardown(self, input):
 
         # Reset all sub_layers
-        self.pad_layer = None
-        self.needed_slices = None
         self.halo_layer = None
+        self._overlap_info = None
 
         self.x_global_shape = None
 
@@ -107,14 +128,40 @@ class DistributedPoolBase(Module, HaloMixin, PoolingMixin):
 
         return False
 
+    def _distdl_input_batch_changed(self, input):
+
+        # If the batch dimension is partitioned, the global batch size has to
+        # be recomputed, which requires communication.
+        if self.P_x.active and self.P_x.shape[0] != 1:
+            return False
+
+        if input[0].requires_grad != self._input_requires_grad:
+            return False
+
+        return input[0].shape[1:] == self._input_shape[1:]
+
+    def _distdl_module_batch_resize(self, input):
+
+        self._input_shape = input[0].shape
+
+        if not self.P_x.active:
+            return
+
+        # There is no halo in the batch dimension, so only the needed range
+        # in that dimension depends on the batch size.  The halo layer resizes
+        # its own buffers when it sees the new input.
+        self.x_global_shape[0] = input[0].shape[0]
+        self.halo_layer.needed_slices[0] = slice(0, input[0].shape[0], None)
+
     def forward(self, input):
 
         if not self.P_x.active:
             return input.clone()
 
-        input_padded = self.pad_layer(input)
-        input_exchanged = self.halo_layer(input_padded)
-        input_needed = input_exchanged[self.needed_slices]
+        if self._overlap_info is not None:
+            return self._overlapped_forward(input, self.pool_layer)
+
+        input_needed = self.halo_layer(input)
         return self.pool_layer(input_needed)
 
 
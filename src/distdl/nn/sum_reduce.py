@@ -19,9 +19,6 @@ class SumReduce(Module):
 
         self.preserve_batch = preserve_batch
 
-        # TODO: #25  Make selection of dtype more sensible.
-        self.dtype = np.float32
-
         self.identity = False
 
         # Blank partitions
@@ -36,6 +33,7 @@ class SumReduce(Module):
         self._distdl_is_setup = False
         self._input_shape = None
         self._input_requires_grad = None
+        self._input_dtype = None
 
         # The identity case is if the partitions are of size 1,
         # or they are the same partition and neither is tranposed,
@@ -62,7 +60,8 @@ class SumReduce(Module):
 
             self.input_tensor_structure = (input[0].requires_grad,
                                            len(input[0].shape),
-                                           np.array(input[0].shape, dtype=np.int))
+                                           np.array(input[0].shape, dtype=np.int),
+                                           input[0].dtype)
             self.output_tensor_structure = self._distdl_backend.compute_output_tensor_structure(input[0],
                                                                                                 self.P_send,
                                                                                                 self.P_recv)
@@ -70,6 +69,7 @@ class SumReduce(Module):
         self._distdl_is_setup = True
         self._input_shape = input[0].shape
         self._input_requires_grad = input[0].requires_grad
+        self._input_dtype = input[0].dtype
 
     def _distdl_module_teardown(self, input):
 
@@ -85,6 +85,7 @@ class SumReduce(Module):
         self._distdl_is_setup = False
         self._input_shape = None
         self._input_requires_grad = None
+        self._input_dtype = None
 
     def _distdl_input_changed(self, input):
 
@@ -94,6 +95,9 @@ class SumReduce(Module):
         if input[0].shape != self._input_shape:
             return True
 
+        if input[0].dtype != self._input_dtype:
+            return True
+
         return False
 
     def forward(self, input):
@@ -111,5 +115,4 @@ class SumReduce(Module):
                               self.P_recv,
                               self.preserve_batch,
                               self.input_tensor_structure,
-                              self.output_tensor_structure,
-                              self.dtype)
+                              self.output_tensor_structure)
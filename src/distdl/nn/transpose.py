@@ -1,14 +1,21 @@
 import numpy as np
 
 from distdl.nn.module import Module
+from distdl.utilities.dtype import torch_to_numpy_dtype
+from distdl.utilities.slicing import assemble_slices
+from distdl.utilities.slicing import compute_nd_slice_chunks
+from distdl.utilities.slicing import compute_nd_slice_is_contiguous
 from distdl.utilities.slicing import compute_nd_slice_volume
-from distdl.utilities.slicing import compute_partition_intersection
-from distdl.utilities.slicing import range_index
+from distdl.utilities.slicing import compute_partition_intersections
+from distdl.utilities.slicing import compute_subshape
 
 
 class DistributedTranspose(Module):
 
-    def __init__(self, P_x, P_y, preserve_batch=True):
+    def __init__(self, P_x, P_y, preserve_batch=True,
+                 chunk_size=None, chunks_in_flight=2,
+                 use_alltoallv=False,
+                 reuse_output=False):
         super(DistributedTranspose, self).__init__()
 
         self.x_global_shape = None
@@ -18,16 +25,52 @@ class DistributedTranspose(Module):
 
         self.preserve_batch = preserve_batch
 
+        # If requested, each intersection is moved as slabs of at most
+        # chunk_size entries, with at most chunks_in_flight slabs being sent,
+        # and received, at a time.  This bounds the buffer memory, rather than
+        # buffering the full volume of the local tensors.
+        self.chunk_size = chunk_size
+        self.chunks_in_flight = chunks_in_flight
+
+        if self.chunk_size is not None and self.chunk_size < 1:
+            raise ValueError("Chunk size must be positive.")
+
+        if self.chunks_in_flight < 1:
+            raise ValueError("At least one chunk must be in flight.")
+
+        # If requested, the data is moved by a single Alltoallv over the
+        # union partition, with the counts and displacements computed once at
+        # setup, rather than by point-to-point messages.
+        self.use_alltoallv = use_alltoallv
+
+        if self.use_alltoallv and self.chunk_size is not None:
+            raise ValueError("Alltoallv cannot be used with chunking.")
+
+        # If requested, the output is written into the same storage on every
+        # call.  The output of one call is then only valid until the next, so
+        # the layer must not be called again before the backward pass of the
+        # previous call.
+        self.reuse_output = reuse_output
+        self._output_workspace = [None]
+
         self.in_data = []
         self.out_data = []
 
+        self.in_chunks = []
+        self.out_chunks = []
+
+        self.alltoallv_counts = None
+
+        # Whether the intersections cover the whole local input and output,
+        # and which of them are contiguous in it
+        self.in_covered = False
+        self.out_covered = False
+        self.in_contiguous = []
+        self.out_contiguous = []
+
         self.in_buffers = None
         self.out_buffers = None
 
-        # TODO(#25): The dtype should not be fixed, but correcting this is
-        #            a thing that needs to be resolved globally.
-        self.dtype = np.float32
-
         self.identity = False
 
         # Variables for tracking input changes and buffer construction
@@ -109,43 +152,57 @@ class DistributedTranspose(Module):
         # We only need to move data to the output partition if we actually
         # have input data.  It is possible to have both input and output data,
         # either input or output data, or neither.  Hence the active guard.
+        # Partners with an empty intersection are skipped entirely.
         if self.P_x.active:
             P_in_index = self.P_x.index
 
-            # Compute our overlaps for each output subpartition.
-            for rank, P_out_index in enumerate(range_index(P_out_shape)):
-                sl = compute_partition_intersection(P_in_shape, P_in_index,
-                                                    P_out_shape, P_out_index,
-                                                    x_global_shape)
-                if sl is not None:
-                    sz = compute_nd_slice_volume(sl)
-                    # Reverse the mapping to get the output partner's rank in
-                    # the common partition.
-                    partner = np.where(self.P_y_ranks == rank)[0][0]
-                    self.in_data.append((sl, sz, partner))
-                else:
-                    self.in_data.append((None, None, None))
+            # Compute our overlaps with all output subpartitions at once.
+            plan = compute_partition_intersections(P_in_shape, P_in_index,
+                                                   P_out_shape,
+                                                   x_global_shape)
+            # Map the output partners' ranks to their ranks in the common
+            # partition.
+            self.in_data = self._assemble_data(plan, self._union_ranks(self.P_y_ranks))
 
         # We only need to obtain data from the input partition if we actually
         # have output data.
         if self.P_y.active:
             P_out_index = self.P_y.index
 
-            # Compute our overlaps for each input subpartition.
-            for rank, P_in_index in enumerate(range_index(P_in_shape)):
-                sl = compute_partition_intersection(P_out_shape, P_out_index,
-                                                    P_in_shape, P_in_index,
-                                                    x_global_shape)
-                if sl is not None:
-                    sz = compute_nd_slice_volume(sl)
-                    # Reverse the mapping to get the input partner's rank in
-                    # the common partition.
-                    partner = np.where(self.P_x_ranks == rank)[0][0]
-                    self.out_data.append((sl, sz, partner))
-                else:
-                    self.out_data.append((None, None, None))
-
-        buffs = self._allocate_buffers(self.dtype)
+            # Compute our overlaps with all input subpartitions at once.
+            plan = compute_partition_intersections(P_out_shape, P_out_index,
+                                                   P_in_shape,
+                                                   x_global_shape)
+            # Map the input partners' ranks to their ranks in the common
+            # partition.
+            self.out_data = self._assemble_data(plan, self._union_ranks(self.P_x_ranks))
+
+        # The intersections are disjoint, so they cover the local tensor if
+        # their total volume is its volume.  Then, every entry of the output
+        # is overwritten by the exchange and it does not need to be zeroed.
+        if self.P_x.active:
+            x_local_shape = compute_subshape(self.P_x.shape, self.P_x.index, x_global_shape)
+            self.in_covered = sum(sz for sl, sz, partner in self.in_data) == np.prod(x_local_shape)
+            self.in_contiguous = [compute_nd_slice_is_contiguous(sl, x_local_shape)
+                                  for sl, sz, partner in self.in_data]
+
+        if self.P_y.active:
+            y_local_shape = compute_subshape(self.P_y.shape, self.P_y.index, x_global_shape)
+            self.out_covered = sum(sz for sl, sz, partner in self.out_data) == np.prod(y_local_shape)
+            self.out_contiguous = [compute_nd_slice_is_contiguous(sl, y_local_shape)
+                                   for sl, sz, partner in self.out_data]
+
+        if self.chunk_size is not None:
+            self.in_chunks = self._assemble_chunks(self.in_data)
+            self.out_chunks = self._assemble_chunks(self.out_data)
+
+        if self.use_alltoallv:
+            self.alltoallv_counts = (*self._assemble_counts(self.in_data),
+                                     *self._assemble_counts(self.out_data))
+
+        # Workers that only receive may not know the dtype yet, in which case
+        # the buffers are reallocated on the first call.
+        buffs = self._allocate_buffers(torch_to_numpy_dtype(input[0].dtype))
         self.in_buffers = buffs[0]
         self.out_buffers = buffs[1]
 
@@ -155,9 +212,21 @@ class DistributedTranspose(Module):
         self.in_data = []
         self.out_data = []
 
+        self.in_chunks = []
+        self.out_chunks = []
+
+        self.alltoallv_counts = None
+
+        self.in_covered = False
+        self.out_covered = False
+        self.in_contiguous = []
+        self.out_contiguous = []
+
         self.in_buffers = None
         self.out_buffers = None
 
+        self._output_workspace = [None]
+
         # Reset any info about the input
         self._distdl_is_setup = False
         self._input_shape = None
@@ -173,20 +242,90 @@ class DistributedTranspose(Module):
 
         return False
 
+    def _union_ranks(self, P_ranks):
+
+        # Invert the gathered ranks, so that the rank in the common partition
+        # of every worker in the partition can be looked up directly.
+        P_ranks = P_ranks[:, 0]
+        active = np.nonzero(P_ranks >= 0)[0]
+
+        union_ranks = -1*np.ones(P_ranks.max() + 1, dtype=np.int)
+        union_ranks[P_ranks[active]] = active
+
+        return union_ranks
+
+    def _assemble_data(self, plan, union_ranks):
+
+        ranks, starts, stops = plan
+
+        volumes = np.prod(stops - starts, axis=1)
+        partners = union_ranks[ranks]
+
+        return [(assemble_slices(start, stop), sz, partner)
+                for start, stop, sz, partner in zip(starts, stops, volumes, partners)]
+
+    def _assemble_chunks(self, data):
+
+        # Slabs are ordered by their index within their intersection, and
+        # then by partner, which both ends of every message agree on.
+        chunks = []
+        for sl, sz, partner in data:
+            for k, chunk in enumerate(compute_nd_slice_chunks(sl, self.chunk_size)):
+                chunks.append((k, partner, chunk, compute_nd_slice_volume(chunk)))
+
+        chunks.sort(key=lambda x: x[:2])
+
+        return [(chunk, sz, partner) for k, partner, chunk, sz in chunks]
+
+    def _assemble_counts(self, data):
+
+        # The data for each partner is packed contiguously, in rank order.
+        counts = np.zeros(self.P_union.size, dtype=np.int)
+        for sl, sz, partner in data:
+            counts[partner] = sz
+
+        displs = np.zeros_like(counts)
+        displs[1:] = np.cumsum(counts)[:-1]
+
+        return counts, displs
+
+    def _allocate_chunk_buffers(self, dtype):
+
+        # One slot per slab in flight, each large enough for any slab.
+        buffers = []
+        for chunks in [self.in_chunks, self.out_chunks]:
+            buffers_i = []
+            if len(chunks) > 0:
+                sz = max(sz for chunk, sz, partner in chunks)
+                buffers_i = [np.zeros(sz, dtype=dtype) for _ in range(self.chunks_in_flight)]
+            buffers.append(buffers_i)
+
+        return buffers
+
     def _allocate_buffers(self, dtype):
 
+        if self.chunk_size is not None:
+            return self._allocate_chunk_buffers(dtype)
+
+        # All of the data is packed into one buffer on each side.
+        if self.use_alltoallv:
+            in_counts, _, out_counts, _ = self.alltoallv_counts
+            return [np.zeros(in_counts.sum(), dtype=dtype)], [np.zeros(out_counts.sum(), dtype=dtype)]
+
+        # Intersections that are contiguous in the local tensor are sent from,
+        # or received into, the tensor directly, so they need no buffer.
         in_buffers = []
-        for sl, sz, r in self.in_data:
+        for (sl, sz, r), contiguous in zip(self.in_data, self.in_contiguous):
             buff = None
-            if sz is not None:
+            if not contiguous:
                 buff = np.zeros(sz, dtype=dtype)
 
             in_buffers.append(buff)
 
         out_buffers = []
-        for sl, sz, r in self.out_data:
+        for (sl, sz, r), contiguous in zip(self.out_data, self.out_contiguous):
             buff = None
-            if sz is not None:
+            if not contiguous:
                 buff = np.zeros(sz, dtype=dtype)
 
             out_buffers.append(buff)
@@ -203,14 +342,22 @@ class DistributedTranspose(Module):
         if not (self.P_x.active or self.P_y.active):
             return input.clone()
 
+        pipelined = self.chunk_size is not None
+        in_data = self.in_chunks if pipelined else self.in_data
+        out_data = self.out_chunks if pipelined else self.out_data
+
         return Function.apply(input,
                               self.P_union,
                               self.x_global_shape,
                               self.P_x,
-                              self.in_data,
+                              in_data,
                               self.in_buffers,
                               self.P_y,
-                              self.out_data,
+                              out_data,
                               self.out_buffers,
                               self.preserve_batch,
-                              self.dtype)
+                              pipelined,
+                              self.alltoallv_counts,
+                              self.in_covered,
+                              self.out_covered,
+                              self._output_workspace if self.reuse_output else None)
@@ -1,6 +1,18 @@
-import numpy as np
 import torch
 
+from distdl.nn.padnd import PadNdFunction
+
+
+def _unpad_slices(pad_width):
+
+    slices = []
+    for (lpad, rpad) in pad_width:
+        start = lpad
+        stop = -rpad if rpad > 0 else None
+        slices.append(slice(start, stop, 1))
+
+    return tuple(slices)
+
 
 class UnpadNdFunction(torch.autograd.Function):
 
@@ -10,17 +22,9 @@ class UnpadNdFunction(torch.autograd.Function):
         ctx.value = value
         ctx.pad_width = pad_width
 
-        slices = []
-        for (lpad, rpad) in pad_width:
-            start = lpad
-            stop = -rpad if rpad > 0 else None
-            slices.append(slice(start, stop, 1))
-
-        input_numpy = input.detach().numpy()
-
-        result = input_numpy[tuple(slices)]
-
-        return torch.tensor(result, requires_grad=input.requires_grad).float()
+        # Views of the input cannot be returned from a custom function if
+        # they may be modified in-place later, so this has to be a copy.
+        return input[_unpad_slices(pad_width)].clone()
 
     @staticmethod
     def backward(ctx, grad_output):
@@ -28,11 +32,7 @@ class UnpadNdFunction(torch.autograd.Function):
         value = ctx.value
         pad_width = ctx.pad_width
 
-        grad_output_numpy = grad_output.detach().numpy()
-
-        result = np.pad(grad_output_numpy, pad_width, mode='constant', constant_values=value)
-
-        return torch.tensor(result, requires_grad=grad_output.requires_grad).float(), None, None, None
+        return PadNdFunction.apply(grad_output, pad_width, value), None, None, None
 
 
 class UnpadNd(torch.nn.Module):
@@ -45,4 +45,10 @@ class UnpadNd(torch.nn.Module):
         self.value = value
 
     def forward(self, input):
+
+        # With a zero value, the adjoint of unpadding is exactly the adjoint of
+        # slicing, so torch can return a view of the input.
+        if self.value == 0:
+            return input[_unpad_slices(self.pad_width)]
+
         return UnpadNdFunction.apply(input, self.pad_width, self.value)
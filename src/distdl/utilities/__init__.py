@@ -1,4 +1,5 @@
 from . import debug  # noqa: F401
+from . import dtype  # noqa: F401
 from . import index_tricks  # noqa: F401
 from . import misc  # noqa: F401
 from . import slicing  # noqa: F401
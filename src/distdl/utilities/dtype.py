@@ -0,0 +1,69 @@
+import torch
+
+# Neither MPI nor numpy reliably support the half-precision types, so they are
+# viewed as 16-bit integers.  This is only valid when data is moved, not when
+# it is reduced.
+_integer_views = {
+    torch.float16: torch.int16,
+    torch.bfloat16: torch.int16,
+}
+
+# Types that MPI cannot reduce are reduced in a wider type instead.
+_reduction_dtypes = {
+    torch.float16: torch.float32,
+    torch.bfloat16: torch.float32,
+}
+
+# Codes for sending a dtype as part of an integer message
+_dtype_codes = [
+    torch.float32,
+    torch.float64,
+    torch.float16,
+    torch.bfloat16,
+    torch.uint8,
+    torch.int8,
+    torch.int16,
+    torch.int32,
+    torch.int64,
+    torch.bool,
+]
+
+
+def torch_to_numpy_dtype(dtype):
+
+    dtype = _integer_views.get(dtype, dtype)
+
+    return torch.empty((0,), dtype=dtype).numpy().dtype
+
+
+def numpy_view(tensor):
+
+    tensor = tensor.detach()
+    if tensor.dtype in _integer_views:
+        tensor = tensor.view(_integer_views[tensor.dtype])
+
+    return tensor.numpy()
+
+
+def torch_view(array, dtype):
+
+    tensor = torch.from_numpy(array)
+    if dtype in _integer_views:
+        tensor = tensor.view(dtype)
+
+    return tensor
+
+
+def reduction_dtype(dtype):
+
+    return _reduction_dtypes.get(dtype, dtype)
+
+
+def dtype_to_code(dtype):
+
+    return _dtype_codes.index(dtype)
+
+
+def code_to_dtype(code):
+
+    return _dtype_codes[code]
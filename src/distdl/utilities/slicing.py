@@ -10,8 +10,9 @@ def compute_subshape(P_shape, index, shape):
     P_shape = np.atleast_1d(P_shape)
     index = np.atleast_1d(index)
     shape = np.atleast_1d(shape)
-    subshape = shape // P_shape
-    subshape[index < shape % P_shape] += 1
+    # The index may hold one index per row, so the remainder is added by
+    # broadcasting rather than by masked assignment.
+    subshape = shape // P_shape + (index < shape % P_shape)
 
     return subshape
 
@@ -90,11 +91,93 @@ def compute_partition_intersection(P_x_r_shape,
         return x_i_slices_rel_r
 
 
+def compute_partition_intersections(P_x_r_shape,
+                                    P_x_r_index,
+                                    P_x_s_shape,
+                                    x_shape):
+
+    # Extract the first subtensor description
+    x_r_start_index = compute_start_index(P_x_r_shape, P_x_r_index, x_shape)
+    x_r_stop_index = compute_stop_index(P_x_r_shape, P_x_r_index, x_shape)
+
+    P_x_s_shape = np.atleast_1d(P_x_s_shape)
+    x_shape = np.atleast_1d(x_shape)
+
+    # The subtensors of a partition are a tensor product of 1D
+    # decompositions, so the overlaps are found one dimension at a time.
+    # The stop index of each subtensor is the start index of the next.
+    indices = []
+    starts = []
+    stops = []
+    for P_d, x_d, r_start, r_stop in zip(P_x_s_shape, x_shape,
+                                         x_r_start_index, x_r_stop_index):
+        bounds = compute_start_index(P_d, np.arange(P_d + 1), x_d)
+        start = np.maximum(bounds[:-1], r_start)
+        stop = np.minimum(bounds[1:], r_stop)
+        overlaps = stop > start
+
+        # The slices for x_i are relative to coordinates of x_r
+        indices.append(np.arange(P_d)[overlaps])
+        starts.append(start[overlaps] - r_start)
+        stops.append(stop[overlaps] - r_start)
+
+    def product(arrays):
+        grids = np.meshgrid(*arrays, indexing="ij")
+        return np.stack([g.ravel() for g in grids], axis=-1).astype(INDEX_DTYPE)
+
+    # The non-empty overlaps are the tensor product of those in each
+    # dimension.  Workers are numbered in C-order, like their ranks.
+    ranks = np.ravel_multi_index(tuple(product(indices).T), P_x_s_shape)
+
+    return ranks, product(starts), product(stops)
+
+
 def compute_nd_slice_volume(slices):
 
     return np.prod([s.stop-s.start for s in slices])
 
 
+def compute_nd_slice_is_contiguous(slices, shape):
+
+    # A region of a C-ordered tensor is contiguous if it has unit extent in
+    # every dimension before its first non-trivial one, and spans the whole
+    # tensor in every dimension after it.
+    for i, s in enumerate(slices):
+        if s.stop - s.start > 1:
+            return all(t.start == 0 and t.stop == n for t, n in zip(slices[i+1:], shape[i+1:]))
+
+    return True
+
+
+def compute_nd_slice_chunks(slices, max_volume):
+
+    # Split the region into slabs of at most max_volume entries, along the
+    # slowest axes.  The slabs are contiguous in the trailing axes, which are
+    # taken whole if they fit, and are ordered as in C-order traversal.  The
+    # decomposition only depends on the shape of the region.
+    shape = [s.stop - s.start for s in slices]
+    dim = len(shape)
+
+    # The outermost axis where a slab of unit thickness fits
+    axis = 0
+    while axis < dim - 1 and np.prod(shape[axis+1:]) > max_volume:
+        axis += 1
+
+    inner_volume = max(int(np.prod(shape[axis+1:])), 1)
+    thickness = max(max_volume // inner_volume, 1)
+
+    chunks = []
+    for outer_index in range_index(shape[:axis]):
+        outer = [slice(s.start + i, s.start + i + 1, None) for s, i in zip(slices, outer_index)]
+        for start in range(0, shape[axis], thickness):
+            stop = min(start + thickness, shape[axis])
+            offset = slices[axis].start
+            chunk = outer + [slice(offset + start, offset + stop, None)] + list(slices[axis+1:])
+            chunks.append(chunk)
+
+    return chunks
+
+
 def range_index(shape):
 
     import itertools
@@ -10,9 +10,34 @@ class NoneTensor(torch.Tensor):
         self = torch.empty((0,))
 
 
-def zero_volume_tensor(b=None):
+def zero_volume_tensor(b=None, dtype=None):
 
     if b is None:
-        return torch.empty((0,))
+        return torch.empty((0,), dtype=dtype)
 
-    return torch.empty((b, 0))
+    return torch.empty((b, 0), dtype=dtype)
+
+
+def pad_tensor(input, pad_width, value=0):
+
+    padded_shape = []
+    slices = []
+    for n, (lpad, rpad) in zip(input.shape, pad_width):
+        padded_shape.append(int(n + lpad + rpad))
+        slices.append(slice(int(lpad), int(lpad + n), 1))
+
+    # The padded tensor is allocated once, the input is copied into its
+    # interior, and only the padded faces are filled.
+    result = torch.empty(padded_shape, dtype=input.dtype, device=input.device)
+    result[tuple(slices)] = input
+
+    for i, (lpad, rpad) in enumerate(pad_width):
+        face = [slice(None)] * len(padded_shape)
+        if lpad > 0:
+            face[i] = slice(0, int(lpad), 1)
+            result[tuple(face)] = value
+        if rpad > 0:
+            face[i] = slice(padded_shape[i] - int(rpad), padded_shape[i], 1)
+            result[tuple(face)] = value
+
+    return result
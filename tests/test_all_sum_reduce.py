@@ -0,0 +1,209 @@
+import numpy as np
+import pytest
+from adjoint_test import check_adjoint_test_tight
+
+parametrizations = []
+
+# Main functionality
+parametrizations.append(
+    pytest.param(
+        np.arange(0, 12), [2, 2, 3],  # P_x_ranks, P_x_shape
+        np.arange(4, 8), [2, 2, 1],  # P_y_ranks, P_y_shape
+        [1, 7, 5],  # x_global_shape
+        False,  # transpose_src
+        12,  # passed to comm_split_fixture, required MPI ranks
+        id="distributed-overlap-3D",
+        marks=[pytest.mark.mpi(min_size=12)]
+        )
+    )
+
+parametrizations.append(
+    pytest.param(
+        np.arange(4, 16), [2, 2, 3],  # P_x_ranks, P_x_shape
+        np.arange(0, 4), [2, 2, 1],  # P_y_ranks, P_y_shape
+        [1, 7, 5],  # x_global_shape
+        False,  # transpose_src
+        16,  # passed to comm_split_fixture, required MPI ranks
+        id="distributed-disjoint-3D",
+        marks=[pytest.mark.mpi(min_size=16)]
+        )
+    )
+
+# Sequential functionality
+parametrizations.append(
+    pytest.param(
+        np.arange(0, 1), [1],  # P_x_ranks, P_x_shape
+        np.arange(0, 1), [1],  # P_y_ranks, P_y_shape
+        [1, 7, 5],  # x_global_shape
+        False,  # transpose_src
+        1,  # passed to comm_split_fixture, required MPI ranks
+        id="sequential-identity",
+        marks=[pytest.mark.mpi(min_size=1)]
+        )
+    )
+
+# Main functionality, single source
+parametrizations.append(
+    pytest.param(
+        np.arange(0, 3), [1, 1, 3],  # P_x_ranks, P_x_shape
+        np.arange(2, 3), [1],  # P_y_ranks, P_y_shape
+        [1, 7, 5],  # x_global_shape
+        False,  # transpose_src
+        3,  # passed to comm_split_fixture, required MPI ranks
+        id="distributed-overlap-3D-single_source",
+        marks=[pytest.mark.mpi(min_size=3)]
+        )
+    )
+
+parametrizations.append(
+    pytest.param(
+        np.arange(0, 3), [1, 1, 3],  # P_x_ranks, P_x_shape
+        np.arange(3, 4), [1],  # P_y_ranks, P_y_shape
+        [1, 7, 5],  # x_global_shape
+        False,  # transpose_src
+        4,  # passed to comm_split_fixture, required MPI ranks
+        id="distributed-disjoint-3D-single_source",
+        marks=[pytest.mark.mpi(min_size=4)]
+        )
+    )
+
+# Main functionality, transposed
+parametrizations.append(
+    pytest.param(
+        np.arange(0, 12), [3, 2, 2],  # P_x_ranks, P_x_shape
+        np.arange(4, 8), [2, 2, 1],  # P_y_ranks, P_y_shape
+        [1, 7, 5],  # x_global_shape
+        True,  # transpose_src
+        12,  # passed to comm_split_fixture, required MPI ranks
+        id="distributed-overlap-3D-transposed",
+        marks=[pytest.mark.mpi(min_size=12)]
+        )
+    )
+
+
+# For example of indirect, see https://stackoverflow.com/a/28570677
+@pytest.mark.parametrize("P_x_ranks, P_x_shape,"
+                         "P_y_ranks, P_y_shape,"
+                         "x_global_shape,"
+                         "transpose_src,"
+                         "comm_split_fixture",
+                         parametrizations,
+                         indirect=["comm_split_fixture"])
+def test_all_sum_reduce_adjoint(barrier_fence_fixture,
+                                comm_split_fixture,
+                                P_x_ranks, P_x_shape,
+                                P_y_ranks, P_y_shape,
+                                x_global_shape,
+                                transpose_src):
+
+    import numpy as np
+    import torch
+
+    from distdl.backends.mpi.partition import MPIPartition
+    from distdl.nn.all_sum_reduce import AllSumReduce
+    from distdl.utilities.torch import zero_volume_tensor
+
+    # Isolate the minimum needed ranks
+    base_comm, active = comm_split_fixture
+    if not active:
+        return
+    P_world = MPIPartition(base_comm)
+
+    # Create the partitions
+    P_x_base = P_world.create_partition_inclusive(P_x_ranks)
+    P_x = P_x_base.create_cartesian_topology_partition(P_x_shape)
+
+    P_y_base = P_world.create_partition_inclusive(P_y_ranks)
+    P_y = P_y_base.create_cartesian_topology_partition(P_y_shape)
+
+    x_local_shape = np.asarray(x_global_shape)
+
+    layer = AllSumReduce(P_x, P_y, transpose_src=transpose_src, preserve_batch=False)
+
+    x = zero_volume_tensor()
+    if P_x.active:
+        x = torch.Tensor(np.random.randn(*x_local_shape))
+    x.requires_grad = True
+
+    dy = zero_volume_tensor()
+    if P_x.active:
+        # Adjoint Input
+        dy = torch.Tensor(np.random.randn(*x_local_shape))
+
+    # y = F @ x
+    y = layer(x)
+
+    # dx = F* @ dy
+    y.backward(dy)
+    dx = x.grad
+
+    x = x.detach()
+    dx = dx.detach()
+    dy = dy.detach()
+    y = y.detach()
+
+    check_adjoint_test_tight(P_world, x, dx, y, dy)
+
+
+@pytest.mark.parametrize("P_x_ranks, P_x_shape,"
+                         "P_y_ranks, P_y_shape,"
+                         "x_global_shape,"
+                         "transpose_src,"
+                         "comm_split_fixture",
+                         parametrizations,
+                         indirect=["comm_split_fixture"])
+def test_all_sum_reduce_matches_reduce_broadcast(barrier_fence_fixture,
+                                                 comm_split_fixture,
+                                                 P_x_ranks, P_x_shape,
+                                                 P_y_ranks, P_y_shape,
+                                                 x_global_shape,
+                                                 transpose_src):
+
+    import numpy as np
+    import torch
+
+    from distdl.backends.mpi.partition import MPIPartition
+    from distdl.nn.all_sum_reduce import AllSumReduce
+    from distdl.nn.broadcast import Broadcast
+    from distdl.nn.sum_reduce import SumReduce
+    from distdl.utilities.torch import zero_volume_tensor
+
+    # Isolate the minimum needed ranks
+    base_comm, active = comm_split_fixture
+    if not active:
+        return
+    P_world = MPIPartition(base_comm)
+
+    # Create the partitions
+    P_x_base = P_world.create_partition_inclusive(P_x_ranks)
+    P_x = P_x_base.create_cartesian_topology_partition(P_x_shape)
+
+    P_y_base = P_world.create_partition_inclusive(P_y_ranks)
+    P_y = P_y_base.create_cartesian_topology_partition(P_y_shape)
+
+    x_local_shape = np.asarray(x_global_shape)
+
+    layer = AllSumReduce(P_x, P_y, transpose_src=transpose_src, preserve_batch=False)
+    reduce_layer = SumReduce(P_x, P_y, transpose_src=transpose_src, preserve_batch=False)
+    broadcast_layer = Broadcast(P_y, P_x, transpose_dest=transpose_src, preserve_batch=False)
+
+    x = zero_volume_tensor()
+    dy = zero_volume_tensor()
+    if P_x.active:
+        x = torch.Tensor(np.random.randn(*x_local_shape))
+        dy = torch.Tensor(np.random.randn(*x_local_shape))
+
+    x_fused = x.clone().requires_grad_(True)
+    x_split = x.clone().requires_grad_(True)
+
+    y_fused = layer(x_fused)
+    y_fused.backward(dy)
+
+    y_split = broadcast_layer(reduce_layer(x_split))
+    y_split.backward(dy)
+
+    # The fused allreduce gives the same results as the reduction followed by
+    # the broadcast, in both the forward and the adjoint.
+    if P_x.active:
+        assert(torch.allclose(y_fused, y_split))
+        assert(torch.allclose(x_fused.grad, x_split.grad))
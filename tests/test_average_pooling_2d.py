@@ -41,10 +41,12 @@ adjoint_parametrizations.append(
                          "comm_split_fixture",
                          adjoint_parametrizations,
                          indirect=["comm_split_fixture"])
+@pytest.mark.parametrize("overlap_halo_exchange", [False, True])
 def test_average_pooling_adjoint_input(barrier_fence_fixture,
                                        comm_split_fixture,
                                        P_x_ranks, P_x_shape,
-                                       x_global_shape):
+                                       x_global_shape,
+                                       overlap_halo_exchange):
 
     import numpy as np
     import torch
@@ -68,7 +70,8 @@ def test_average_pooling_adjoint_input(barrier_fence_fixture,
 
     layer = DistributedAvgPool2d(P_x,
                                  kernel_size=[2, 2],
-                                 stride=[2, 2])
+                                 stride=[2, 2],
+                                 overlap_halo_exchange=overlap_halo_exchange)
 
     x = zero_volume_tensor(x_global_shape[0])
     if P_x.active:
@@ -257,3 +257,189 @@ def test_potentially_deadlocked_send_recv_pairs(barrier_fence_fixture,
     P_w = P_w_base.create_cartesian_topology_partition(P_w_shape)
 
     layer = Broadcast(P_x, P_w)  # noqa F841
+
+
+cache_parametrizations = []
+
+cache_parametrizations.append(
+    pytest.param(
+        np.arange(1, 3), [1, 2],  # P_x_ranks, P_x_shape
+        np.arange(0, 4), [2, 2],  # P_y_ranks, P_y_shape
+        4,  # passed to comm_split_fixture, required MPI ranks
+        id="cache-2D",
+        marks=[pytest.mark.mpi(min_size=4)]
+        )
+    )
+
+
+@pytest.mark.parametrize("P_x_ranks, P_x_shape,"
+                         "P_y_ranks, P_y_shape,"
+                         "comm_split_fixture",
+                         cache_parametrizations,
+                         indirect=["comm_split_fixture"])
+def test_broadcast_partition_cache(barrier_fence_fixture,
+                                   comm_split_fixture,
+                                   P_x_ranks, P_x_shape,
+                                   P_y_ranks, P_y_shape):
+
+    import numpy as np
+    import torch
+
+    from distdl.backends.mpi.partition import MPIPartition
+    from distdl.backends.mpi.partition import free_partition_cache
+    from distdl.nn.broadcast import Broadcast
+    from distdl.utilities.torch import zero_volume_tensor
+
+    # Isolate the minimum needed ranks
+    base_comm, active = comm_split_fixture
+    if not active:
+        return
+    P_world = MPIPartition(base_comm)
+
+    # Create the partitions
+    P_x_base = P_world.create_partition_inclusive(P_x_ranks)
+    P_x = P_x_base.create_cartesian_topology_partition(P_x_shape)
+
+    P_y_base = P_world.create_partition_inclusive(P_y_ranks)
+    P_y = P_y_base.create_cartesian_topology_partition(P_y_shape)
+
+    layer = Broadcast(P_x, P_y, preserve_batch=False)
+
+    # A change in the batch size rebuilds the tensor structure, but the
+    # partitions come from the cache.
+    P_send = None
+    P_recv = None
+    for batch_size in [1, 2, 3]:
+        # Every rank has to see the change to set up again
+        x = zero_volume_tensor(batch_size)
+        if P_x.active:
+            x = torch.Tensor(np.random.randn(batch_size, 7, 5))
+
+        layer(x)
+
+        if P_send is not None:
+            assert(layer.P_send is P_send)
+            assert(layer.P_recv is P_recv)
+        P_send = layer.P_send
+        P_recv = layer.P_recv
+
+    free_partition_cache(P_x)
+
+    P_send_new, P_recv_new = P_x.create_broadcast_partition_to(P_y)
+    assert(P_send_new is not P_send)
+    assert(P_recv_new is not P_recv)
+    assert(P_send_new.active == P_send.active)
+    assert(P_recv_new.active == P_recv.active)
+
+    free_partition_cache(P_x)
+
+
+@pytest.mark.mpi(min_size=4)
+@pytest.mark.parametrize("comm_split_fixture", [4], indirect=["comm_split_fixture"])
+@pytest.mark.parametrize("dtype", ["float64", "float16", "bfloat16"])
+def test_broadcast_dtype(barrier_fence_fixture,
+                         comm_split_fixture,
+                         dtype):
+
+    import numpy as np
+    import torch
+
+    from distdl.backends.mpi.partition import MPIPartition
+    from distdl.nn.broadcast import Broadcast
+    from distdl.utilities.torch import zero_volume_tensor
+
+    # Isolate the minimum needed ranks
+    base_comm, active = comm_split_fixture
+    if not active:
+        return
+    P_world = MPIPartition(base_comm)
+
+    P_x_base = P_world.create_partition_inclusive([1])
+    P_x = P_x_base.create_cartesian_topology_partition([1, 1])
+
+    P_y_base = P_world.create_partition_inclusive(np.arange(0, 4))
+    P_y = P_y_base.create_cartesian_topology_partition([2, 2])
+
+    dtype = getattr(torch, dtype)
+    x_global_shape = [3, 5]
+
+    layer = Broadcast(P_x, P_y, preserve_batch=False)
+
+    # Small integers are exact in every dtype.
+    x_values = torch.arange(np.prod(x_global_shape)).reshape(x_global_shape) % 7
+
+    x = zero_volume_tensor()
+    if P_x.active:
+        x = x_values.to(dtype)
+    x.requires_grad = True
+
+    y = layer(x)
+
+    assert(y.dtype == dtype)
+    assert(torch.equal(y, x_values.to(dtype)))
+
+    # The adjoint sums one copy from every worker.
+    y.backward(torch.ones_like(y))
+
+    if P_x.active:
+        assert(x.grad.dtype == dtype)
+        assert(torch.equal(x.grad, torch.full(x_global_shape, P_y.size, dtype=dtype)))
+
+
+@pytest.mark.mpi(min_size=4)
+@pytest.mark.parametrize("comm_split_fixture", [4], indirect=["comm_split_fixture"])
+def test_broadcast_cache_output(barrier_fence_fixture,
+                                comm_split_fixture):
+
+    import numpy as np
+    import torch
+
+    from distdl.backends.mpi.partition import MPIPartition
+    from distdl.nn.broadcast import Broadcast
+    from distdl.utilities.torch import zero_volume_tensor
+
+    # Isolate the minimum needed ranks
+    base_comm, active = comm_split_fixture
+    if not active:
+        return
+    P_world = MPIPartition(base_comm)
+
+    P_x_base = P_world.create_partition_inclusive([1])
+    P_x = P_x_base.create_cartesian_topology_partition([1, 1])
+
+    P_y_base = P_world.create_partition_inclusive(np.arange(0, 4))
+    P_y = P_y_base.create_cartesian_topology_partition([2, 2])
+
+    x_global_shape = [3, 5]
+
+    layer = Broadcast(P_x, P_y, preserve_batch=False,
+                      output_shape=x_global_shape, cache_output=True)
+
+    x = zero_volume_tensor()
+    if P_x.active:
+        x = torch.nn.Parameter(torch.Tensor(np.random.randn(*x_global_shape)))
+    x.requires_grad = True
+
+    y0 = layer(x)
+
+    # The root's input is unchanged, so receivers reuse the previous output.
+    # The adjoint still sums one copy from every worker, on every call.
+    y1 = layer(x)
+    y1.backward(torch.ones_like(y1))
+
+    receiver = P_y.active and not P_x.active
+    if receiver:
+        assert(y1.data_ptr() == y0.data_ptr())
+    if P_x.active:
+        assert(torch.equal(x.grad, torch.full(x_global_shape, float(P_y.size))))
+
+    # An in-place update on the root is broadcast again.
+    if P_x.active:
+        with torch.no_grad():
+            x.add_(1)
+
+    y2 = layer(x)
+
+    if receiver:
+        assert(y2.data_ptr() != y0.data_ptr())
+        assert(torch.allclose(y2, y0 + 1))
@@ -22,10 +22,12 @@ adjoint_parametrizations.append(
                          "comm_split_fixture",
                          adjoint_parametrizations,
                          indirect=["comm_split_fixture"])
+@pytest.mark.parametrize("overlap_halo_exchange", [False, True])
 def test_simple_conv2d_adjoint_input(barrier_fence_fixture,
                                      comm_split_fixture,
                                      P_x_ranks, P_x_shape,
-                                     x_global_shape):
+                                     x_global_shape,
+                                     overlap_halo_exchange):
 
     import numpy as np
     import torch
@@ -50,7 +52,8 @@ def test_simple_conv2d_adjoint_input(barrier_fence_fixture,
     layer = DistributedConv2d(P_x,
                               in_channels=x_global_shape[1],
                               out_channels=10,
-                              kernel_size=[3, 3], bias=False)
+                              kernel_size=[3, 3], bias=False,
+                              overlap_halo_exchange=overlap_halo_exchange)
 
     x = zero_volume_tensor(x_global_shape[0])
     if P_x.active:
@@ -83,10 +86,12 @@ def test_simple_conv2d_adjoint_input(barrier_fence_fixture,
                          "comm_split_fixture",
                          adjoint_parametrizations,
                          indirect=["comm_split_fixture"])
+@pytest.mark.parametrize("overlap_halo_exchange", [False, True])
 def test_simple_conv2d_adjoint_weight(barrier_fence_fixture,
                                       comm_split_fixture,
                                       P_x_ranks, P_x_shape,
-                                      x_global_shape):
+                                      x_global_shape,
+                                      overlap_halo_exchange):
 
     import numpy as np
     import torch
@@ -111,7 +116,8 @@ def test_simple_conv2d_adjoint_weight(barrier_fence_fixture,
     layer = DistributedConv2d(P_x,
                               in_channels=x_global_shape[1],
                               out_channels=10,
-                              kernel_size=[3, 3], bias=False)
+                              kernel_size=[3, 3], bias=False,
+                              overlap_halo_exchange=overlap_halo_exchange)
 
     x = zero_volume_tensor(x_global_shape[0])
     if P_x.active:
@@ -284,3 +290,451 @@ def test_simple_conv2d_shape(barrier_fence_fixture,
 
     if P_x.active:
         assert(np.array_equal(np.array(y.shape), np.asarray(y_local_shape)))
+
+
+overlap_parametrizations = []
+
+overlap_parametrizations.append(
+    pytest.param(
+        np.arange(0, 4), [1, 1, 2, 2],  # P_x_ranks, P_x_shape
+        [1, 5, 10, 10],  # x_global_shape
+        [1, 1],  # padding
+        4,  # passed to comm_split_fixture, required MPI ranks
+        id="distributed-padding",
+        marks=[pytest.mark.mpi(min_size=4)]
+        )
+    )
+overlap_parametrizations.append(
+    pytest.param(
+        np.arange(0, 4), [1, 1, 2, 2],  # P_x_ranks, P_x_shape
+        [1, 5, 17, 13],  # x_global_shape
+        [0, 0],  # padding
+        4,  # passed to comm_split_fixture, required MPI ranks
+        id="distributed-no_padding",
+        marks=[pytest.mark.mpi(min_size=4)]
+        )
+    )
+
+
+@pytest.mark.parametrize("P_x_ranks, P_x_shape,"
+                         "x_global_shape,"
+                         "padding,"
+                         "comm_split_fixture",
+                         overlap_parametrizations,
+                         indirect=["comm_split_fixture"])
+def test_conv2d_overlapped_halo_exchange(barrier_fence_fixture,
+                                         comm_split_fixture,
+                                         P_x_ranks, P_x_shape,
+                                         x_global_shape,
+                                         padding):
+
+    import numpy as np
+    import torch
+
+    from distdl.backends.mpi.partition import MPIPartition
+    from distdl.nn.conv import DistributedConv2d
+    from distdl.utilities.slicing import compute_subshape
+    from distdl.utilities.torch import zero_volume_tensor
+
+    # Isolate the minimum needed ranks
+    base_comm, active = comm_split_fixture
+    if not active:
+        return
+    P_world = MPIPartition(base_comm)
+
+    # Create the partitions
+    P_x_base = P_world.create_partition_inclusive(P_x_ranks)
+    P_x = P_x_base.create_cartesian_topology_partition(P_x_shape)
+
+    x_global_shape = np.asarray(x_global_shape)
+
+    layer = DistributedConv2d(P_x,
+                              in_channels=x_global_shape[1],
+                              out_channels=10,
+                              kernel_size=[3, 3],
+                              padding=padding,
+                              bias=True)
+    overlapped_layer = DistributedConv2d(P_x,
+                                         in_channels=x_global_shape[1],
+                                         out_channels=10,
+                                         kernel_size=[3, 3],
+                                         padding=padding,
+                                         bias=True,
+                                         overlap_halo_exchange=True)
+
+    if P_x.active:
+        overlapped_layer.weight.data = layer.weight.data.clone()
+        overlapped_layer.bias.data = layer.bias.data.clone()
+
+    x = zero_volume_tensor(x_global_shape[0])
+    if P_x.active:
+        x_local_shape = compute_subshape(P_x.shape,
+                                         P_x.index,
+                                         x_global_shape)
+        x = torch.Tensor(np.random.randn(*x_local_shape))
+
+    y = layer(x)
+    y_overlapped = overlapped_layer(x)
+
+    if P_x.active:
+        assert(overlapped_layer._overlap_info is not None)
+        assert(np.array_equal(np.array(y.shape), np.array(y_overlapped.shape)))
+        assert(torch.allclose(y, y_overlapped, atol=1e-6))
+
+
+@pytest.mark.parametrize("P_x_ranks, P_x_shape,"
+                         "x_global_shape,"
+                         "padding,"
+                         "comm_split_fixture",
+                         overlap_parametrizations,
+                         indirect=["comm_split_fixture"])
+@pytest.mark.parametrize("overlap_halo_exchange", [False, True])
+def test_conv2d_batch_resize(barrier_fence_fixture,
+                             comm_split_fixture,
+                             P_x_ranks, P_x_shape,
+                             x_global_shape,
+                             padding,
+                             overlap_halo_exchange):
+
+    import numpy as np
+    import torch
+
+    from distdl.backends.mpi.partition import MPIPartition
+    from distdl.nn.conv import DistributedConv2d
+    from distdl.utilities.slicing import compute_subshape
+    from distdl.utilities.torch import zero_volume_tensor
+
+    # Isolate the minimum needed ranks
+    base_comm, active = comm_split_fixture
+    if not active:
+        return
+    P_world = MPIPartition(base_comm)
+
+    # Create the partitions
+    P_x_base = P_world.create_partition_inclusive(P_x_ranks)
+    P_x = P_x_base.create_cartesian_topology_partition(P_x_shape)
+
+    layer = DistributedConv2d(P_x,
+                              in_channels=x_global_shape[1],
+                              out_channels=10,
+                              kernel_size=[3, 3],
+                              padding=padding,
+                              bias=True,
+                              overlap_halo_exchange=overlap_halo_exchange)
+    fresh_layer = DistributedConv2d(P_x,
+                                    in_channels=x_global_shape[1],
+                                    out_channels=10,
+                                    kernel_size=[3, 3],
+                                    padding=padding,
+                                    bias=True,
+                                    overlap_halo_exchange=overlap_halo_exchange)
+
+    if P_x.active:
+        fresh_layer.weight.data = layer.weight.data.clone()
+        fresh_layer.bias.data = layer.bias.data.clone()
+
+    halo_layer = None
+    for batch_size in [x_global_shape[0], 3, 2]:
+        x_global_shape = np.asarray(x_global_shape)
+        x_global_shape[0] = batch_size
+
+        x = zero_volume_tensor(batch_size)
+        if P_x.active:
+            x_local_shape = compute_subshape(P_x.shape,
+                                             P_x.index,
+                                             x_global_shape)
+            x = torch.Tensor(np.random.randn(*x_local_shape))
+
+        y = layer(x)
+
+        # A change in only the batch size must not trigger a full setup, which
+        # would create a new halo layer.
+        if halo_layer is not None:
+            assert(layer.halo_layer is halo_layer)
+        halo_layer = layer.halo_layer
+
+    # The resized layer must match one that was set up from scratch.
+    y_fresh = fresh_layer(x)
+
+    if P_x.active:
+        assert(y.shape[0] == batch_size)
+        assert(torch.allclose(y, y_fresh, atol=1e-6))
+
+
+@pytest.mark.parametrize("P_x_ranks, P_x_shape,"
+                         "x_global_shape,"
+                         "padding,"
+                         "comm_split_fixture",
+                         overlap_parametrizations,
+                         indirect=["comm_split_fixture"])
+@pytest.mark.parametrize("overlap_halo_exchange", [False, True])
+def test_conv2d_parameter_prefetch(barrier_fence_fixture,
+                                   comm_split_fixture,
+                                   P_x_ranks, P_x_shape,
+                                   x_global_shape,
+                                   padding,
+                                   overlap_halo_exchange):
+
+    import numpy as np
+    import torch
+
+    from distdl.backends.mpi.partition import MPIPartition
+    from distdl.nn.conv import DistributedConv2d
+    from distdl.utilities.slicing import compute_subshape
+    from distdl.utilities.torch import zero_volume_tensor
+
+    # Isolate the minimum needed ranks
+    base_comm, active = comm_split_fixture
+    if not active:
+        return
+    P_world = MPIPartition(base_comm)
+
+    # Create the partitions
+    P_x_base = P_world.create_partition_inclusive(P_x_ranks)
+    P_x = P_x_base.create_cartesian_topology_partition(P_x_shape)
+
+    x_global_shape = np.asarray(x_global_shape)
+
+    def build():
+        return [DistributedConv2d(P_x,
+                                  in_channels=x_global_shape[1],
+                                  out_channels=10,
+                                  kernel_size=[3, 3],
+                                  padding=padding,
+                                  bias=True,
+                                  overlap_halo_exchange=overlap_halo_exchange),
+                DistributedConv2d(P_x,
+                                  in_channels=10,
+                                  out_channels=10,
+                                  kernel_size=[3, 3],
+                                  padding=padding,
+                                  bias=True,
+                                  overlap_halo_exchange=overlap_halo_exchange)]
+
+    layers = build()
+    prefetch_layers = build()
+
+    if P_x.active:
+        for layer, prefetch_layer in zip(layers, prefetch_layers):
+            prefetch_layer.weight.data = layer.weight.data.clone()
+            prefetch_layer.bias.data = layer.bias.data.clone()
+
+    x = zero_volume_tensor(x_global_shape[0])
+    if P_x.active:
+        x_local_shape = compute_subshape(P_x.shape,
+                                         P_x.index,
+                                         x_global_shape)
+        x = torch.Tensor(np.random.randn(*x_local_shape))
+
+    y = layers[1](layers[0](x))
+
+    # The second layer's parameters are broadcast while the first computes.
+    prefetch_layers[1].start_parameter_broadcast(x.dtype)
+    y_prefetch = prefetch_layers[1](prefetch_layers[0](x))
+
+    dy = zero_volume_tensor(x_global_shape[0])
+    if P_x.active:
+        dy = torch.Tensor(np.random.randn(*y.shape))
+
+    y.backward(dy)
+    y_prefetch.backward(dy)
+
+    if P_x.active:
+        assert(torch.allclose(y, y_prefetch))
+
+    if P_x.active and P_x.rank == 0:
+        for layer, prefetch_layer in zip(layers, prefetch_layers):
+            assert(torch.allclose(layer.weight.grad, prefetch_layer.weight.grad))
+            assert(torch.allclose(layer.bias.grad, prefetch_layer.bias.grad))
+
+
+@pytest.mark.parametrize("P_x_ranks, P_x_shape,"
+                         "x_global_shape,"
+                         "padding,"
+                         "comm_split_fixture",
+                         overlap_parametrizations,
+                         indirect=["comm_split_fixture"])
+def test_conv2d_cache_parameter_broadcast(barrier_fence_fixture,
+                                          comm_split_fixture,
+                                          P_x_ranks, P_x_shape,
+                                          x_global_shape,
+                                          padding):
+
+    import numpy as np
+    import torch
+
+    from distdl.backends.mpi.partition import MPIPartition
+    from distdl.nn.conv import DistributedConv2d
+    from distdl.utilities.slicing import compute_subshape
+    from distdl.utilities.torch import zero_volume_tensor
+
+    # Isolate the minimum needed ranks
+    base_comm, active = comm_split_fixture
+    if not active:
+        return
+    P_world = MPIPartition(base_comm)
+
+    # Create the partitions
+    P_x_base = P_world.create_partition_inclusive(P_x_ranks)
+    P_x = P_x_base.create_cartesian_topology_partition(P_x_shape)
+
+    x_global_shape = np.asarray(x_global_shape)
+
+    layer = DistributedConv2d(P_x,
+                              in_channels=x_global_shape[1],
+                              out_channels=10,
+                              kernel_size=[3, 3],
+                              padding=padding,
+                              bias=True)
+    cached_layer = DistributedConv2d(P_x,
+                                     in_channels=x_global_shape[1],
+                                     out_channels=10,
+                                     kernel_size=[3, 3],
+                                     padding=padding,
+                                     bias=True,
+                                     cache_parameter_broadcast=True)
+
+    if P_x.active:
+        cached_layer.weight.data = layer.weight.data.clone()
+        cached_layer.bias.data = layer.bias.data.clone()
+
+    # Only the root stores the parameters.
+    optimizers = []
+    if P_x.active and P_x.rank == 0:
+        optimizers = [torch.optim.SGD(layer.parameters(), lr=0.1),
+                      torch.optim.SGD(cached_layer.parameters(), lr=0.1)]
+
+    # Repeated calls with unchanged parameters, and an optimizer step, which
+    # changes them in place.
+    for step in [False, False, True, False]:
+        x = zero_volume_tensor(x_global_shape[0])
+        dy = zero_volume_tensor(x_global_shape[0])
+        if P_x.active:
+            x_local_shape = compute_subshape(P_x.shape,
+                                             P_x.index,
+                                             x_global_shape)
+            x = torch.Tensor(np.random.randn(*x_local_shape))
+
+        y = layer(x)
+        y_cached = cached_layer(x)
+
+        if P_x.active:
+            dy = torch.Tensor(np.random.randn(*y.shape))
+            assert(torch.allclose(y, y_cached))
+
+        y.backward(dy)
+        y_cached.backward(dy)
+
+        if P_x.active and P_x.rank == 0:
+            assert(torch.allclose(layer.weight.grad, cached_layer.weight.grad))
+            assert(torch.allclose(layer.bias.grad, cached_layer.bias.grad))
+
+        if step:
+            for optimizer in optimizers:
+                optimizer.step()
+                optimizer.zero_grad()
+
+
+circular_parametrizations = []
+
+circular_parametrizations.append(
+    pytest.param(
+        np.arange(0, 4), [1, 1, 2, 2],  # P_x_ranks, P_x_shape
+        [1, 3, 10, 9],  # x_global_shape
+        [1, 1],  # padding
+        4,  # passed to comm_split_fixture, required MPI ranks
+        id="distributed",
+        marks=[pytest.mark.mpi(min_size=4)]
+        )
+    )
+
+circular_parametrizations.append(
+    pytest.param(
+        np.arange(0, 3), [1, 1, 1, 3],  # P_x_ranks, P_x_shape
+        [2, 3, 7, 11],  # x_global_shape
+        [2, 1],  # padding
+        3,  # passed to comm_split_fixture, required MPI ranks
+        id="distributed-self_neighbor",
+        marks=[pytest.mark.mpi(min_size=3)]
+        )
+    )
+
+
+@pytest.mark.parametrize("P_x_ranks, P_x_shape,"
+                         "x_global_shape,"
+                         "padding,"
+                         "comm_split_fixture",
+                         circular_parametrizations,
+                         indirect=["comm_split_fixture"])
+def test_conv2d_circular_padding(barrier_fence_fixture,
+                                 comm_split_fixture,
+                                 P_x_ranks, P_x_shape,
+                                 x_global_shape,
+                                 padding):
+
+    import numpy as np
+    import torch
+
+    from distdl.backends.mpi.partition import MPIPartition
+    from distdl.nn.conv import DistributedConv2d
+    from distdl.utilities.slicing import assemble_slices
+    from distdl.utilities.slicing import compute_start_index
+    from distdl.utilities.slicing import compute_stop_index
+
+    # Isolate the minimum needed ranks
+    base_comm, active = comm_split_fixture
+    if not active:
+        return
+    P_world = MPIPartition(base_comm)
+
+    # Create the partitions, periodic in the spatial dimensions
+    P_x_base = P_world.create_partition_inclusive(P_x_ranks)
+    P_x = P_x_base.create_cartesian_topology_partition(P_x_shape,
+                                                       periods=[False, False, True, True])
+
+    x_global_shape = np.asarray(x_global_shape)
+
+    # Every worker builds the same sequential layer and global tensors.
+    torch.manual_seed(0)
+
+    seq_layer = torch.nn.Conv2d(in_channels=x_global_shape[1],
+                                out_channels=4,
+                                kernel_size=[3, 3],
+                                padding=padding,
+                                padding_mode='circular',
+                                bias=True)
+    layer = DistributedConv2d(P_x,
+                              in_channels=x_global_shape[1],
+                              out_channels=4,
+                              kernel_size=[3, 3],
+                              padding=padding,
+                              padding_mode='circular',
+                              bias=True)
+
+    if P_x.rank == 0:
+        layer.weight.data = seq_layer.weight.data.clone()
+        layer.bias.data = seq_layer.bias.data.clone()
+
+    x_global = torch.randn(*x_global_shape, requires_grad=True)
+    y_global = seq_layer(x_global)
+    dy_global = torch.randn(*y_global.shape)
+    y_global.backward(dy_global)
+
+    def local_slices(global_shape):
+        global_shape = np.asarray(global_shape)
+        return tuple(assemble_slices(compute_start_index(P_x.shape, P_x.index, global_shape),
+                                     compute_stop_index(P_x.shape, P_x.index, global_shape)))
+
+    x_slices = local_slices(x_global.shape)
+    y_slices = local_slices(y_global.shape)
+
+    x = x_global.detach()[x_slices].clone()
+    x.requires_grad = True
+
+    # The wraparound ghosts are exchanged like any others.
+    y = layer(x)
+    y.backward(dy_global[y_slices])
+
+    assert(np.array_equal(np.array(y.shape), np.array(y_global[y_slices].shape)))
+    assert(torch.allclose(y, y_global[y_slices], atol=1e-6))
+    assert(torch.allclose(x.grad, x_global.grad[x_slices], atol=1e-6))
@@ -259,3 +259,65 @@ def test_general_conv2d_adjoint_bias(barrier_fence_fixture,
     y = y.detach()
 
     check_adjoint_test_tight(P_world, b, db, y, dy)
+
+
+# For example of indirect, see https://stackoverflow.com/a/28570677
+@pytest.mark.parametrize("P_x_ranks, P_x_shape,"
+                         "P_y_ranks, P_y_shape,"
+                         "P_w_ranks, P_w_shape,"
+                         "x_global_shape,"
+                         "comm_split_fixture",
+                         adjoint_parametrizations,
+                         indirect=["comm_split_fixture"])
+def test_general_conv2d_repeated_forward(barrier_fence_fixture,
+                                         comm_split_fixture,
+                                         P_x_ranks, P_x_shape,
+                                         P_y_ranks, P_y_shape,
+                                         P_w_ranks, P_w_shape,
+                                         x_global_shape):
+
+    import numpy as np
+    import torch
+
+    from distdl.backends.mpi.partition import MPIPartition
+    from distdl.nn.general_conv import DistributedGeneralConv2d
+    from distdl.utilities.slicing import compute_subshape
+    from distdl.utilities.torch import zero_volume_tensor
+
+    # Isolate the minimum needed ranks
+    base_comm, active = comm_split_fixture
+    if not active:
+        return
+    P_world = MPIPartition(base_comm)
+
+    # Create the partitions
+    P_x_base = P_world.create_partition_inclusive(P_x_ranks)
+    P_x = P_x_base.create_cartesian_topology_partition(P_x_shape)
+
+    P_y_base = P_world.create_partition_inclusive(P_y_ranks)
+    P_y = P_y_base.create_cartesian_topology_partition(P_y_shape)
+
+    P_w_base = P_world.create_partition_inclusive(P_w_ranks)
+    P_w = P_w_base.create_cartesian_topology_partition(P_w_shape)
+
+    x_global_shape = np.asarray(x_global_shape)
+
+    layer = DistributedGeneralConv2d(P_x, P_y, P_w,
+                                     in_channels=x_global_shape[1],
+                                     out_channels=10,
+                                     kernel_size=[3, 3], bias=True)
+
+    x = zero_volume_tensor(x_global_shape[0])
+    if P_x.active:
+        x_local_shape = compute_subshape(P_x.shape,
+                                         P_x.index,
+                                         x_global_shape)
+        x = torch.Tensor(np.random.randn(*x_local_shape))
+
+    # After the first call, the weight and bias broadcasts are started
+    # before the halo exchange, which must not change the result.
+    y0 = layer(x)
+    y1 = layer(x)
+
+    if P_y.active:
+        assert(torch.allclose(y0, y1))
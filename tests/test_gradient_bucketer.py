@@ -0,0 +1,128 @@
+import numpy as np
+import pytest
+
+parametrizations = []
+
+parametrizations.append(
+    pytest.param(
+        np.arange(0, 4), [1, 1, 2, 2],  # P_x_ranks, P_x_shape
+        [1, 5, 10, 10],  # x_global_shape
+        200,  # bucket_size
+        4,  # passed to comm_split_fixture, required MPI ranks
+        id="distributed-multiple-buckets",
+        marks=[pytest.mark.mpi(min_size=4)]
+        )
+    )
+
+parametrizations.append(
+    pytest.param(
+        np.arange(0, 4), [1, 1, 2, 2],  # P_x_ranks, P_x_shape
+        [1, 5, 10, 10],  # x_global_shape
+        2**20,  # bucket_size
+        4,  # passed to comm_split_fixture, required MPI ranks
+        id="distributed-single-bucket",
+        marks=[pytest.mark.mpi(min_size=4)]
+        )
+    )
+
+parametrizations.append(
+    pytest.param(
+        np.arange(1, 4), [1, 1, 3],  # P_x_ranks, P_x_shape
+        [1, 5, 10],  # x_global_shape
+        1,  # bucket_size
+        4,  # passed to comm_split_fixture, required MPI ranks
+        id="distributed-subset-bucket-per-tensor",
+        marks=[pytest.mark.mpi(min_size=4)]
+        )
+    )
+
+
+@pytest.mark.parametrize("P_x_ranks, P_x_shape,"
+                         "x_global_shape,"
+                         "bucket_size,"
+                         "comm_split_fixture",
+                         parametrizations,
+                         indirect=["comm_split_fixture"])
+def test_gradient_bucketer_matches_unbucketed(barrier_fence_fixture,
+                                              comm_split_fixture,
+                                              P_x_ranks, P_x_shape,
+                                              x_global_shape,
+                                              bucket_size):
+
+    import numpy as np
+    import torch
+
+    from distdl.backends.mpi.gradient_bucketer import MPIGradientBucketer
+    from distdl.backends.mpi.partition import MPIPartition
+    from distdl.nn.conv import DistributedConv1d
+    from distdl.nn.conv import DistributedConv2d
+    from distdl.utilities.slicing import compute_subshape
+    from distdl.utilities.torch import zero_volume_tensor
+
+    # Isolate the minimum needed ranks
+    base_comm, active = comm_split_fixture
+    if not active:
+        return
+    P_world = MPIPartition(base_comm)
+
+    # Create the partitions
+    P_x_base = P_world.create_partition_inclusive(P_x_ranks)
+    P_x = P_x_base.create_cartesian_topology_partition(P_x_shape)
+
+    x_global_shape = np.asarray(x_global_shape)
+
+    DistributedConv = [DistributedConv1d, DistributedConv2d][len(x_global_shape) - 3]
+    kernel_size = [3]*(len(x_global_shape) - 2)
+
+    bucketer = MPIGradientBucketer(P_x, bucket_size=bucket_size)
+
+    def build(gradient_bucketer):
+        return [DistributedConv(P_x,
+                                in_channels=x_global_shape[1], out_channels=4,
+                                kernel_size=kernel_size, padding=1,
+                                gradient_bucketer=gradient_bucketer),
+                DistributedConv(P_x,
+                                in_channels=4, out_channels=3,
+                                kernel_size=kernel_size, padding=1,
+                                gradient_bucketer=gradient_bucketer)]
+
+    layers = build(None)
+    bucketed_layers = build(bucketer)
+
+    if P_x.active:
+        for layer, bucketed_layer in zip(layers, bucketed_layers):
+            bucketed_layer.load_state_dict(layer.state_dict())
+
+    # Gradients accumulate over repeated backward passes, as they do without
+    # bucketing.
+    for i in range(2):
+        x = zero_volume_tensor(x_global_shape[0])
+        dy = zero_volume_tensor(x_global_shape[0])
+        if P_x.active:
+            x_local_shape = compute_subshape(P_x.shape, P_x.index, x_global_shape)
+            x = torch.Tensor(np.random.randn(*x_local_shape))
+            y_local_shape = x_local_shape.copy()
+            y_local_shape[1] = 3
+            dy = torch.Tensor(np.random.randn(*y_local_shape))
+
+        x_bucketed = x.clone().requires_grad_(True)
+        x.requires_grad = True
+
+        y = x
+        for layer in layers:
+            y = layer(y)
+        y.backward(dy)
+
+        y_bucketed = x_bucketed
+        for layer in bucketed_layers:
+            y_bucketed = layer(y_bucketed)
+        y_bucketed.backward(dy)
+
+        if P_x.active:
+            assert(torch.allclose(y, y_bucketed))
+            assert(torch.allclose(x.grad, x_bucketed.grad))
+
+    if P_x.active and P_x.rank == 0:
+        for layer, bucketed_layer in zip(layers, bucketed_layers):
+            assert(torch.allclose(layer.weight.grad, bucketed_layer.weight.grad))
+            assert(torch.allclose(layer.bias.grad, bucketed_layer.bias.grad))
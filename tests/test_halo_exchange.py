@@ -48,6 +48,21 @@ adjoint_parametrizations.append(
         )
     )
 
+adjoint_parametrizations.append(
+    pytest.param(
+        np.arange(0, 8), [1, 1, 2, 2, 2],  # P_x_ranks, P_x_shape
+        [1, 1, 7, 6, 5],  # x_global_shape
+        [1, 1, 3, 3, 3],  # kernel_size
+        [1, 1, 1, 1, 1],  # stride
+        [0, 0, 1, 1, 1],  # padding
+        [1, 1, 1, 1, 1],  # dilation
+        MockConvLayer,  # MockKernelStyle
+        8,  # passed to comm_split_fixture, required MPI ranks
+        id="conv-3D-corners",
+        marks=[pytest.mark.mpi(min_size=8)]
+        )
+    )
+
 
 @pytest.mark.parametrize("P_x_ranks, P_x_shape,"
                          "x_global_shape,"
@@ -59,12 +74,23 @@ adjoint_parametrizations.append(
                          "comm_split_fixture",
                          adjoint_parametrizations,
                          indirect=["comm_split_fixture"])
+@pytest.mark.parametrize("use_persistent_requests, use_subarray_datatypes,"
+                         "use_diagonal_exchange, use_neighborhood_collectives",
+                         [(False, False, False, False),
+                          (True, False, False, False),
+                          (False, True, False, False),
+                          (False, False, True, False),
+                          (False, False, False, True)])
 def test_halo_exchange_adjoint(barrier_fence_fixture,
                                comm_split_fixture,
                                P_x_ranks, P_x_shape,
                                x_global_shape,
                                kernel_size, stride, padding, dilation,
-                               MockKernelStyle):
+                               MockKernelStyle,
+                               use_persistent_requests,
+                               use_subarray_datatypes,
+                               use_diagonal_exchange,
+                               use_neighborhood_collectives):
     import numpy as np
     import torch
 
@@ -106,7 +132,11 @@ def test_halo_exchange_adjoint(barrier_fence_fixture,
         send_buffer_shape = exchange_info[2]
 
     pad_layer = PadNd(halo_shape, value=0)
-    halo_layer = HaloExchange(P_x, halo_shape, recv_buffer_shape, send_buffer_shape)
+    halo_layer = HaloExchange(P_x, halo_shape, recv_buffer_shape, send_buffer_shape,
+                              use_persistent_requests=use_persistent_requests,
+                              use_subarray_datatypes=use_subarray_datatypes,
+                              use_diagonal_exchange=use_diagonal_exchange,
+                              use_neighborhood_collectives=use_neighborhood_collectives)
 
     x = zero_volume_tensor(x_global_shape[0])
     if P_x.active:
@@ -139,3 +169,326 @@ def test_halo_exchange_adjoint(barrier_fence_fixture,
     y = y.detach()
 
     check_adjoint_test_tight(P_world, x, dx, y, dy)
+
+
+@pytest.mark.parametrize("P_x_ranks, P_x_shape,"
+                         "x_global_shape,"
+                         "kernel_size,"
+                         "stride,"
+                         "padding,"
+                         "dilation,"
+                         "MockKernelStyle,"
+                         "comm_split_fixture",
+                         adjoint_parametrizations,
+                         indirect=["comm_split_fixture"])
+@pytest.mark.parametrize("use_subarray_datatypes, use_neighborhood_collectives",
+                         [(False, False), (True, False), (False, True)])
+@pytest.mark.parametrize("dtype", ["float32", "float16", "bfloat16"])
+def test_halo_exchange_dtype(barrier_fence_fixture,
+                             comm_split_fixture,
+                             P_x_ranks, P_x_shape,
+                             x_global_shape,
+                             kernel_size, stride, padding, dilation,
+                             MockKernelStyle,
+                             use_subarray_datatypes,
+                             use_neighborhood_collectives,
+                             dtype):
+    import numpy as np
+    import torch
+
+    from distdl.backends.mpi.partition import MPIPartition
+    from distdl.nn.halo_exchange import HaloExchange
+    from distdl.nn.padnd import PadNd
+    from distdl.utilities.slicing import compute_subshape
+    from distdl.utilities.torch import zero_volume_tensor
+
+    # Isolate the minimum needed ranks
+    base_comm, active = comm_split_fixture
+    if not active:
+        return
+    P_world = MPIPartition(base_comm)
+    P_x_base = P_world.create_partition_inclusive(P_x_ranks)
+    P_x = P_x_base.create_cartesian_topology_partition(P_x_shape)
+
+    x_global_shape = np.asarray(x_global_shape)
+
+    halo_shape = None
+    recv_buffer_shape = None
+    send_buffer_shape = None
+    if P_x.active:
+        mockup_layer = MockKernelStyle()
+        exchange_info = mockup_layer._compute_exchange_info(x_global_shape,
+                                                            np.asarray(kernel_size),
+                                                            np.asarray(stride),
+                                                            np.asarray(padding),
+                                                            np.asarray(dilation),
+                                                            P_x.active,
+                                                            P_x.shape,
+                                                            P_x.index)
+        halo_shape = exchange_info[0]
+        recv_buffer_shape = exchange_info[1]
+        send_buffer_shape = exchange_info[2]
+
+    pad_layer = PadNd(halo_shape, value=0)
+
+    # Small integers are exact in every dtype, so the exchange in the reduced
+    # precision dtype must match the one in float64 exactly.
+    x = zero_volume_tensor(x_global_shape[0])
+    dy = zero_volume_tensor(x_global_shape[0])
+    if P_x.active:
+        x_local_shape = compute_subshape(P_x.shape,
+                                         P_x.index,
+                                         x_global_shape)
+        x = pad_layer(torch.randint(-8, 8, tuple(x_local_shape)).to(torch.float64))
+        dy = torch.randint(-8, 8, x.shape).to(torch.float64)
+
+    results = []
+    for x_dtype in [torch.float64, getattr(torch, dtype)]:
+        halo_layer = HaloExchange(P_x, halo_shape, recv_buffer_shape, send_buffer_shape,
+                                  use_subarray_datatypes=use_subarray_datatypes,
+                                  use_neighborhood_collectives=use_neighborhood_collectives)
+
+        x_clone = x.to(x_dtype, copy=True)
+        x_clone.requires_grad = True
+        dy_clone = dy.to(x_dtype)
+
+        y = halo_layer(x_clone.clone())
+        y.backward(dy_clone)
+
+        assert(y.dtype == x_dtype)
+        assert(x_clone.grad.dtype == x_dtype)
+
+        results.append((y.detach().to(torch.float64), x_clone.grad.to(torch.float64)))
+
+    assert(torch.equal(results[0][0], results[1][0]))
+    assert(torch.equal(results[0][1], results[1][1]))
+
+
+@pytest.mark.parametrize("P_x_ranks, P_x_shape,"
+                         "x_global_shape,"
+                         "kernel_size,"
+                         "stride,"
+                         "padding,"
+                         "dilation,"
+                         "MockKernelStyle,"
+                         "comm_split_fixture",
+                         adjoint_parametrizations,
+                         indirect=["comm_split_fixture"])
+@pytest.mark.parametrize("use_persistent_requests, use_subarray_datatypes,"
+                         "use_diagonal_exchange, use_neighborhood_collectives",
+                         [(False, False, False, False),
+                          (True, False, False, False),
+                          (False, True, False, False),
+                          (False, False, True, False),
+                          (False, False, False, True)])
+@pytest.mark.parametrize("start_exchange", [False, True])
+def test_halo_pad_exchange(barrier_fence_fixture,
+                           comm_split_fixture,
+                           P_x_ranks, P_x_shape,
+                           x_global_shape,
+                           kernel_size, stride, padding, dilation,
+                           MockKernelStyle,
+                           use_persistent_requests,
+                           use_subarray_datatypes,
+                           use_diagonal_exchange,
+                           use_neighborhood_collectives,
+                           start_exchange):
+    import numpy as np
+    import torch
+
+    from distdl.backends.mpi.partition import MPIPartition
+    from distdl.nn.halo_exchange import HaloExchange
+    from distdl.nn.halo_exchange import HaloPadExchange
+    from distdl.nn.padnd import PadNd
+    from distdl.utilities.slicing import assemble_slices
+    from distdl.utilities.slicing import compute_subshape
+    from distdl.utilities.torch import zero_volume_tensor
+
+    # Isolate the minimum needed ranks
+    base_comm, active = comm_split_fixture
+    if not active:
+        return
+    P_world = MPIPartition(base_comm)
+    P_x_base = P_world.create_partition_inclusive(P_x_ranks)
+    P_x = P_x_base.create_cartesian_topology_partition(P_x_shape)
+
+    x_global_shape = np.asarray(x_global_shape)
+
+    halo_shape = None
+    recv_buffer_shape = None
+    send_buffer_shape = None
+    needed_slices = None
+    if P_x.active:
+        mockup_layer = MockKernelStyle()
+        exchange_info = mockup_layer._compute_exchange_info(x_global_shape,
+                                                            np.asarray(kernel_size),
+                                                            np.asarray(stride),
+                                                            np.asarray(padding),
+                                                            np.asarray(dilation),
+                                                            P_x.active,
+                                                            P_x.shape,
+                                                            P_x.index)
+        halo_shape = exchange_info[0]
+        recv_buffer_shape = exchange_info[1]
+        send_buffer_shape = exchange_info[2]
+        needed_ranges = exchange_info[3]
+        needed_slices = assemble_slices(needed_ranges[:, 0], needed_ranges[:, 1])
+
+    pad_layer = PadNd(halo_shape, value=0)
+    halo_layer = HaloExchange(P_x, halo_shape, recv_buffer_shape, send_buffer_shape)
+    fused_layer = HaloPadExchange(P_x, halo_shape, recv_buffer_shape, send_buffer_shape,
+                                  needed_slices,
+                                  use_persistent_requests=use_persistent_requests,
+                                  use_subarray_datatypes=use_subarray_datatypes,
+                                  use_diagonal_exchange=use_diagonal_exchange,
+                                  use_neighborhood_collectives=use_neighborhood_collectives)
+
+    x = zero_volume_tensor(x_global_shape[0])
+    if P_x.active:
+        x_local_shape = compute_subshape(P_x.shape,
+                                         P_x.index,
+                                         x_global_shape)
+        x = torch.tensor(np.random.randn(*x_local_shape))
+
+    # The fused layer must match pad, exchange, and select, in both the
+    # forward and adjoint.
+    x_unfused = x.clone()
+    x_unfused.requires_grad = True
+    y_unfused = halo_layer(pad_layer(x_unfused))
+    if P_x.active:
+        y_unfused = y_unfused[tuple(needed_slices)]
+
+    dy = zero_volume_tensor(x_global_shape[0])
+    if P_x.active:
+        dy = torch.tensor(np.random.randn(*y_unfused.shape))
+    y_unfused.backward(dy.clone())
+
+    x_fused = x.clone()
+    x_fused.requires_grad = True
+    if start_exchange:
+        fused_layer.start_exchange(x_fused)
+        y_fused = fused_layer.finish_exchange(x_fused)
+    else:
+        y_fused = fused_layer(x_fused)
+    y_fused.backward(dy.clone())
+
+    assert(torch.equal(y_fused.detach(), y_unfused.detach()))
+
+    # The diagonal exchange accumulates the adjoint of the corners in a
+    # different order, so the gradients agree only to rounding.
+    if use_diagonal_exchange:
+        assert(torch.allclose(x_fused.grad, x_unfused.grad))
+    else:
+        assert(torch.equal(x_fused.grad, x_unfused.grad))
+
+
+periodic_parametrizations = []
+
+periodic_parametrizations.append(
+    pytest.param(
+        np.arange(0, 9), [1, 1, 3, 3],  # P_x_ranks, P_x_shape
+        [1, 2, 7, 9],  # x_global_shape
+        9,  # passed to comm_split_fixture, required MPI ranks
+        id="periodic",
+        marks=[pytest.mark.mpi(min_size=9)]
+        )
+    )
+
+periodic_parametrizations.append(
+    pytest.param(
+        np.arange(0, 2), [1, 1, 1, 2],  # P_x_ranks, P_x_shape
+        [1, 2, 5, 6],  # x_global_shape
+        2,  # passed to comm_split_fixture, required MPI ranks
+        id="periodic-same_neighbor",
+        marks=[pytest.mark.mpi(min_size=2)]
+        )
+    )
+
+
+@pytest.mark.parametrize("P_x_ranks, P_x_shape,"
+                         "x_global_shape,"
+                         "comm_split_fixture",
+                         periodic_parametrizations,
+                         indirect=["comm_split_fixture"])
+@pytest.mark.parametrize("use_diagonal_exchange, use_neighborhood_collectives",
+                         [(False, False), (True, False), (False, True)])
+def test_halo_exchange_periodic(barrier_fence_fixture,
+                                comm_split_fixture,
+                                P_x_ranks, P_x_shape,
+                                x_global_shape,
+                                use_diagonal_exchange,
+                                use_neighborhood_collectives):
+    import numpy as np
+    import torch
+
+    from distdl.backends.mpi.partition import MPIPartition
+    from distdl.nn.halo_exchange import HaloExchange
+    from distdl.nn.padnd import PadNd
+    from distdl.utilities.slicing import assemble_slices
+    from distdl.utilities.slicing import compute_start_index
+    from distdl.utilities.slicing import compute_stop_index
+
+    # Isolate the minimum needed ranks
+    base_comm, active = comm_split_fixture
+    if not active:
+        return
+    P_world = MPIPartition(base_comm)
+    P_x_base = P_world.create_partition_inclusive(P_x_ranks)
+    P_x = P_x_base.create_cartesian_topology_partition(P_x_shape,
+                                                       periods=[False, False, True, True])
+
+    x_global_shape = np.asarray(x_global_shape)
+    periodic = [False, False, True, True]
+
+    mockup_layer = MockConvLayer()
+    exchange_info = mockup_layer._compute_exchange_info(x_global_shape,
+                                                        np.array([1, 1, 3, 3]),
+                                                        np.array([1, 1, 1, 1]),
+                                                        np.array([0, 0, 1, 1]),
+                                                        np.array([1, 1, 1, 1]),
+                                                        P_x.active,
+                                                        P_x.shape,
+                                                        P_x.index,
+                                                        periodic=periodic)
+    halo_shape = exchange_info[0]
+    recv_buffer_shape = exchange_info[1]
+    send_buffer_shape = exchange_info[2]
+
+    # Neighborhood collectives cannot tell the two neighbors apart if they
+    # are the same worker.
+    if use_neighborhood_collectives and np.any(P_x.shape[2:] < 3):
+        with pytest.raises(ValueError):
+            HaloExchange(P_x, halo_shape, recv_buffer_shape, send_buffer_shape,
+                         use_neighborhood_collectives=use_neighborhood_collectives)
+        return
+
+    pad_layer = PadNd(halo_shape, value=0)
+    halo_layer = HaloExchange(P_x, halo_shape, recv_buffer_shape, send_buffer_shape,
+                              use_diagonal_exchange=use_diagonal_exchange,
+                              use_neighborhood_collectives=use_neighborhood_collectives)
+
+    x_start = compute_start_index(P_x.shape, P_x.index, x_global_shape)
+    x_stop = compute_stop_index(P_x.shape, P_x.index, x_global_shape)
+
+    x_global = np.arange(np.prod(x_global_shape), dtype=np.float64).reshape(x_global_shape)
+    x = torch.tensor(x_global[tuple(assemble_slices(x_start, x_stop))])
+    x = pad_layer(x)
+    x.requires_grad = True
+
+    dy = torch.tensor(np.random.randn(*x.shape))
+
+    x_clone = x.clone()
+    dy_clone = dy.clone()
+
+    y = halo_layer(x_clone)
+
+    # Every worker, including those at the ends, gets its ghosts, edges and
+    # corners included, from the wrapped-around global tensor.
+    x_wrapped = np.pad(x_global, [(0, 0), (0, 0), (1, 1), (1, 1)], mode='wrap')
+    y_expected = x_wrapped[tuple(assemble_slices(x_start, x_stop + 2*np.array([0, 0, 1, 1])))]
+    assert(np.array_equal(y.detach().numpy(), y_expected))
+
+    y.backward(dy_clone)
+    dx = dy_clone
+
+    check_adjoint_test_tight(P_world, x.detach(), dx.detach(), y.detach(), dy.detach())
@@ -1,7 +1,9 @@
 import numpy as np
+import pytest
 from mpi4py import MPI
 
 from distdl.backends.mpi.partition import MPIPartition
+from distdl.nn.mixins.conv_mixin import ConvMixin
 from distdl.nn.mixins.halo_mixin import HaloMixin
 from distdl.nn.mixins.pooling_mixin import PoolingMixin
 
@@ -10,6 +12,10 @@ class MockPoolLayer(HaloMixin, PoolingMixin):
     pass
 
 
+class MockConvLayer(HaloMixin, ConvMixin):
+    pass
+
+
 def test_mixin():
 
     P_world = MPIPartition(MPI.COMM_WORLD)
@@ -92,3 +98,119 @@ def test_mixin():
         assert(recv_buffer_shape is None)
         assert(send_buffer_shape is None)
         assert(needed_ranges is None)
+
+
+def test_mixin_periodic():
+
+    layer = MockConvLayer()
+
+    partition_shape = np.array([1, 1, 4])
+    x_global_shape = np.array([1, 1, 10])
+    kernel_size = np.array([3])
+    stride = np.array([1])
+    padding = np.array([1])
+    dilation = np.array([1])
+
+    # Local sizes are 3, 3, 2, 2.  With the last dimension periodic, the
+    # workers at the ends need, and send, the wraparound ghosts.
+    for i, n in enumerate([3, 3, 2, 2]):
+        halo_shape, recv_buffer_shape, send_buffer_shape, needed_ranges = \
+            layer._compute_exchange_info(x_global_shape,
+                                         kernel_size,
+                                         stride,
+                                         padding,
+                                         dilation,
+                                         True,
+                                         partition_shape,
+                                         np.array([0, 0, i]),
+                                         periodic=[False, False, True])
+
+        expected_halo_shape = np.array([[0, 0], [0, 0], [1, 1]])
+        expected_needed_ranges = np.array([[0, 1], [0, 1], [0, n + 2]])
+
+        assert(np.array_equal(halo_shape, expected_halo_shape))
+        assert(np.array_equal(recv_buffer_shape, expected_halo_shape))
+        assert(np.array_equal(send_buffer_shape, expected_halo_shape))
+        assert(np.array_equal(needed_ranges, expected_needed_ranges))
+
+    # Without the wraparound, the ends have no outer halo.
+    halo_shape, _, send_buffer_shape, _ = \
+        layer._compute_exchange_info(x_global_shape,
+                                     kernel_size,
+                                     stride,
+                                     padding,
+                                     dilation,
+                                     True,
+                                     partition_shape,
+                                     np.array([0, 0, 0]))
+
+    assert(np.array_equal(halo_shape, np.array([[0, 0], [0, 0], [0, 1]])))
+    assert(np.array_equal(send_buffer_shape, np.array([[0, 0], [0, 0], [0, 1]])))
+
+
+@pytest.mark.parametrize("MockKernelStyle, kernel_size, stride, padding",
+                         [(MockConvLayer, [3, 5], [1, 1], [1, 2]),
+                          (MockConvLayer, [4, 3], [1, 1], [0, 0]),
+                          (MockPoolLayer, [2, 3], [2, 3], [0, 0])])
+@pytest.mark.parametrize("periodic", [[False, False, False, False], [False, False, True, True]])
+def test_mixin_all_workers(MockKernelStyle, kernel_size, stride, padding, periodic):
+
+    import itertools
+
+    layer = MockKernelStyle()
+
+    partition_shape = np.array([1, 1, 3, 4])
+    x_global_shape = np.array([2, 3, 19, 23])
+    kernel_size = np.array(kernel_size)
+    stride = np.array(stride)
+    padding = np.array(padding)
+    dilation = np.array([1, 1])
+
+    info = dict()
+    for index in itertools.product(*[range(p) for p in partition_shape]):
+        info[index] = layer._compute_exchange_info(x_global_shape,
+                                                   kernel_size,
+                                                   stride,
+                                                   padding,
+                                                   dilation,
+                                                   True,
+                                                   partition_shape,
+                                                   np.array(index),
+                                                   periodic=periodic)
+
+    # Every worker sends to each neighbor exactly what that neighbor expects
+    # to receive.
+    for index, (halo_shape, recv_buffer_shape, send_buffer_shape, _) in info.items():
+        assert(np.array_equal(halo_shape, recv_buffer_shape))
+        for i in range(len(index)):
+            for side, step in [(0, -1), (1, 1)]:
+                nindex = list(index)
+                nindex[i] += step
+                if periodic[i]:
+                    nindex[i] %= partition_shape[i]
+                elif nindex[i] < 0 or nindex[i] >= partition_shape[i]:
+                    assert(send_buffer_shape[i, side] == 0)
+                    assert(recv_buffer_shape[i, side] == 0)
+                    continue
+                _, nrecv_buffer_shape, nsend_buffer_shape, _ = info[tuple(nindex)]
+                assert(send_buffer_shape[i, side] == nrecv_buffer_shape[i, 1 - side])
+                assert(recv_buffer_shape[i, side] == nsend_buffer_shape[i, 1 - side])
+
+
+def test_mixin_cache():
+
+    partition_shape = np.array([1, 1, 2, 2])
+    x_global_shape = np.array([1, 1, 10, 7])
+    args = (np.array([1, 1, 3, 3]), np.array([1, 1, 1, 1]),
+            np.array([0, 0, 1, 1]), np.array([1, 1, 1, 1]))
+    periodic = np.zeros(4, dtype=bool)
+
+    # Layers of the same type and hyperparameters share the halo tables.
+    tables = MockConvLayer()._compute_halo_tables(partition_shape, x_global_shape, *args, periodic)
+    assert(MockConvLayer()._compute_halo_tables(partition_shape, x_global_shape, *args, periodic) is tables)
+
+    # The shared tables cannot be modified.
+    assert(not tables[0].flags.writeable)
+
+    # Layers with a different input range do not share them.
+    assert(MockPoolLayer()._compute_halo_tables(partition_shape, x_global_shape, *args, periodic) is not tables)
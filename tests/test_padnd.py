@@ -68,3 +68,37 @@ def test_padnd_adjoint(barrier_fence_fixture,
     y = y.detach()
 
     check_adjoint_test_tight(P_world, x, dx, y, dy)
+
+
+@pytest.mark.parametrize("x_local_shape,"
+                         "padding,"
+                         "comm_split_fixture",
+                         adjoint_parametrizations,
+                         indirect=["comm_split_fixture"])
+def test_padnd_values(barrier_fence_fixture,
+                      comm_split_fixture,
+                      x_local_shape,
+                      padding):
+
+    import numpy as np
+    import torch
+
+    from distdl.nn.padnd import PadNd
+
+    # Isolate the minimum needed ranks
+    base_comm, active = comm_split_fixture
+    if not active:
+        return
+
+    padding = np.asarray(padding)
+
+    layer = PadNd(padding, value=-2.5)
+
+    x = torch.tensor(np.random.randn(*x_local_shape))
+
+    y = layer(x)
+
+    # torch.nn.functional.pad takes the last dimension first
+    y_ref = torch.nn.functional.pad(x, tuple(padding[::-1].ravel()), value=-2.5)
+
+    assert(torch.equal(y, y_ref))
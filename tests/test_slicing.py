@@ -0,0 +1,80 @@
+import pytest
+
+intersection_parametrizations = []
+
+intersection_parametrizations.append(
+    pytest.param(
+        [4, 1], [3, 4],  # P_x_r_shape, P_x_s_shape
+        [77, 55],  # x_shape
+        id="overlap-2D",
+        )
+    )
+
+intersection_parametrizations.append(
+    pytest.param(
+        [2, 3, 1], [1, 2, 5],  # P_x_r_shape, P_x_s_shape
+        [7, 11, 13],  # x_shape
+        id="overlap-3D",
+        )
+    )
+
+intersection_parametrizations.append(
+    pytest.param(
+        [1, 2], [1, 5],  # P_x_r_shape, P_x_s_shape
+        [4, 3],  # x_shape
+        id="empty-subtensors",
+        )
+    )
+
+
+@pytest.mark.parametrize("P_x_r_shape, P_x_s_shape,"
+                         "x_shape",
+                         intersection_parametrizations)
+def test_compute_partition_intersections(P_x_r_shape, P_x_s_shape,
+                                         x_shape):
+
+    import numpy as np
+
+    from distdl.utilities.slicing import compute_partition_intersection
+    from distdl.utilities.slicing import compute_partition_intersections
+    from distdl.utilities.slicing import range_index
+
+    for P_x_r_index in range_index(P_x_r_shape):
+        ranks, starts, stops = compute_partition_intersections(P_x_r_shape,
+                                                               P_x_r_index,
+                                                               P_x_s_shape,
+                                                               x_shape)
+
+        # The plan must hold exactly the non-empty intersections, in rank
+        # order.
+        expected = []
+        for rank, P_x_s_index in enumerate(range_index(P_x_s_shape)):
+            sl = compute_partition_intersection(P_x_r_shape, P_x_r_index,
+                                                P_x_s_shape, P_x_s_index,
+                                                x_shape)
+            if sl is not None:
+                expected.append((rank, sl))
+
+        assert(len(ranks) == len(expected))
+        for (rank, sl), r, start, stop in zip(expected, ranks, starts, stops):
+            assert(r == rank)
+            assert(np.array_equal(start, [s.start for s in sl]))
+            assert(np.array_equal(stop, [s.stop for s in sl]))
+
+
+@pytest.mark.parametrize("slices, shape, contiguous",
+                         [([(0, 2), (0, 5)], [4, 5], True),
+                          ([(1, 3), (0, 5)], [4, 5], True),
+                          ([(1, 2), (1, 3)], [4, 5], True),
+                          ([(1, 3), (1, 3)], [4, 5], False),
+                          ([(0, 1), (2, 4), (0, 3)], [1, 5, 3], True),
+                          ([(0, 2), (2, 4), (0, 3)], [2, 5, 3], False),
+                          ([(0, 2), (0, 1), (1, 2)], [2, 1, 3], False)])
+def test_compute_nd_slice_is_contiguous(slices, shape, contiguous):
+
+    from distdl.utilities.slicing import assemble_slices
+    from distdl.utilities.slicing import compute_nd_slice_is_contiguous
+
+    slices = assemble_slices([s[0] for s in slices], [s[1] for s in slices])
+
+    assert(compute_nd_slice_is_contiguous(slices, shape) == contiguous)
@@ -0,0 +1,199 @@
+import numpy as np
+import pytest
+
+global_shape_parametrizations = []
+
+global_shape_parametrizations.append(
+    pytest.param(
+        np.arange(0, 6), [1, 2, 3],  # P_x_ranks, P_x_shape
+        [3, 7, 11],  # x_global_shape
+        6,  # passed to comm_split_fixture, required MPI ranks
+        id="uneven-3D",
+        marks=[pytest.mark.mpi(min_size=6)]
+        )
+    )
+
+global_shape_parametrizations.append(
+    pytest.param(
+        np.arange(2, 6), [1, 1, 2, 2],  # P_x_ranks, P_x_shape
+        [2, 5, 10, 9],  # x_global_shape
+        6,  # passed to comm_split_fixture, required MPI ranks
+        id="uneven-4D-subset",
+        marks=[pytest.mark.mpi(min_size=6)]
+        )
+    )
+
+
+@pytest.mark.parametrize("P_x_ranks, P_x_shape,"
+                         "x_global_shape,"
+                         "comm_split_fixture",
+                         global_shape_parametrizations,
+                         indirect=["comm_split_fixture"])
+def test_compute_global_tensor_shape(barrier_fence_fixture,
+                                     comm_split_fixture,
+                                     P_x_ranks, P_x_shape,
+                                     x_global_shape):
+
+    import numpy as np
+    import torch
+
+    from distdl.backends.mpi.partition import MPIPartition
+    from distdl.backends.mpi.tensor_comm import compute_global_tensor_shape
+    from distdl.utilities.slicing import compute_subshape
+    from distdl.utilities.torch import zero_volume_tensor
+
+    # Isolate the minimum needed ranks
+    base_comm, active = comm_split_fixture
+    if not active:
+        return
+    P_world = MPIPartition(base_comm)
+
+    # Create the partitions
+    P_x_base = P_world.create_partition_inclusive(P_x_ranks)
+    P_x = P_x_base.create_cartesian_topology_partition(P_x_shape)
+
+    x_global_shape = np.asarray(x_global_shape)
+
+    x = zero_volume_tensor()
+    if P_x.active:
+        x_local_shape = compute_subshape(P_x.shape,
+                                         P_x.index,
+                                         x_global_shape)
+        x = torch.zeros(*x_local_shape)
+
+    # Every worker in the output partition receives the shape.
+    result = compute_global_tensor_shape(x, P_x, P_world)
+
+    assert(np.array_equal(result, x_global_shape))
+
+
+@pytest.mark.mpi(min_size=4)
+@pytest.mark.parametrize("comm_split_fixture", [4], indirect=["comm_split_fixture"])
+def test_cartesian_subtopology_partition_cache(barrier_fence_fixture,
+                                               comm_split_fixture):
+
+    import numpy as np
+
+    from distdl.backends.mpi.partition import MPIPartition
+
+    # Isolate the minimum needed ranks
+    base_comm, active = comm_split_fixture
+    if not active:
+        return
+    P_world = MPIPartition(base_comm)
+
+    P_x = P_world.create_cartesian_topology_partition([2, 2])
+
+    P_sub = P_x.create_cartesian_subtopology_partition([True, False])
+
+    # Repeated requests for the same sub-topology share one communicator.
+    assert(P_x.create_cartesian_subtopology_partition(np.array([True, False])) is P_sub)
+    assert(P_x.create_cartesian_subtopology_partition([False, True]) is not P_sub)
+
+    assert(P_sub.size == 2)
+
+
+@pytest.mark.mpi(min_size=4)
+@pytest.mark.parametrize("comm_split_fixture", [4], indirect=["comm_split_fixture"])
+@pytest.mark.parametrize("requires_grad", [False, True])
+def test_compute_output_tensor_structure(barrier_fence_fixture,
+                                         comm_split_fixture,
+                                         requires_grad):
+
+    import numpy as np
+    import torch
+
+    from distdl.backends.mpi.partition import MPIPartition
+    from distdl.backends.mpi.tensor_comm import compute_output_tensor_structure
+    from distdl.utilities.torch import zero_volume_tensor
+
+    # Isolate the minimum needed ranks
+    base_comm, active = comm_split_fixture
+    if not active:
+        return
+    P_world = MPIPartition(base_comm)
+
+    P_x_base = P_world.create_partition_inclusive([0])
+    P_x = P_x_base.create_cartesian_topology_partition([1, 1])
+
+    P_y_base = P_world.create_partition_inclusive(np.arange(0, 4))
+    P_y = P_y_base.create_cartesian_topology_partition([2, 2])
+
+    P_send, P_recv = P_x.create_broadcast_partition_to(P_y)
+
+    x_shape = [3, 5]
+    x = zero_volume_tensor()
+    if P_x.active:
+        x = torch.zeros(*x_shape)
+    x.requires_grad = requires_grad
+
+    structure = compute_output_tensor_structure(x, P_send, P_recv)
+
+    assert(structure[0] == requires_grad)
+    assert(structure[1] == len(x_shape))
+    assert(np.array_equal(structure[2], x_shape))
+
+    # A known output shape gives the same structure, without communication.
+    known_structure = compute_output_tensor_structure(x, P_send, P_recv, x_shape)
+
+    assert(known_structure[0] == structure[0])
+    assert(known_structure[1] == structure[1])
+    assert(np.array_equal(known_structure[2], structure[2]))
+
+
+@pytest.mark.mpi(min_size=6)
+@pytest.mark.parametrize("comm_split_fixture", [6], indirect=["comm_split_fixture"])
+@pytest.mark.parametrize("periods", [[False, False], [True, False], [True, True]])
+def test_cartesian_partition_rank_tables(barrier_fence_fixture,
+                                         comm_split_fixture,
+                                         periods):
+
+    import itertools
+
+    import numpy as np
+    from mpi4py import MPI
+
+    from distdl.backends.mpi.partition import MPIPartition
+
+    # Isolate the minimum needed ranks
+    base_comm, active = comm_split_fixture
+    if not active:
+        return
+    P_world = MPIPartition(base_comm)
+
+    P_x = P_world.create_cartesian_topology_partition([2, 3], periods=periods)
+
+    assert(np.array_equal(P_x.periods, periods))
+
+    # The tables must agree with the Cartesian communicator.
+    ranks = np.arange(P_x.size)
+    indices = P_x.cartesian_index(ranks)
+    for rank in ranks:
+        coords = P_x.comm.Get_coords(rank)
+        assert(np.array_equal(P_x.cartesian_index(rank), coords))
+        assert(np.array_equal(indices[rank], coords))
+        assert(P_x.cartesian_rank(coords) == rank)
+    assert(np.array_equal(P_x.cartesian_rank(indices), ranks))
+
+    def cart_rank(index):
+        # Get_cart_rank wraps periodic dimensions, but not others.
+        for i, (c, n) in enumerate(zip(index, P_x.shape)):
+            if not periods[i] and (c < 0 or c >= n):
+                return MPI.PROC_NULL
+        return P_x.comm.Get_cart_rank(list(index))
+
+    for rank in ranks:
+        index = P_x.comm.Get_coords(rank)
+
+        expected = []
+        for i in range(P_x.dim):
+            lindex = [x-1 if j == i else x for j, x in enumerate(index)]
+            rindex = [x+1 if j == i else x for j, x in enumerate(index)]
+            expected.append((cart_rank(lindex), cart_rank(rindex)))
+        assert(P_x.neighbor_ranks(rank) == expected)
+
+        expected = []
+        for offset in itertools.product([-1, 0, 1], repeat=P_x.dim):
+            if any(offset):
+                expected.append((offset, cart_rank([x + o for x, o in zip(index, offset)])))
+        assert(P_x.diagonal_neighbor_ranks(rank) == expected)
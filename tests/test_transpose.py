@@ -126,11 +126,14 @@ adjoint_parametrizations.append(
                          "comm_split_fixture",
                          adjoint_parametrizations,
                          indirect=["comm_split_fixture"])
+@pytest.mark.parametrize("chunk_size, chunks_in_flight, use_alltoallv",
+                         [(None, 2, False), (13, 1, False), (13, 3, False), (None, 2, True)])
 def test_transpose_adjoint(barrier_fence_fixture,
                            comm_split_fixture,
                            P_x_ranks, P_x_shape,
                            P_y_ranks, P_y_shape,
-                           x_global_shape):
+                           x_global_shape,
+                           chunk_size, chunks_in_flight, use_alltoallv):
 
     import numpy as np
     import torch
@@ -154,7 +157,10 @@ def test_transpose_adjoint(barrier_fence_fixture,
     P_y = P_y_base.create_cartesian_topology_partition(P_y_shape)
 
     # The global tensor size is the same for x and y
-    layer = DistributedTranspose(P_x, P_y, preserve_batch=False)
+    layer = DistributedTranspose(P_x, P_y, preserve_batch=False,
+                                 chunk_size=chunk_size,
+                                 chunks_in_flight=chunks_in_flight,
+                                 use_alltoallv=use_alltoallv)
 
     # Forward Input
     x = zero_volume_tensor()
@@ -363,3 +369,132 @@ def test_excepts_mismatched_nondivisible_tensor(barrier_fence_fixture,
         x.requires_grad = True
 
         layer(x)
+
+
+@pytest.mark.mpi(min_size=4)
+@pytest.mark.parametrize("comm_split_fixture", [4], indirect=["comm_split_fixture"])
+@pytest.mark.parametrize("dtype", ["float64", "float16", "bfloat16"])
+@pytest.mark.parametrize("chunk_size, use_alltoallv",
+                         [(None, False), (2, False), (None, True)])
+def test_transpose_dtype(barrier_fence_fixture,
+                         comm_split_fixture,
+                         dtype,
+                         chunk_size, use_alltoallv):
+
+    import numpy as np
+    import torch
+
+    from distdl.backends.mpi.partition import MPIPartition
+    from distdl.nn.transpose import DistributedTranspose
+    from distdl.utilities.slicing import compute_subshape
+    from distdl.utilities.slicing import compute_start_index
+    from distdl.utilities.slicing import compute_stop_index
+    from distdl.utilities.torch import zero_volume_tensor
+
+    # Isolate the minimum needed ranks
+    base_comm, active = comm_split_fixture
+    if not active:
+        return
+    P_world = MPIPartition(base_comm)
+
+    # The output partition has a worker that holds no input.
+    P_x_base = P_world.create_partition_inclusive(np.arange(0, 2))
+    P_x = P_x_base.create_cartesian_topology_partition([2, 1])
+
+    P_y_base = P_world.create_partition_inclusive(np.arange(1, 4))
+    P_y = P_y_base.create_cartesian_topology_partition([1, 3])
+
+    dtype = getattr(torch, dtype)
+    x_global_shape = np.array([5, 7])
+
+    # Small integers are exact in every dtype.
+    x_global = (torch.arange(np.prod(x_global_shape)).reshape(*x_global_shape) % 7).to(dtype)
+
+    layer = DistributedTranspose(P_x, P_y, preserve_batch=False,
+                                 chunk_size=chunk_size,
+                                 use_alltoallv=use_alltoallv)
+
+    x = zero_volume_tensor()
+    if P_x.active:
+        start = compute_start_index(P_x.shape, P_x.index, x_global_shape)
+        stop = compute_stop_index(P_x.shape, P_x.index, x_global_shape)
+        x = x_global[start[0]:stop[0], start[1]:stop[1]].clone()
+    x.requires_grad = True
+
+    y = layer(x)
+
+    if P_y.active:
+        start = compute_start_index(P_y.shape, P_y.index, x_global_shape)
+        stop = compute_stop_index(P_y.shape, P_y.index, x_global_shape)
+        assert(y.dtype == dtype)
+        assert(torch.equal(y, x_global[start[0]:stop[0], start[1]:stop[1]]))
+
+    dy = zero_volume_tensor(dtype=dtype)
+    if P_y.active:
+        dy = torch.ones(*compute_subshape(P_y.shape, P_y.index, x_global_shape), dtype=dtype)
+    y.backward(dy)
+
+    if P_x.active:
+        assert(x.grad.dtype == dtype)
+        assert(torch.equal(x.grad, torch.ones_like(x)))
+
+
+@pytest.mark.mpi(min_size=4)
+@pytest.mark.parametrize("comm_split_fixture", [4], indirect=["comm_split_fixture"])
+def test_transpose_reuse_output(barrier_fence_fixture,
+                                comm_split_fixture):
+
+    import numpy as np
+    import torch
+
+    from distdl.backends.mpi.partition import MPIPartition
+    from distdl.nn.transpose import DistributedTranspose
+    from distdl.utilities.slicing import compute_start_index
+    from distdl.utilities.slicing import compute_stop_index
+    from distdl.utilities.torch import zero_volume_tensor
+
+    # Isolate the minimum needed ranks
+    base_comm, active = comm_split_fixture
+    if not active:
+        return
+    P_world = MPIPartition(base_comm)
+
+    P_x_base = P_world.create_partition_inclusive(np.arange(0, 2))
+    P_x = P_x_base.create_cartesian_topology_partition([2, 1])
+
+    P_y_base = P_world.create_partition_inclusive(np.arange(1, 4))
+    P_y = P_y_base.create_cartesian_topology_partition([1, 3])
+
+    x_global_shape = np.array([5, 7])
+
+    layer = DistributedTranspose(P_x, P_y, preserve_batch=False,
+                                 reuse_output=True)
+
+    outputs = []
+    for step in range(2):
+        x_global = torch.arange(np.prod(x_global_shape), dtype=torch.float64).reshape(*x_global_shape) + step
+
+        x = zero_volume_tensor()
+        if P_x.active:
+            start = compute_start_index(P_x.shape, P_x.index, x_global_shape)
+            stop = compute_stop_index(P_x.shape, P_x.index, x_global_shape)
+            x = x_global[start[0]:stop[0], start[1]:stop[1]].clone()
+        x.requires_grad = True
+
+        y = layer(x)
+
+        if P_y.active:
+            start = compute_start_index(P_y.shape, P_y.index, x_global_shape)
+            stop = compute_stop_index(P_y.shape, P_y.index, x_global_shape)
+            assert(torch.equal(y, x_global[start[0]:stop[0], start[1]:stop[1]]))
+
+        y.backward(torch.ones_like(y))
+
+        if P_x.active:
+            assert(torch.equal(x.grad, torch.ones_like(x)))
+
+        outputs.append(y)
+
+    # Both calls write their output into the same storage.
+    if P_y.active:
+        assert(outputs[0].data_ptr() == outputs[1].data_ptr())
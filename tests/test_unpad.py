@@ -67,3 +67,42 @@ def test_unpadnd_adjoint(barrier_fence_fixture,
     y = y.detach()
 
     check_adjoint_test_tight(P_world, x, dx, y, dy)
+
+
+@pytest.mark.parametrize("x_local_shape,"
+                         "padding,"
+                         "comm_split_fixture",
+                         adjoint_parametrizations,
+                         indirect=["comm_split_fixture"])
+def test_unpadnd_inplace(barrier_fence_fixture,
+                         comm_split_fixture,
+                         x_local_shape,
+                         padding):
+
+    import numpy as np
+    import torch
+
+    from distdl.nn.unpadnd import UnpadNd
+
+    # Isolate the minimum needed ranks
+    base_comm, active = comm_split_fixture
+    if not active:
+        return
+
+    padding = np.asarray(padding)
+
+    layer = UnpadNd(padding, value=0)
+
+    x = torch.tensor(np.random.randn(*x_local_shape))
+    x.requires_grad = True
+
+    # The output is a view, which must support in-place operations.
+    y = layer(2*x)
+    torch.relu_(y)
+    y.sum().backward()
+
+    slices = tuple(slice(lpad, n - rpad) for n, (lpad, rpad) in zip(x_local_shape, padding))
+    dx = torch.zeros_like(x)
+    dx[slices] = 2*(x[slices] > 0)
+
+    assert(torch.equal(x.grad, dx))